@@ -1,19 +1,38 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 from werkzeug.utils import secure_filename
 import os
 import json
 import csv
 import io
-from datetime import datetime
+import zlib
+from datetime import datetime, timezone
 from main import run_qna_pipeline
-from scorer import get_similarity_scores, evaluate_qa_pairs
+from scorer import get_similarity_scores
 import csv
 from dotenv import load_dotenv
-import smtplib
-from email.message import EmailMessage
 from audio_detector import AudioDetector, VoiceRegistrationError
+from vad_model import get_vad_load_info
+from embedding_model import get_embedding_load_info
+from detection_engine import AudioDetectionEngine, SessionLimitError
+from audio_sources import decode_pcm, decode_compressed
+from voice_profile_store import get_profile_store, MATCH_THRESHOLD
+from event_log import get_event_log, close_event_logs
+from results_store import get_results_store
+from leaderboard import get_leaderboard
+from mail_outbox import get_mail_outbox
+from event_bus import get_event_bus, DEFAULT_CHANNEL
+from session_state import get_session_state_store
+from interview_workspace import get_workspace_manager, DEFAULT_SESSION
 import atexit
 import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no pre-fork server there, so the thread lock is enough
+    fcntl = None
 
 
 
@@ -26,26 +45,78 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs('data', exist_ok=True)
 os.makedirs('templates', exist_ok=True)
 
-# File paths
-TOP_FILE = 'data/top.json'
-RESULTS_FILE = 'data/interview_results.json'
-SESSIONS_FILE = 'data/active_sessions.json'
-
-# Initialize data files if they don't exist
-def initialize_data_files():
-    if not os.path.exists(TOP_FILE):
-        with open(TOP_FILE, 'w') as f:
-            json.dump([], f)
-    
-    if not os.path.exists(RESULTS_FILE):
-        with open(RESULTS_FILE, 'w') as f:
-            json.dump([], f)
-    
-    if not os.path.exists(SESSIONS_FILE):
-        with open(SESSIONS_FILE, 'w') as f:
-            json.dump({}, f)
-
-initialize_data_files()
+# Results and top candidates live in SQLite (data/interview.db); the old
+# interview_results.json / top.json are imported on first start
+results_store = get_results_store()
+leaderboard = get_leaderboard(results_store)
+
+# Per-session runtime status (registration, interview, malpractice) lives in memory,
+# snapshotted to data/session_state.json; changes are also pushed to browsers over
+# /session-events (SSE) with a polling fallback
+def restore_session_state(session_id, key):
+    """Snapshot values still true after a restart.
+
+    Engine sessions don't survive one, and the server-mic detector starts
+    unregistered with no interview running, so only the default channel's
+    malpractice record is carried over.
+    """
+    return session_id == DEFAULT_CHANNEL and key == 'malpractice'
+
+session_state = get_session_state_store(restore=restore_session_state)
+event_bus = get_event_bus()
+
+# Each interview's history, transcript and uploaded documents live in their own
+# data/sessions/<session_id>/ workspace; idle workspaces are removed after a TTL
+workspaces = get_workspace_manager()
+
+# Streams opened after a restart start from the snapshotted state
+for restored_session in session_state.sessions():
+    for key, value in session_state.get_session(restored_session)['state'].items():
+        event_bus.publish(restored_session, key, value)
+SSE_KEEPALIVE_SECONDS = 15
+SSE_MAX_STREAM_SECONDS = 300  # Streams end periodically; EventSource reconnects and resumes from Last-Event-ID
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', 32))  # Per worker; beyond it browsers fall back to polling
+
+# Each request and each open event stream holds one of the worker's request threads
+# (GUNICORN_THREADS, set by gunicorn.conf.py); readiness fails once they are all busy
+WORKER_THREADS = int(os.getenv('GUNICORN_THREADS', 0))
+busy_threads = {'requests': 0, 'streams': 0}
+busy_threads_lock = threading.Lock()
+
+def adjust_busy_threads(kind, delta):
+    """Count requests or event streams starting (+1) or ending (-1); returns the new count"""
+    with busy_threads_lock:
+        busy_threads[kind] += delta
+        return busy_threads[kind]
+
+@app.before_request
+def count_request_start():
+    adjust_busy_threads('requests', 1)
+
+@app.teardown_request
+def count_request_end(exc):
+    adjust_busy_threads('requests', -1)
+
+HR_CSV_FILE = 'data/hr_results.csv'
+HR_CSV_HEADER = ['ID', 'Name', 'Email', 'Position', 'Score', 'Timestamp']
+hr_csv_lock = threading.Lock()
+
+@contextmanager
+def hr_csv_locked():
+    """Hold the HR CSV across threads and worker processes (flock on a sidecar file).
+
+    Callers hold it around the results store write as well as the CSV
+    update, so a rewrite never misses or repeats a row appended meanwhile.
+    """
+    with hr_csv_lock, open(HR_CSV_FILE + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+def set_session_state(session_id, key, value):
+    """Record a session status value and push it to the session's event stream"""
+    session_state.set(session_id, key, value)
+    event_bus.publish(session_id, key, value)
 
 def initialize_audio_detector():
     """Initialize the enhanced audio detector with voice registration"""
@@ -53,52 +124,41 @@ def initialize_audio_detector():
     
     def warning_handler(count, max_warnings, violation_type):
         print(f"⚠️  Voice Detection Warning {count}/{max_warnings}: {violation_type}")
-        # Store warning in session data for frontend
-        try:
-            warning_data = {
-                'count': count,
-                'max_warnings': max_warnings,
-                'violation_type': violation_type,
-                'timestamp': datetime.now().isoformat()
-            }
-            with open('data/current_warnings.json', 'w') as f:
-                json.dump(warning_data, f)
-        except Exception as e:
-            print(f"Error storing warning data: {e}")
+        # The detector appends the incident to the event log (GET /events) off the audio thread
+        event_bus.publish(DEFAULT_CHANNEL, 'warning', {
+            'count': count, 'max_warnings': max_warnings, 'violation_type': violation_type
+        })
     
     def cancel_handler(reason):
         print(f"❌ Interview cancelled due to: {reason}")
-        try:
-            # Update interview status in session
-            with open('data/interview_status.json', 'w') as f:
-                json.dump({
-                    'status': 'cancelled',
-                    'reason': reason,
-                    'timestamp': datetime.now().isoformat()
-                }, f)
-        except Exception as e:
-            print(f"Error updating interview status: {e}")
+        set_session_state(DEFAULT_CHANNEL, 'interview_status', {
+            'status': 'cancelled',
+            'reason': reason,
+            'timestamp': datetime.now().isoformat()
+        })
     
     def malpractice_handler(count, max_attempts):
         print(f"🚨 MALPRACTICE ATTEMPT {count}/{max_attempts}: Multiple violations detected!")
-        try:
-            malpractice_data = {
-                'count': count,
-                'max_attempts': max_attempts,
-                'timestamp': datetime.now().isoformat()
-            }
-            with open('data/malpractice_status.json', 'w') as f:
-                json.dump(malpractice_data, f)
-        except Exception as e:
-            print(f"Error storing malpractice data: {e}")
+        set_session_state(DEFAULT_CHANNEL, 'malpractice', {
+            'count': count,
+            'max_attempts': max_attempts,
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    def status_handler(status):
+        set_session_state(DEFAULT_CHANNEL, 'warning_status', status)
     
     try:
         audio_detector = AudioDetector(
             warning_callback=warning_handler,
             cancel_callback=cancel_handler,
-            malpractice_callback=malpractice_handler
+            malpractice_callback=malpractice_handler,
+            status_callback=status_handler
         )
         print("🎤 Enhanced audio detector with voice registration initialized successfully")
+        vad_info = get_vad_load_info()
+        if vad_info:
+            print(f"   VAD model ({vad_info['backend']}) loaded in {vad_info['load_seconds'] * 1000:.0f} ms")
         return True
     except Exception as e:
         print(f"❌ Failed to initialize audio detector: {e}")
@@ -107,6 +167,66 @@ def initialize_audio_detector():
 # Initialize audio detector
 audio_available = initialize_audio_detector()
 
+def initialize_detection_engine():
+    """Initialize the multi-session detection engine (shared VAD model, fixed worker pool)"""
+    global detection_engine
+    
+    try:
+        detection_engine = AudioDetectionEngine()
+        detection_engine.start()
+        print(f"🎧 Detection engine ready for up to {detection_engine.max_sessions} concurrent sessions")
+        return True
+    except Exception as e:
+        detection_engine = None
+        print(f"❌ Failed to initialize detection engine: {e}")
+        return False
+
+engine_available = initialize_detection_engine()
+
+def make_session_handlers(session_id):
+    """Build detector callbacks that tag events with their session id and publish them to its channel"""
+    def warning_handler(count, max_warnings, violation_type):
+        print(f"⚠️  [{session_id}] Voice Detection Warning {count}/{max_warnings}: {violation_type}")
+        event_bus.publish(session_id, 'warning', {
+            'count': count, 'max_warnings': max_warnings, 'violation_type': violation_type
+        })
+    
+    def cancel_handler(reason):
+        print(f"❌ [{session_id}] Interview cancelled due to: {reason}")
+        set_session_state(session_id, 'interview_status', {
+            'status': 'cancelled', 'reason': reason, 'timestamp': datetime.now().isoformat()
+        })
+    
+    def malpractice_handler(count, max_attempts):
+        print(f"🚨 [{session_id}] MALPRACTICE ATTEMPT {count}/{max_attempts}")
+        set_session_state(session_id, 'malpractice', {
+            'count': count, 'max_attempts': max_attempts, 'timestamp': datetime.now().isoformat()
+        })
+    
+    def status_handler(status):
+        set_session_state(session_id, 'warning_status', status)
+    
+    return {
+        'warning_callback': warning_handler,
+        'cancel_callback': cancel_handler,
+        'malpractice_callback': malpractice_handler,
+        'status_callback': status_handler
+    }
+
+def publish_registration_status(channel, status):
+    """Record and publish a voice registration state change"""
+    status['timestamp'] = datetime.now().isoformat()
+    set_session_state(channel, 'registration', status)
+
+def watch_voice_registration(detector, registration_thread, channel):
+    """Publish the outcome once a registration thread finishes"""
+    registration_thread.join()
+    publish_registration_status(channel, {
+        'status': 'completed',
+        'success': detector.is_voice_registered,
+        'profile_matches': detector.profile_matches
+    })
+
 # Add cleanup function
 def cleanup_audio():
     """Cleanup audio detector on app shutdown"""
@@ -114,6 +234,10 @@ def cleanup_audio():
     if audio_detector:
         audio_detector.cleanup()
         print("🔧 Audio detector cleaned up")
+    if detection_engine:
+        detection_engine.stop()
+        print("🔧 Detection engine stopped")
+    close_event_logs()
 
 # Register cleanup function
 atexit.register(cleanup_audio)
@@ -172,38 +296,16 @@ def start_voice_registration():
         def registration_worker():
             try:
                 registration_thread = audio_detector.start_voice_registration(duration)
-                registration_thread.join()  # Wait for registration to complete
-                
-                # Update registration status
-                with open('data/registration_status.json', 'w') as f:
-                    json.dump({
-                        'status': 'completed',
-                        'success': audio_detector.is_voice_registered,
-                        'timestamp': datetime.now().isoformat()
-                    }, f)
+                # Wait for registration to complete, then publish the outcome
+                watch_voice_registration(audio_detector, registration_thread, DEFAULT_CHANNEL)
                     
             except VoiceRegistrationError as e:
-                with open('data/registration_status.json', 'w') as f:
-                    json.dump({
-                        'status': 'failed',
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
-                    }, f)
+                publish_registration_status(DEFAULT_CHANNEL, {'status': 'failed', 'error': str(e)})
             except Exception as e:
-                with open('data/registration_status.json', 'w') as f:
-                    json.dump({
-                        'status': 'error',
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
-                    }, f)
+                publish_registration_status(DEFAULT_CHANNEL, {'status': 'error', 'error': str(e)})
         
         # Set initial status
-        with open('data/registration_status.json', 'w') as f:
-            json.dump({
-                'status': 'recording',
-                'duration': duration,
-                'timestamp': datetime.now().isoformat()
-            }, f)
+        publish_registration_status(DEFAULT_CHANNEL, {'status': 'recording', 'duration': duration})
         
         # Start registration thread
         reg_thread = threading.Thread(target=registration_worker)
@@ -222,20 +324,93 @@ def start_voice_registration():
             'message': f'Failed to start voice registration: {str(e)}'
         })
 
+@app.route('/check-voice-quality', methods=['GET', 'POST'])
+def check_voice_quality():
+    """Microphone pre-check: SNR, clipping, speech ratio and loudness folded into quality_score (0-1).
+
+    With no live capture, POST starts a fresh `seconds`-long measurement and
+    returns status 'measuring' right away; GET returns 'measuring' until it
+    is done, then the result. Live audio is scored over a rolling window.
+    """
+    try:
+        session_id = request.args.get('session_id')
+        if session_id:
+            # Engine sessions are measured from the audio they stream in
+            detector = detection_engine.get_session(session_id) if detection_engine else None
+            if detector is None:
+                return jsonify({'status': 'error', 'message': f'Unknown session: {session_id}'}), 404
+            return jsonify({'status': 'success', **detector.get_voice_quality()})
+        
+        if not audio_detector:
+            return jsonify({'status': 'error', 'message': 'Audio detector not available'})
+        
+        # With no live capture, record a short sample just for the check (in the background)
+        min_seconds = request.args.get('seconds', 3, type=float)
+        capturing = audio_detector.is_monitoring or audio_detector.is_registering
+        start_check = request.method == 'POST' or audio_detector.voice_quality.seconds == 0
+        if not capturing and not audio_detector.is_quality_checking and start_check:
+            if not audio_detector.is_audio_device_available():
+                return jsonify({
+                    'status': 'error',
+                    'quality_score': 0.0,
+                    'message': 'No audio input device detected. Please check your microphone.'
+                })
+            audio_detector.start_quality_check(min_seconds)
+        
+        if audio_detector.is_quality_checking:
+            return jsonify({'status': 'measuring', 'duration': min_seconds, **audio_detector.get_voice_quality()})
+        return jsonify({'status': 'success', **audio_detector.get_voice_quality()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'quality_score': 0.0, 'message': str(e)})
+
+@app.route('/get-system-status', methods=['GET'])
+def get_system_status():
+    """Health of the audio pipeline; status is 'error' when proctoring cannot work"""
+    try:
+        problems = []
+        detector_status = None
+        if audio_detector:
+            capture_alive = bool(audio_detector.audio_thread and audio_detector.audio_thread.is_alive())
+            detector_status = {
+                'is_registered': audio_detector.is_voice_registered,
+                'is_registering': audio_detector.is_registering,
+                'is_monitoring': audio_detector.is_monitoring,
+                'is_interview_active': audio_detector.is_interview_active,
+                'capture_alive': capture_alive,
+                'queue': audio_detector.get_queue_stats()
+            }
+            if audio_detector.is_monitoring and not capture_alive:
+                problems.append('Audio capture has stopped')
+        else:
+            problems.append('Audio detector not available')
+        
+        return jsonify({
+            'status': 'error' if problems else 'success',
+            'problems': problems,
+            'audio_detector': detector_status,
+            'detection_engine': {
+                'active_sessions': len(detection_engine.sessions),
+                'max_sessions': detection_engine.max_sessions,
+                'workers_alive': sum(worker.is_alive() for worker in detection_engine.workers)
+            } if detection_engine else None,
+            'vad_model': get_vad_load_info(),
+            'event_log': get_event_log().get_stats(),
+            'mail_outbox': mail_outbox.get_stats(),
+            'event_bus': event_bus.get_stats(),
+            'session_state': session_state.get_stats(),
+            'workspaces': workspaces.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
 @app.route('/check-registration-status', methods=['GET'])
 def check_registration_status():
-    """Check voice registration status"""
+    """Check voice registration status (?session_id= for an engine session)"""
     try:
-        status_file = 'data/registration_status.json'
-        if os.path.exists(status_file):
-            with open(status_file, 'r') as f:
-                status = json.load(f)
-            return jsonify({'status': 'success', 'registration': status})
-        else:
-            return jsonify({
-                'status': 'success',
-                'registration': {'status': 'not_started'}
-            })
+        session_id = request.args.get('session_id') or DEFAULT_CHANNEL
+        status, version = session_state.get(session_id, 'registration', {'status': 'not_started'})
+        return jsonify({'status': 'success', 'registration': status, 'version': version})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
@@ -284,29 +459,62 @@ def load_voice_profile():
 def get_voice_profiles():
     """Get list of available voice profiles"""
     try:
-        profiles_dir = 'data/voice_profiles'
-        if not os.path.exists(profiles_dir):
-            return jsonify({'status': 'success', 'profiles': []})
+        # Newest first, read from the profile index without touching the feature matrix
+        profiles = [{
+            'session_id': profile['session_id'],
+            'timestamp': profile['timestamp'],
+            'blacklisted': profile['blacklisted']
+        } for profile in get_profile_store().list_profiles()]
         
-        profiles = []
-        for filename in os.listdir(profiles_dir):
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(profiles_dir, filename), 'r') as f:
-                        profile_data = json.load(f)
-                    
-                    profiles.append({
-                        'session_id': profile_data['session_id'],
-                        'timestamp': profile_data['timestamp'],
-                        'filename': filename
-                    })
-                except Exception as e:
-                    print(f"Error reading profile {filename}: {e}")
+        return jsonify({'status': 'success', 'profiles': profiles})
+        
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/search-voice-profiles', methods=['POST'])
+def search_voice_profiles():
+    """Find stored voice profiles similar to a session's profile (blacklisted or proxy speakers)"""
+    try:
+        data = request.get_json() if request.is_json else {}
+        session_id = data.get('session_id')
+        top_k = int(data.get('top_k', 5))
+        min_similarity = data.get('min_similarity', MATCH_THRESHOLD)
         
-        # Sort by timestamp (newest first)
-        profiles.sort(key=lambda x: x['timestamp'], reverse=True)
+        store = get_profile_store()
+        if session_id:
+            profile = store.get(session_id)
+            if profile is None:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'No voice profile for session {session_id}'
+                }), 404
+            features = profile[0]
+        elif data.get('features'):
+            features = data['features']
+        else:
+            return jsonify({
+                'status': 'error',
+                'message': 'session_id or features required'
+            }), 400
         
-        return jsonify({'status': 'success', 'profiles': profiles})
+        matches = store.search(
+            features,
+            top_k=top_k,
+            min_similarity=min_similarity,
+            exclude=session_id,
+            blacklisted_only=bool(data.get('blacklisted_only', False))
+        )
+        
+        # Nearest profiles are only candidates for review until the match threshold is calibrated
+        calibrated = MATCH_THRESHOLD is not None
+        return jsonify({
+            'status': 'success',
+            'matches': matches,
+            'calibrated': calibrated,
+            'blacklisted_match': calibrated and any(
+                match['blacklisted'] and match['similarity'] >= MATCH_THRESHOLD for match in matches
+            )
+        })
         
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
@@ -412,6 +620,9 @@ def start_interview_monitoring():
     
     try:
         audio_detector.start_interview()
+        set_session_state(DEFAULT_CHANNEL, 'interview_status', {
+            'status': 'active', 'timestamp': datetime.now().isoformat()
+        })
         return jsonify({
             'status': 'success',
             'message': 'Interview monitoring started with voice verification'
@@ -487,20 +698,287 @@ def get_malpractice_log():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
+@app.route('/events', methods=['GET'])
+def get_events():
+    """Tail the proctoring event log: events after `after` (a seq), optionally for one session"""
+    try:
+        session_id = request.args.get('session_id')
+        after = request.args.get('after', 0, type=int)
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        event_types = request.args.get('types')
+        
+        event_log = get_event_log()
+        events = event_log.read(
+            session_id=session_id,
+            after_seq=after,
+            limit=limit,
+            event_types=set(event_types.split(',')) if event_types else None
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'events': events,
+            'next': events[-1]['seq'] if events else after,
+            'last_seq': event_log.last_seq(session_id)
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
 @app.route('/check-interview-status', methods=['GET'])
 def check_interview_status():
-    """Check if interview was cancelled due to voice detection"""
+    """Check if interview was cancelled due to voice detection (?session_id= for an engine session)"""
+    try:
+        session_id = request.args.get('session_id') or DEFAULT_CHANNEL
+        status, version = session_state.get(session_id, 'interview_status', {'status': 'active'})
+        return jsonify({'status': 'success', 'interview_status': status, 'version': version})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+def format_sse(event):
+    """One event in text/event-stream framing"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+@app.route('/session-events', methods=['GET'])
+def session_events():
+    """Server-Sent Events stream of a session's status changes (?session_id=, default: the app-wide detector)
+    
+    Event types: warning, warning_status, malpractice, interview_status,
+    registration. A reconnecting EventSource sends Last-Event-ID and gets
+    what it missed; a new connection starts with the latest state of each type.
+    """
+    channel = request.args.get('session_id') or DEFAULT_CHANNEL
+    after = request.headers.get('Last-Event-ID', request.args.get('after', 0, type=int), type=int) or 0
+    
+    # A stream holds a request thread for minutes; refuse it rather than starve other requests.
+    # EventSource gives up on a 503 and the page polls /session-events/poll instead.
+    if adjust_busy_threads('streams', 1) > SSE_MAX_STREAMS:
+        adjust_busy_threads('streams', -1)
+        return jsonify({'status': 'error', 'message': 'Too many open event streams'}), 503
+    
+    # Subscribe before replaying so nothing published in between is lost
+    subscription = event_bus.subscribe(channel)
+    
+    def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            last_id = after
+            for event in event_bus.since(channel, after):
+                last_id = event['id']
+                yield format_sse(event)
+            
+            deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+            while time.monotonic() < deadline and not subscription.overflowed:
+                event = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ': keepalive\n\n'
+                elif event['id'] > last_id:
+                    last_id = event['id']
+                    yield format_sse(event)
+        finally:
+            subscription.close()
+    
+    response = Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let a reverse proxy buffer the stream
+    })
+    response.call_on_close(lambda: adjust_busy_threads('streams', -1))
+    return response
+
+@app.route('/session-events/poll', methods=['GET'])
+def poll_session_events():
+    """Polling fallback for /session-events: events after ?after= (an event id), oldest first"""
+    try:
+        channel = request.args.get('session_id') or DEFAULT_CHANNEL
+        after = request.args.get('after', 0, type=int)
+        events = event_bus.since(channel, after)
+        return jsonify({
+            'status': 'success',
+            'events': events,
+            'last_id': events[-1]['id'] if events else after
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+# ===== MULTI-SESSION DETECTION ENDPOINTS =====
+
+@app.route('/audio-sessions', methods=['GET'])
+def list_audio_sessions():
+    """List detection sessions and engine capacity"""
+    if not detection_engine:
+        return jsonify({'status': 'error', 'message': 'Detection engine not available'})
+    
+    return jsonify({'status': 'success', 'engine': detection_engine.get_status()})
+
+@app.route('/audio-sessions', methods=['POST'])
+def create_audio_session():
+    """Admit a new proctoring session into the detection engine"""
+    if not detection_engine:
+        return jsonify({'status': 'error', 'message': 'Detection engine not available'})
+    
     try:
-        status_file = 'data/interview_status.json'
-        if os.path.exists(status_file):
-            with open(status_file, 'r') as f:
-                status = json.load(f)
-            return jsonify({'status': 'success', 'interview_status': status})
+        data = request.get_json() if request.is_json else {}
+        session_id = data.get('session_id') or uuid.uuid4().hex[:12]
+        
+        detector = detection_engine.create_session(session_id, **make_session_handlers(session_id))
+        
+        return jsonify({
+            'status': 'success',
+            'session_id': detector.session_id,
+            'message': 'Detection session created'
+        })
+        
+    except SessionLimitError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 429
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/audio-sessions/<session_id>', methods=['DELETE'])
+def close_audio_session(session_id):
+    """Close a detection session and free its slot"""
+    if not detection_engine:
+        return jsonify({'status': 'error', 'message': 'Detection engine not available'})
+    
+    # Status left over from a session the engine no longer has is cleared too
+    closed = detection_engine.close_session(session_id)
+    event_bus.drop_channel(session_id)
+    had_state = session_state.remove(session_id)
+    if closed or had_state:
+        return jsonify({'status': 'success', 'message': f'Session {session_id} closed'})
+    return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+
+@app.route('/audio-sessions/<session_id>/load-voice-profile', methods=['POST'])
+def load_session_voice_profile(session_id):
+    """Load a stored voice profile into a detection session"""
+    detector = detection_engine.get_session(session_id) if detection_engine else None
+    if not detector:
+        return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+    
+    data = request.get_json() if request.is_json else {}
+    profile_id = data.get('profile_id', session_id)
+    
+    if detector.load_voice_registration(profile_id):
+        return jsonify({'status': 'success', 'is_registered': True})
+    return jsonify({'status': 'error', 'message': 'Failed to load voice profile'})
+
+@app.route('/audio-sessions/<session_id>/start-interview', methods=['POST'])
+def start_session_interview(session_id):
+    """Start voice verification for a detection session"""
+    detector = detection_engine.get_session(session_id) if detection_engine else None
+    if not detector:
+        return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+    
+    if not detector.is_voice_registered:
+        return jsonify({'status': 'error', 'message': 'Voice must be registered before monitoring'})
+    
+    detector.start_interview()
+    set_session_state(session_id, 'interview_status', {'status': 'active', 'timestamp': datetime.now().isoformat()})
+    return jsonify({'status': 'success', 'message': 'Interview monitoring started'})
+
+@app.route('/audio-sessions/<session_id>/end-interview', methods=['POST'])
+def end_session_interview(session_id):
+    """End voice verification for a detection session"""
+    detector = detection_engine.get_session(session_id) if detection_engine else None
+    if not detector:
+        return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+    
+    detector.end_interview()
+    return jsonify({'status': 'success', 'message': 'Interview monitoring ended'})
+
+@app.route('/audio-sessions/<session_id>/start-voice-registration', methods=['POST'])
+def start_session_voice_registration(session_id):
+    """Register a remote candidate's voice from audio streamed to /stream-audio"""
+    detector = detection_engine.get_session(session_id) if detection_engine else None
+    if not detector:
+        return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+    
+    if detector.is_registering:
+        return jsonify({'status': 'error', 'message': 'Voice registration already in progress'})
+    
+    data = request.get_json() if request.is_json else {}
+    duration = data.get('duration', 10)
+    
+    detector.audio.clear()
+    publish_registration_status(session_id, {'status': 'recording', 'duration': duration})
+    registration_thread = detector.start_voice_registration(duration)
+    watcher = threading.Thread(target=watch_voice_registration, args=(detector, registration_thread, session_id))
+    watcher.daemon = True
+    watcher.start()
+    return jsonify({
+        'status': 'success',
+        'message': f'Voice registration started for {duration} seconds',
+        'duration': duration
+    })
+
+# Raw PCM sample formats accepted by /stream-audio and their sample widths
+PCM_SAMPLE_WIDTHS = {'s16le': 2, 'f32le': 4}
+COMPRESSED_AUDIO_TYPES = {'audio/wav', 'audio/x-wav', 'audio/wave', 'audio/flac', 'audio/ogg', 'audio/opus'}
+STREAM_READ_BYTES = 64 * 1024
+
+@app.route('/stream-audio/<session_id>', methods=['POST'])
+def stream_audio(session_id):
+    """Ingest browser-streamed audio for a session (raw PCM, chunked or not, or a compressed file)"""
+    if not detection_engine or not detection_engine.get_session(session_id):
+        return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+    
+    try:
+        sample_rate = int(request.args.get('rate', 16000))
+        channels = int(request.args.get('channels', 1))
+        sample_format = request.args.get('format', 's16le')
+        samples_received = 0
+        
+        if request.mimetype in COMPRESSED_AUDIO_TYPES:
+            audio, sample_rate = decode_compressed(request.get_data())
+            detection_engine.feed_audio(session_id, audio, sample_rate)
+            samples_received = len(audio)
         else:
-            return jsonify({
-                'status': 'success', 
-                'interview_status': {'status': 'active'}
-            })
+            if sample_format not in PCM_SAMPLE_WIDTHS:
+                return jsonify({'status': 'error', 'message': f'Unsupported format: {sample_format}'}), 415
+            
+            # Decode as the body arrives; carry partial frames over to the next read
+            frame_bytes = PCM_SAMPLE_WIDTHS[sample_format] * channels
+            pending = b''
+            while True:
+                data = request.stream.read(STREAM_READ_BYTES)
+                if not data:
+                    break
+                data = pending + data
+                usable = len(data) - len(data) % frame_bytes
+                pending = data[usable:]
+                if usable:
+                    audio = decode_pcm(data[:usable], sample_format, channels)
+                    detection_engine.feed_audio(session_id, audio, sample_rate)
+                    samples_received += len(audio)
+        
+        detector = detection_engine.get_session(session_id)
+        return jsonify({
+            'status': 'success',
+            'samples': samples_received,
+            'is_registering': detector.is_registering if detector else False
+        })
+        
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/audio-metrics', methods=['GET'])
+@app.route('/audio-metrics/<session_id>', methods=['GET'])
+def get_audio_metrics(session_id=None):
+    """Per-stage latency percentiles, queue depth and similarity distribution for a session"""
+    if session_id is None:
+        detector = audio_detector
+    else:
+        detector = detection_engine.get_session(session_id) if detection_engine else None
+    
+    if not detector:
+        return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+    
+    try:
+        return jsonify({
+            'status': 'success',
+            'session_id': detector.session_id,
+            'metrics': detector.get_pipeline_metrics()
+        })
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
@@ -517,7 +995,9 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload():
+    """Start an interview: store the documents in a new session workspace and generate questions"""
     try:
+        session_id = request.form.get('session_id') or uuid.uuid4().hex[:12]
         resume = request.files['resume']
         jd = request.files['jd']
 
@@ -543,30 +1023,19 @@ def upload():
         resume_path = os.path.join(app.config['UPLOAD_FOLDER'], resume_filename)
         jd_path = os.path.join(app.config['UPLOAD_FOLDER'], jd_filename)
 
+        # A fresh workspace for this session; re-uploading restarts its interview
+        workspace = workspaces.create(session_id)
+
         resume.save(resume_path)
         jd.save(jd_path)
-
-        # Store file paths for current session
-        session_data = {
-            "resume": resume_path, 
-            "jd": jd_path,
-            "timestamp": timestamp
-        }
-        
-        with open('data/latest_files.json', 'w') as f:
-            json.dump(session_data, f)
-
-        # Clean up old transcript
-        transcript_path = os.path.join('data', 'transcript.txt')
-        if os.path.exists(transcript_path):
-            os.remove(transcript_path)
+        workspace.set_files(resume=resume_path, jd=jd_path)
 
         # Generate questions
-        history_path = os.path.join('data', 'history.json')
-        result = run_qna_pipeline(resume_path, jd_path, history_path, flask_mode=True)
+        result = run_qna_pipeline(resume_path, jd_path, workspace.history_path, flask_mode=True)
 
         return jsonify({
             "status": "success",
+            "session_id": session_id,
             "result": result,
             "message": "Files uploaded and questions generated successfully"
         })
@@ -578,28 +1047,25 @@ def upload():
 
 def start_voice():
     try:
-        history_path = os.path.join("data", "history.json")
-        if not os.path.exists(history_path):
+        workspace = workspaces.get(request.args.get('session_id') or DEFAULT_SESSION)
+        if workspace is None or not os.path.exists(workspace.history_path):
             return jsonify({"status": "error", "message": "No questions available. Please upload files first."})
 
-        with open(history_path, "r") as f:
-            history = json.load(f)
+        # Next unanswered question, straight from the workspace's answer index
+        next_question = workspace.next_question()
+        if next_question is None:
+            return jsonify({"status": "done", "message": "All questions answered."})
+        index, question = next_question
 
-        # Find next unanswered question
-        for item in history:
-            if item.get("answer") == "<user_input_required>":
-                
-                # Start interview monitoring when first question is served
-                global audio_detector
-                if audio_detector and audio_detector.is_voice_registered:
-                    try:
-                        audio_detector.start_interview()
-                    except Exception as e:
-                        print(f"Warning: Could not start audio monitoring: {e}")
-                
-                return jsonify({"status": "success", "question": item["question"]})
+        # Start interview monitoring when first question is served
+        global audio_detector
+        if audio_detector and audio_detector.is_voice_registered:
+            try:
+                audio_detector.start_interview()
+            except Exception as e:
+                print(f"Warning: Could not start audio monitoring: {e}")
 
-        return jsonify({"status": "done", "message": "All questions answered."})
+        return jsonify({"status": "success", "index": index, "question": question})
 
     except Exception as e:
         import traceback
@@ -612,31 +1078,27 @@ def save_transcript():
         data = request.get_json()
         question = data.get("question", "").strip()
         answer = data.get("answer", "").strip()
+        index = data.get("index")
 
-        if not question:
+        if not question and index is None:
             return jsonify({"status": "error", "message": "Missing question"}), 400
 
-        # Append to transcript file
-        with open("data/transcript.txt", "a", encoding="utf-8") as f:
-            f.write(f"Q: {question}\nA: {answer}\n\n")
-
-        # Update history file
-        history_path = "data/history.json"
-        if os.path.exists(history_path):
-            with open(history_path, "r") as f:
-                history = json.load(f)
-
-            # Find and update the corresponding question
-            for item in history:
-                if item["question"].strip() == question.strip():
-                    item["answer"] = answer
-                    break
+        workspace = workspaces.get(data.get("session_id") or DEFAULT_SESSION, create=True)
+        with workspace.lock:
+            # Answers are logged by question index; clients that only send the text get the
+            # first unanswered question with that text
+            if index is None:
+                index = workspace.find_question(question)
+            if index is not None:
+                question = workspace.record_answer(int(index), answer)
 
-            with open(history_path, "w") as f:
-                json.dump(history, f, indent=2)
+            # Append to transcript file
+            workspace.append_transcript(f"Q: {question}\nA: {answer}\n\n")
 
         return jsonify({"status": "success"})
 
+    except (IndexError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
 def generate_category_scores(base_score):
@@ -662,30 +1124,9 @@ def generate_category_scores(base_score):
     
     return scores
 
-def update_top_candidates(name, score):
-    """Update the top candidates list"""
-    try:
-        with open(TOP_FILE, 'r') as f:
-            top_candidates = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        top_candidates = []
-
-    # Add new candidate
-    top_candidates.append({
-        'name': name, 
-        'score': round(score * 100, 1),
-        'timestamp': datetime.now().isoformat()
-    })
-    
-    # Keep only top 10, sorted by score
-    top_candidates = sorted(top_candidates, key=lambda x: x['score'], reverse=True)[:10]
-
-    with open(TOP_FILE, 'w') as f:
-        json.dump(top_candidates, f, indent=2)
-
-def save_detailed_transcript(name, email, position, score, qa_pairs):
-    """Save detailed interview transcript"""
-    with open("data/transcript.txt", "a", encoding="utf-8") as f:
+def save_detailed_transcript(workspace, name, email, position, score, qa_pairs):
+    """Save detailed interview transcript to the session's workspace"""
+    with workspace.lock, open(workspace.transcript_path, "a", encoding="utf-8") as f:
         f.write("=" * 80 + "\n")
         f.write(f"INTERVIEW TRANSCRIPT\n")
         f.write(f"Candidate: {name}\n")
@@ -702,20 +1143,60 @@ def save_detailed_transcript(name, email, position, score, qa_pairs):
         
         f.write("\n" + "=" * 80 + "\n\n")
 
+def set_results_validators(response, version, modified):
+    """Tag a results response with the store version so clients can revalidate cheaply"""
+    response.set_etag(f'results-{version}', weak=True)
+    if modified:
+        response.last_modified = datetime.fromtimestamp(int(modified), tz=timezone.utc)
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/get-results', methods=['GET'])
 def get_results():
-    """Get all interview results for the dashboard"""
+    """Get a page of interview results for the dashboard, most recent first
+    
+    Query parameters: position, from / to (ISO date or datetime), min_score /
+    max_score, fields (comma-separated keys to return), limit and cursor (the
+    next_cursor of the previous page). Responses carry an ETag and
+    Last-Modified from the store version; a matching If-None-Match or
+    If-Modified-Since gets 304 without touching the results.
+    """
     try:
-        with open(RESULTS_FILE, 'r') as f:
-            results = json.load(f)
+        version, modified = results_store.version()
         
-        # Sort by timestamp (most recent first)
-        results = sorted(results, key=lambda x: x['timestamp'], reverse=True)
+        # Answer revalidation from the version counter alone
+        not_modified = False
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(f'results-{version}')
+        elif request.if_modified_since and modified:
+            not_modified = int(modified) <= request.if_modified_since.timestamp()
+        if not_modified:
+            return set_results_validators(app.response_class(status=304), version, modified)
         
-        return jsonify({'status': 'success', 'results': results})
+        fields = request.args.get('fields')
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        try:
+            results, next_cursor = results_store.query_results(
+                position=request.args.get('position'),
+                date_from=request.args.get('from'),
+                date_to=request.args.get('to'),
+                min_score=request.args.get('min_score', type=float),
+                max_score=request.args.get('max_score', type=float),
+                cursor=request.args.get('cursor'),
+                limit=limit,
+                fields=[f.strip() for f in fields.split(',') if f.strip()] if fields else None
+            )
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+        response = jsonify({
+            'status': 'success',
+            'results': results,
+            'next_cursor': next_cursor,
+            'version': version
+        })
+        return set_results_validators(response, version, modified)
         
-    except (FileNotFoundError, json.JSONDecodeError):
-        return jsonify({'status': 'success', 'results': []})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
@@ -723,14 +1204,9 @@ def get_results():
 def delete_result(result_id):
     """Delete a specific interview result"""
     try:
-        with open(RESULTS_FILE, 'r') as f:
-            results = json.load(f)
-        
-        # Filter out the result to delete
-        results = [r for r in results if r['id'] != result_id]
-        
-        with open(RESULTS_FILE, 'w') as f:
-            json.dump(results, f, indent=2)
+        with hr_csv_locked():
+            if results_store.delete_result(result_id):
+                export_results_to_csv(results_store.iter_results(oldest_first=True))
         
         return jsonify({'status': 'success', 'message': 'Result deleted successfully'})
         
@@ -741,56 +1217,84 @@ def delete_result(result_id):
 def clear_all_results():
     """Clear all interview results"""
     try:
-        with open(RESULTS_FILE, 'w') as f:
-            json.dump([], f)
-        
-        with open(TOP_FILE, 'w') as f:
-            json.dump([], f)
+        with hr_csv_locked():
+            results_store.clear()
+            export_results_to_csv([])
             
         return jsonify({'status': 'success', 'message': 'All results cleared successfully'})
         
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
+EXPORT_HEADER = ['Name', 'Email', 'Position', 'Overall Score (%)', 'Interview Date', 'Technical Knowledge (%)', 'Communication Skills (%)', 'Problem Solving (%)', 'Relevant Experience (%)', 'Cultural Fit (%)']
+
+def export_row(result):
+    """One /export-results CSV row for a stored result"""
+    try:
+        score = round(float(result.get('score')) * 100, 1)
+    except (TypeError, ValueError):
+        score = ''
+    try:
+        date = datetime.fromisoformat(result['timestamp']).strftime('%Y-%m-%d %H:%M')
+    except (KeyError, TypeError, ValueError):
+        date = result.get('timestamp', '')
+    categories = {cat['name']: cat['score'] for cat in result.get('categories', [])}
+    
+    return [
+        result.get('name', ''),
+        result.get('email', ''),
+        result.get('position', ''),
+        score,
+        date,
+        categories.get('Technical Knowledge', ''),
+        categories.get('Communication Skills', ''),
+        categories.get('Problem Solving', ''),
+        categories.get('Relevant Experience', ''),
+        categories.get('Cultural Fit', '')
+    ]
+
+def stream_results_csv(results, compress=False, rows_per_chunk=200):
+    """Yield a CSV of `results` in chunks (optionally gzip-compressed) as rows are read"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: gzip container
+    
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+    
+    writer.writerow(EXPORT_HEADER)
+    rows = 0
+    for result in results:
+        writer.writerow(export_row(result))
+        rows += 1
+        if rows % rows_per_chunk == 0:
+            chunk = drain()
+            if chunk:
+                yield chunk
+    
+    chunk = drain()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
 @app.route('/export-results')
 def export_results():
-    """Export results as CSV"""
+    """Export results as CSV, streamed from the store (?gzip=1 for a .csv.gz)"""
     try:
-        with open(RESULTS_FILE, 'r') as f:
-            results = json.load(f)
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Name', 'Email', 'Position', 'Overall Score (%)', 'Interview Date', 'Technical Knowledge (%)', 'Communication Skills (%)', 'Problem Solving (%)', 'Relevant Experience (%)', 'Cultural Fit (%)'])
+        compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+        filename = f'interview_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        if compress:
+            filename += '.gz'
         
-        # Write data
-        for result in results:
-            date = datetime.fromisoformat(result['timestamp']).strftime('%Y-%m-%d %H:%M')
-            categories = {cat['name']: cat['score'] for cat in result.get('categories', [])}
-            
-            writer.writerow([
-                result['name'],
-                result.get('email', ''),
-                result.get('position', ''),
-                round(result['score'] * 100, 1),
-                date,
-                categories.get('Technical Knowledge', ''),
-                categories.get('Communication Skills', ''),
-                categories.get('Problem Solving', ''),
-                categories.get('Relevant Experience', ''),
-                categories.get('Cultural Fit', '')
-            ])
-        
-        # Create response
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode()),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'interview_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        # Rows are read in batches and written out as they go: memory stays flat however many results exist
+        return Response(
+            stream_results_csv(results_store.iter_results(), compress=compress),
+            mimetype='application/gzip' if compress else 'text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
         
     except Exception as e:
@@ -798,38 +1302,93 @@ def export_results():
 
 @app.route('/top-candidates', methods=['GET'])
 def top_candidates():
-    """Get top candidates"""
+    """Get top candidates, overall or for one position (?position=)"""
     try:
-        with open(TOP_FILE, 'r') as f:
-            top = json.load(f)
+        top = leaderboard.top(
+            position=request.args.get('position'),
+            limit=request.args.get('limit', type=int)
+        )
         return jsonify({'status': 'success', 'candidates': top})
-    except (FileNotFoundError, json.JSONDecodeError):
-        return jsonify({'status': 'success', 'candidates': []})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/results-stats', methods=['GET'])
+def results_stats():
+    """Score count, mean, spread and percentiles overall and per position (or ?position=)"""
+    try:
+        stats = leaderboard.stats(position=request.args.get('position'))
+        return jsonify({'status': 'success', 'stats': stats})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
 @app.route('/score-transcript', methods=['GET'])
 def score_transcript():
-    """Score existing transcript (legacy endpoint)"""
+    """Score a session's transcript (legacy endpoint, ?session_id=)"""
     try:
-        transcript_path = os.path.join("data", "transcript.txt")
-        if not os.path.exists(transcript_path):
+        workspace = workspaces.get(request.args.get('session_id') or DEFAULT_SESSION)
+        if workspace is None or not os.path.exists(workspace.transcript_path):
             return jsonify({"status": "error", "message": "No transcript found"})
 
-        scores = get_similarity_scores(transcript_path)
+        scores = get_similarity_scores(workspace.transcript_path)
 
-        with open(os.path.join("data", "output.json"), "w", encoding="utf-8") as f:
+        with open(workspace.output_path, "w", encoding="utf-8") as f:
             json.dump(scores, f, indent=2)
 
         return jsonify({'status': 'success', 'scores': scores})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
+@app.route('/interview-sessions/<session_id>', methods=['DELETE'])
+def delete_interview_session(session_id):
+    """Discard an interview's workspace and uploaded documents before its TTL runs out"""
+    try:
+        if not workspaces.remove(session_id):
+            return jsonify({'status': 'error', 'message': 'Session not found'}), 404
+        return jsonify({'status': 'success'})
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
+@app.route('/health/live')
+def liveness_check():
+    """Liveness probe: the worker is up and answering requests (restart it if this fails)"""
+    return jsonify({'status': 'alive', 'pid': os.getpid()})
+
+@app.route('/health/ready')
+def readiness_check():
+    """Readiness probe: 503 until models are loaded and the stores and background workers work"""
+    problems = []
+    if not get_vad_load_info():
+        problems.append('VAD model not loaded')
+    if not get_embedding_load_info():
+        problems.append('Embedding model not loaded')
+    if not engine_available or not all(worker.is_alive() for worker in detection_engine.workers):
+        problems.append('Detection engine not running')
+    if not mail_outbox.get_stats()['worker_alive']:
+        problems.append('Mail outbox worker stopped')
+    try:
+        results_store.version()
+    except Exception as e:
+        problems.append(f'Results store unavailable: {e}')
+    with busy_threads_lock:
+        threads = dict(busy_threads)
+    busy = threads['requests'] + threads['streams']  # Includes this probe
+    if WORKER_THREADS and busy >= WORKER_THREADS:
+        problems.append(f'Request threads saturated ({busy}/{WORKER_THREADS} busy)')
+    
+    return jsonify({
+        'status': 'not_ready' if problems else 'ready',
+        'problems': problems,
+        'threads': dict(threads, limit=WORKER_THREADS or None),
+        'pid': os.getpid()
+    }), 503 if problems else 200
+
 @app.errorhandler(413)
 def too_large(e):
     return jsonify({'status': 'error', 'message': 'File too large. Maximum size is 16MB.'}), 413
@@ -846,62 +1405,76 @@ def internal_error(e):
 
 load_dotenv()
 
-def export_results_to_csv(results, filename='data/hr_results.csv'):
-    with open(filename, mode='w', newline='', encoding='utf-8') as csvfile:
+def hr_csv_row(r):
+    return [r.get('id'), r.get('name'), r.get('email'), r.get('position'), r.get('score'), r.get('timestamp')]
+
+def export_results_to_csv(results, filename=HR_CSV_FILE):
+    """Rewrite the HR CSV from scratch (after deletes; submissions append instead). Caller holds hr_csv_locked()"""
+    tmp_path = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_path, mode='w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile)
-        header = ['ID', 'Name', 'Email', 'Position', 'Score', 'Timestamp']
-        writer.writerow(header)
+        writer.writerow(HR_CSV_HEADER)
         for r in results:
-            writer.writerow([
-                r.get('id'), r.get('name'), r.get('email'),
-                r.get('position'), r.get('score'), r.get('timestamp')
-            ])
+            writer.writerow(hr_csv_row(r))
+    os.replace(tmp_path, filename)
     return filename
-def send_email_with_csv(to_email, subject, body, attachment_path):
-    msg = EmailMessage()
-    msg['Subject'] = subject
-    msg['From'] = os.getenv('EMAIL_ADDRESS')
-    msg['To'] = to_email
-    msg.set_content(body)
-
-    # Attach the CSV file
-    with open(attachment_path, 'rb') as f:
-        file_data = f.read()
-        file_name = os.path.basename(attachment_path)
-    msg.add_attachment(file_data, maintype='application', subtype='octet-stream', filename=file_name)
-
-    # Send email
-    with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-        smtp.login(os.getenv('EMAIL_ADDRESS'), os.getenv('EMAIL_PASSWORD'))
-        smtp.send_message(msg)
+
+def append_result_to_csv(result, filename=HR_CSV_FILE):
+    """Append one result to the HR CSV, writing the header first if the file is new. Caller holds hr_csv_locked()"""
+    with open(filename, mode='a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        if csvfile.tell() == 0:
+            writer.writerow(HR_CSV_HEADER)
+        writer.writerow(hr_csv_row(result))
+    return filename
+
+def render_result_digest(results):
+    """Email for a batch of new results: a summary plus a CSV of just those results"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(HR_CSV_HEADER)
+    for r in results:
+        writer.writerow(hr_csv_row(r))
+    
+    lines = [f"{len(results)} new interview result(s) submitted:", ""]
+    for r in results:
+        try:
+            score = f"{round(float(r.get('score')) * 100, 1)}%"
+        except (TypeError, ValueError):
+            score = 'n/a'
+        lines.append(f"- {r.get('name')} ({r.get('position') or 'no position'}): {score}")
+    lines += ["", "The attached CSV contains these results; data/hr_results.csv and /export-results have all of them."]
+    
+    subject = 'New Interview Result Submitted' if len(results) == 1 else f'{len(results)} New Interview Results Submitted'
+    filename = f"new_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return subject, '\n'.join(lines), [(filename, output.getvalue().encode('utf-8'))]
+
+# HR notifications are queued and sent by a background worker as digests
+# (EMAIL_DIGEST_SECONDS after the first queued result, or EMAIL_DIGEST_MAX results)
+mail_outbox = get_mail_outbox(
+    render_result_digest,
+    digest_interval=float(os.getenv('EMAIL_DIGEST_SECONDS', 60)),
+    digest_max=int(os.getenv('EMAIL_DIGEST_MAX', 50))
+)
 
 @app.route('/submit-result', methods=['POST'])
 def submit_result():
     try:
         new_result = request.json  # or use request.form if form submission
-        results = []
-
-        if os.path.exists(RESULTS_FILE):
-            with open(RESULTS_FILE, 'r') as f:
-                results = json.load(f)
 
-        results.append(new_result)
+        # Single-row insert; id and timestamp are filled in if the form did not send them.
+        # ✅ Export to CSV (append just this row), under the same lock as rewrites
+        with hr_csv_locked():
+            new_result, version = results_store.add_result(new_result)
+            append_result_to_csv(new_result)
+        leaderboard.record(new_result, version)
 
-        with open(RESULTS_FILE, 'w') as f:
-            json.dump(results, f, indent=4)
-
-        # ✅ Export to CSV
-        csv_path = export_results_to_csv(results)
-
-        # ✅ Send Email Immediately After Interview
-        send_email_with_csv(
-            to_email=os.getenv('HR_EMAIL'),
-            subject='New Interview Result Submitted',
-            body='A new interview result has been submitted. Please find the attached CSV with all current results.',
-            attachment_path=csv_path
-        )
+        # ✅ Queue the HR email; the outbox worker sends it in the next digest
+        hr_email = os.getenv('HR_EMAIL')
+        if hr_email:
+            mail_outbox.enqueue(hr_email, new_result)
 
-        return jsonify({'status': 'success', 'message': 'Result submitted and email sent.'})
+        return jsonify({'status': 'success', 'message': 'Result submitted; HR will be notified by email.'})
 
     except Exception as e:
         import traceback
@@ -917,6 +1490,8 @@ if __name__ == '__main__':
     print("  - /submit-interview (Submit Interview)")
     print("  - /get-results (Get Results)")
     print("  - /top-candidates (Top Candidates)")
+    print("  - /results-stats (Score Statistics)")
     print("  - /export-results (Export CSV)")
+    print("Development server; for production run: gunicorn -c gunicorn.conf.py wsgi:app")
     
     app.run(debug=True, host='0.0.0.0', port=5000)
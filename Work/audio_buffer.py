@@ -0,0 +1,263 @@
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+# Scale factor for int16 PCM -> float32 in [-1.0, 1.0)
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+class AudioRingBuffer:
+    """Preallocated int16 ring buffer addressed by absolute sample position.
+
+    The capture thread writes PCM straight into the preallocated array and
+    readers address windows by the absolute position at which they start,
+    so no per-chunk ``bytes`` objects or joined copies are created. A window
+    stays readable until the writer laps it (``capacity`` samples later).
+    """
+
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = int(capacity)
+        self.buffer = np.zeros(self.capacity, dtype=dtype)
+        self.write_position = 0  # Total samples written since the last reset
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget all written audio without reallocating"""
+        with self._lock:
+            self.write_position = 0
+
+    def write(self, samples):
+        """Copy samples into the ring and return the new write position"""
+        with self._lock:
+            position = self.write_position
+            count = len(samples)
+
+            # Only the newest `capacity` samples can ever be read back
+            if count > self.capacity:
+                position += count - self.capacity
+                samples = samples[-self.capacity:]
+                count = self.capacity
+
+            start = position % self.capacity
+            first = min(count, self.capacity - start)
+            self.buffer[start:start + first] = samples[:first]
+            if first < count:
+                self.buffer[:count - first] = samples[first:]
+
+            # Publish only after the samples are in place
+            self.write_position = position + count
+            return self.write_position
+
+    def write_bytes(self, data):
+        """Write raw PCM bytes (e.g. from a PyAudio stream) into the ring"""
+        return self.write(np.frombuffer(data, dtype=self.buffer.dtype))
+
+    def is_available(self, position, length):
+        """Check that [position, position + length) is written and not yet overwritten"""
+        write_position = self.write_position
+        return position + length <= write_position and position >= write_position - self.capacity
+
+    def view(self, position, length):
+        """Return a zero-copy view of a window, or None if it wraps around the end"""
+        start = position % self.capacity
+        if start + length > self.capacity:
+            return None
+        return self.buffer[start:start + length]
+
+    def read_float(self, position, length, out):
+        """Convert a window to float32 in [-1, 1) into the reusable `out` buffer"""
+        start = position % self.capacity
+        first = min(length, self.capacity - start)
+        np.multiply(self.buffer[start:start + first], INT16_SCALE, out=out[:first])
+        if first < length:
+            np.multiply(self.buffer[:length - first], INT16_SCALE, out=out[first:length])
+
+        # The writer may have lapped us while converting
+        if not self.is_available(position, length):
+            return None
+        return out[:length]
+
+
+class FrameCache:
+    """Per-frame results (VAD probabilities, MFCC rows) keyed by absolute frame index.
+
+    Overlapping windows share most of their frames, so each frame is
+    computed once, stored in a ring of `capacity` rows and looked up by
+    every window that covers it until it is overwritten.
+    """
+
+    def __init__(self, capacity, width=None, dtype=np.float32):
+        self.capacity = int(capacity)
+        shape = (self.capacity,) if width is None else (self.capacity, width)
+        self.rows = np.zeros(shape, dtype=dtype)
+        self.indices = np.full(self.capacity, -1, dtype=np.int64)  # Frame index held by each slot
+
+    def reset(self):
+        """Invalidate every cached frame"""
+        self.indices.fill(-1)
+
+    def put(self, first, rows):
+        """Store rows for frames first, first + 1, ..."""
+        frames = np.arange(first, first + len(rows))
+        slots = frames % self.capacity
+        self.rows[slots] = rows
+        self.indices[slots] = frames
+
+    def missing(self, first, count):
+        """Boolean mask of the frames in [first, first + count) that are not cached"""
+        frames = np.arange(first, first + count)
+        return self.indices[frames % self.capacity] != frames
+
+    def get(self, first, count):
+        """Cached rows for frames [first, first + count) (check `missing` first)"""
+        return self.rows[np.arange(first, first + count) % self.capacity]
+
+
+# Overflow policies for BoundedAudioQueue
+OVERFLOW_BLOCK = 'block'              # Producer waits for space (backpressure)
+OVERFLOW_DROP_OLDEST = 'drop_oldest'  # Discard the oldest queued chunk
+OVERFLOW_DROP_NEWEST = 'drop_newest'  # Discard the incoming chunk
+OVERFLOW_COALESCE = 'coalesce'        # Collapse the backlog down to the incoming chunk
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_COALESCE)
+
+AudioChunk = namedtuple('AudioChunk', ['position', 'captured_at'])
+
+
+class BoundedAudioQueue:
+    """Bounded FIFO of captured audio chunks with a configurable overflow policy.
+
+    Exposes the ``put``/``get``/``qsize`` subset of ``queue.Queue`` used by
+    the detector, and counts every chunk it has to discard so a detector
+    that falls behind realtime degrades visibly instead of growing memory.
+    """
+
+    def __init__(self, maxsize=6, overflow_policy=OVERFLOW_DROP_OLDEST):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self._items = deque()
+        self._condition = threading.Condition()
+
+        self.enqueued_count = 0
+        self.dropped_count = 0
+        self.coalesced_count = 0
+        self._unfinished = 0
+
+    def put(self, item, timeout=None):
+        """Enqueue an item, applying the overflow policy when full.
+
+        Returns False if the incoming item was dropped or, for the block
+        policy, the wait timed out (the caller may retry).
+        """
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                if self.overflow_policy == OVERFLOW_BLOCK:
+                    if not self._condition.wait_for(lambda: len(self._items) < self.maxsize, timeout):
+                        return False
+                elif self.overflow_policy == OVERFLOW_DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped_count += 1
+                    self._unfinished -= 1
+                elif self.overflow_policy == OVERFLOW_DROP_NEWEST:
+                    self.dropped_count += 1
+                    return False
+                else:
+                    self.coalesced_count += len(self._items)
+                    self.dropped_count += len(self._items)
+                    self._unfinished -= len(self._items)
+                    self._items.clear()
+
+            self._items.append(item)
+            self.enqueued_count += 1
+            self._unfinished += 1
+            self._condition.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Dequeue the oldest item, raising queue.Empty after `timeout` seconds"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            item = self._items.popleft()
+            self._condition.notify_all()
+            return item
+
+    def qsize(self):
+        """Number of chunks currently waiting"""
+        return len(self._items)
+
+    def clear(self):
+        """Discard queued chunks without counting them as drops"""
+        with self._condition:
+            self._unfinished -= len(self._items)
+            self._items.clear()
+            self._condition.notify_all()
+
+    def task_done(self):
+        """Mark a chunk returned by get() as fully processed"""
+        with self._condition:
+            self._unfinished = max(self._unfinished - 1, 0)
+            self._condition.notify_all()
+
+    def join(self, timeout=None):
+        """Wait until every queued chunk has been processed; False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def get_stats(self):
+        """Queue depth and drop counters"""
+        return {
+            'depth': len(self._items),
+            'maxsize': self.maxsize,
+            'overflow_policy': self.overflow_policy,
+            'enqueued': self.enqueued_count,
+            'dropped': self.dropped_count,
+            'coalesced': self.coalesced_count
+        }
+
+
+class LagTracker:
+    """Running end-to-end lag statistics (capture timestamp -> verification)"""
+
+    def __init__(self, smoothing=0.1):
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear lag statistics"""
+        with self._lock:
+            self.count = 0
+            self.last = 0.0
+            self.max = 0.0
+            self.average = 0.0
+
+    def record(self, captured_at, now=None):
+        """Record the lag of a chunk captured at `captured_at` (time.monotonic)"""
+        lag = (time.monotonic() if now is None else now) - captured_at
+        with self._lock:
+            self.count += 1
+            self.last = lag
+            self.max = max(self.max, lag)
+            if self.count == 1:
+                self.average = lag
+            else:
+                self.average += self.smoothing * (lag - self.average)
+        return lag
+
+    def get_stats(self):
+        """Lag summary in seconds"""
+        with self._lock:
+            return {
+                'processed': self.count,
+                'last_lag_seconds': round(self.last, 4),
+                'max_lag_seconds': round(self.max, 4),
+                'avg_lag_seconds': round(self.average, 4)
+            }
@@ -3,8 +3,6 @@ import numpy as np
 import threading
 import time
 import queue
-import torch
-from silero_vad import load_silero_vad, read_audio, get_speech_timestamps
 import wave
 import tempfile
 import os
@@ -12,9 +10,22 @@ from datetime import datetime
 import logging
 import pickle
 from sklearn.metrics.pairwise import cosine_similarity
-import librosa
 from scipy.spatial.distance import euclidean
 import json
+from voice_features import get_mfcc_extractor, RunningFeatureStats
+from vad_model import (
+    get_vad_model, batched_speech_probs, speech_frame_mask, longest_speech_run, has_speech,
+    VAD_FRAME_SAMPLES
+)
+from pipeline_metrics import PipelineMetrics, CascadeCounters
+from energy_gate import EnergyGate
+from voice_quality import VoiceQualityMonitor
+from voice_profile_store import get_profile_store, MATCH_THRESHOLD
+from event_log import get_event_log
+from audio_buffer import (
+    AudioRingBuffer, BoundedAudioQueue, LagTracker, FrameCache, AudioChunk, INT16_SCALE,
+    OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,7 +36,9 @@ class VoiceRegistrationError(Exception):
     pass
 
 class AudioDetector:
-    def __init__(self, warning_callback=None, cancel_callback=None, malpractice_callback=None):
+    def __init__(self, warning_callback=None, cancel_callback=None, malpractice_callback=None,
+                 max_queue_chunks=6, overflow_policy=OVERFLOW_DROP_OLDEST,
+                 session_id=None, audio_interface=None, detection_callback=None, status_callback=None):
         # Audio configuration
         self.CHUNK = 1024
         self.FORMAT = pyaudio.paInt16
@@ -40,45 +53,104 @@ class AudioDetector:
         self.max_malpractice_attempts = 5
         self.is_monitoring = False
         self.is_interview_active = False
-        self.audio_queue = queue.Queue()
+        self.last_similarity = None
+        self.smoothed_similarity = None  # EWMA of similarity across speech windows; decisions use this
+        self.similarity_smoothing = 0.5  # Weight of the newest window in the EWMA
+        self.persist_results = True  # Write profiles, malpractice logs and blacklist entries to data/
+        
+        # Bounded queue of captured windows; sheds load instead of lagging behind realtime
+        self.audio_queue = BoundedAudioQueue(max_queue_chunks, overflow_policy)
+        self.lag_tracker = LagTracker()
+        self.metrics = PipelineMetrics()  # Rolling per-stage latency histograms
+        
+        # Detection cascade: energy gate -> VAD -> speaker verification, cheapest first
+        self.energy_gate = EnergyGate()
+        self.cascade = CascadeCounters()
+        
+        # Running microphone-quality statistics, fed as audio is captured
+        self.voice_quality = VoiceQualityMonitor(rate=self.RATE)
+        self.quality_check_thread = None
+        
+        # Capture ring buffer: ~1 s windows (15 x 1024 samples), deep enough for a full queue
+        self.frames_per_window = self.RATE // self.CHUNK
+        self.window_size = self.frames_per_window * self.CHUNK
+        self.capture_buffer_windows = max_queue_chunks + 2
+        self.capture_buffer = AudioRingBuffer(self.window_size * self.capture_buffer_windows)
+        
+        # Overlapping windows: a new window every hop, each reusing the frames of the previous one
+        self.hop_size = self.window_size // 2
+        
+        # Catch-up: once this many windows are queued, drain up to catchup_max_chunks and batch them
+        self.catchup_threshold = 3
+        self.catchup_max_chunks = 8
+        self.catchup_batches = 0
+        self.catchup_chunks = 0
+        self.skipped_windows = 0  # Windows whose audio was overwritten before it could be verified
+        # Worst case: drop_newest leaves gaps between drained windows, so no hop is shared
+        max_hops = self.catchup_max_chunks * (self.window_size // self.hop_size)
+        self._hop_batch = np.empty((max_hops, self.hop_size), dtype=np.float32)
+        self._frame_float = np.empty(self.window_size + self.catchup_max_chunks * self.hop_size,
+                                     dtype=np.float32)
+        self._next_warning_position = 0  # Warnings are raised at most once per window of audio
         
         # Voice registration
         self.registered_voice_features = None
         self.is_voice_registered = False
         self.voice_similarity_threshold = 0.50  # Similarity threshold for voice matching
         self.registration_samples = []
+        self.is_registering = False
+        self.registration_target_speech_seconds = 6.0  # Stop registering early once this much speech is in
+        self.registration_min_speech_seconds = 0.5  # Less speech than this fails registration
+        self.reappearance_threshold = MATCH_THRESHOLD  # None until calibrated: no reappearance checks
+        self.profile_matches = []  # Stored profiles (other sessions) matching the registered voice
         
         # Callbacks
         self.warning_callback = warning_callback
         self.cancel_callback = cancel_callback
         self.malpractice_callback = malpractice_callback
+        self.detection_callback = detection_callback  # Called with a result dict per processed window
+        self.status_callback = status_callback  # Called with get_warning_status() whenever it changes
         
-        # PyAudio instance
-        self.audio = pyaudio.PyAudio()
+        # PyAudio instance (opened on first use so engine-driven sessions never touch a device)
+        self.audio = audio_interface
+        self._owns_audio = audio_interface is None
         self.stream = None
         
         # Silero VAD model
         self.vad_model = None
         self.load_vad_model()
         
+        # MFCC extractor (window, mel filterbank and DCT basis built once per rate)
+        self.mfcc_extractor = get_mfcc_extractor(self.RATE)
+        
+        # Per-frame VAD probabilities and MFCCs shared by overlapping windows
+        self.vad_frame = VAD_FRAME_SAMPLES[self.RATE]
+        self.vad_probs = FrameCache(self.capture_buffer.capacity // self.vad_frame)
+        self.mfcc_frames = FrameCache(
+            self.capture_buffer.capacity // self.mfcc_extractor.hop_length,
+            self.mfcc_extractor.n_mfcc
+        )
+        
         # Threading
         self.audio_thread = None
         self.processing_thread = None
         self.stop_event = threading.Event()
+        self.capture_finished = threading.Event()  # Set when the audio source runs out (file replay)
         
         # Malpractice tracking
         self.malpractice_log = []
-        self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.session_id = session_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    def _get_audio_interface(self):
+        """Get the audio interface, creating a PyAudio instance if none was given"""
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+        return self.audio
     
     def load_vad_model(self):
-        """Load Silero VAD model"""
+        """Load Silero VAD model (shared by every detector in the process)"""
         try:
-            self.vad_model, utils = torch.hub.load(
-                repo_or_dir='snakers4/silero-vad',
-                model='silero_vad',
-                force_reload=False
-            )
-            logger.info("Silero VAD model loaded successfully")
+            self.vad_model = get_vad_model()
         except Exception as e:
             logger.error(f"Failed to load VAD model: {e}")
             raise
@@ -86,25 +158,11 @@ class AudioDetector:
     def extract_voice_features(self, audio_data):
         """Extract voice features using MFCC for speaker identification"""
         try:
-            # Convert to float32 and normalize
-            audio_float = audio_data.astype(np.float32)
-            
-            # Extract MFCC features
-            mfcc = librosa.feature.mfcc(
-                y=audio_float, 
-                sr=self.RATE, 
-                n_mfcc=13,
-                n_fft=2048,
-                hop_length=512
-            )
-            
-            # Calculate statistics (mean and std) for each MFCC coefficient
-            mfcc_features = np.concatenate([
-                np.mean(mfcc, axis=1),
-                np.std(mfcc, axis=1)
-            ])
-            
-            return mfcc_features
+            # Mean and std of each MFCC coefficient, same layout as librosa.feature.mfcc
+            start = time.perf_counter()
+            features = self.mfcc_extractor.extract(audio_data)
+            self.metrics.record('features', time.perf_counter() - start)
+            return features
             
         except Exception as e:
             logger.error(f"Feature extraction error: {e}")
@@ -118,6 +176,7 @@ class AudioDetector:
             self.stop_monitoring()
         
         self.registration_samples = []
+        self.is_registering = True
         registration_thread = threading.Thread(
             target=self._voice_registration_loop, 
             args=(duration,)
@@ -131,7 +190,7 @@ class AudioDetector:
         """Voice registration loop"""
         try:
             # Start audio stream for registration
-            stream = self.audio.open(
+            stream = self._get_audio_interface().open(
                 format=self.FORMAT,
                 channels=self.CHANNELS,
                 rate=self.RATE,
@@ -140,52 +199,55 @@ class AudioDetector:
             )
             
             logger.info("Recording voice sample for registration...")
-            start_time = time.time()
-            frames = []
             
-            while time.time() - start_time < duration:
-                data = stream.read(self.CHUNK, exception_on_overflow=False)
-                frames.append(data)
+            # VAD and per-frame MFCC statistics run on each ~1 s block as it arrives, so
+            # the profile is ready when recording stops. Counting samples rather than
+            # wall-clock time also works for faster-than-realtime sources.
+            target_samples = int(duration * self.RATE)
+            block = np.empty(self.window_size, dtype=np.int16)
+            block_filled = 0
+            recorded = 0
+            speech_stats = RunningFeatureStats(self.mfcc_extractor.n_mfcc)
+            target_frames = self.registration_target_speech_seconds * self.RATE / self.mfcc_extractor.hop_length
+            
+            while recorded < target_samples and speech_stats.count < target_frames:
+                try:
+                    data = stream.read(self.CHUNK, exception_on_overflow=False)
+                except EOFError:
+                    break
+                chunk = np.frombuffer(data, dtype=np.int16)[:target_samples - recorded]
+                recorded += len(chunk)
+                self.voice_quality.update(chunk)
+                
+                while len(chunk):
+                    take = min(len(chunk), self.window_size - block_filled)
+                    block[block_filled:block_filled + take] = chunk[:take]
+                    block_filled += take
+                    chunk = chunk[take:]
+                    if block_filled == self.window_size:
+                        self._accumulate_registration_block(block, speech_stats)
+                        block_filled = 0
+            
+            # Trailing partial block
+            if block_filled:
+                self._accumulate_registration_block(block[:block_filled], speech_stats)
             
             stream.stop_stream()
             stream.close()
             
-            # Process recorded audio
-            audio_data = b''.join(frames)
-            audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-            
-            # Check for voice activity
-            audio_tensor = torch.from_numpy(audio_np)
-            speech_timestamps = get_speech_timestamps(
-                audio_tensor, 
-                self.vad_model,
-                sampling_rate=self.RATE,
-                threshold=0.3
-            )
-            
-            if len(speech_timestamps) == 0:
+            speech_seconds = speech_stats.count * self.mfcc_extractor.hop_length / self.RATE
+            if speech_stats.count == 0:
                 raise VoiceRegistrationError("No speech detected during registration")
-            
-            # Extract voice features from speech segments
-            voice_features_list = []
-            for timestamp in speech_timestamps:
-                start_sample = int(timestamp['start'] * len(audio_np) / len(audio_tensor))
-                end_sample = int(timestamp['end'] * len(audio_np) / len(audio_tensor))
-                speech_segment = audio_np[start_sample:end_sample]
-                
-                if len(speech_segment) > self.RATE * 0.5:  # At least 0.5 seconds of speech
-                    features = self.extract_voice_features(speech_segment)
-                    if features is not None:
-                        voice_features_list.append(features)
-            
-            if len(voice_features_list) == 0:
+            if speech_seconds < self.registration_min_speech_seconds:
                 raise VoiceRegistrationError("Could not extract voice features")
             
-            # Calculate average features
-            self.registered_voice_features = np.mean(voice_features_list, axis=0)
+            self.registered_voice_features = speech_stats.features()
             self.is_voice_registered = True
+            logger.info(f"Registered voice from {speech_seconds:.1f}s of speech "
+                        f"in {recorded / self.RATE:.1f}s of audio")
             
             # Save registration data
+            self._check_profile_matches()
             self._save_voice_registration()
             
             logger.info("Voice registration completed successfully")
@@ -193,27 +255,119 @@ class AudioDetector:
         except Exception as e:
             logger.error(f"Voice registration failed: {e}")
             raise VoiceRegistrationError(f"Registration failed: {e}")
+        finally:
+            self.is_registering = False
+    
+    def start_quality_check(self, duration=3):
+        """Capture `duration` seconds into the ring buffer purely to measure microphone quality.
+
+        Not needed while monitoring or registering: captured audio already
+        feeds ``voice_quality``. Each check starts from a clean slate; a check
+        already running is reused. Returns the capture thread.
+        """
+        if self.is_quality_checking:
+            return self.quality_check_thread
+        self.voice_quality.reset()
+        thread = threading.Thread(target=self._quality_check_loop, args=(duration,))
+        thread.daemon = True
+        thread.start()
+        self.quality_check_thread = thread
+        return thread
+    
+    @property
+    def is_quality_checking(self):
+        return bool(self.quality_check_thread and self.quality_check_thread.is_alive())
+    
+    def _quality_check_loop(self, duration):
+        stream = None
+        try:
+            stream = self._get_audio_interface().open(
+                format=self.FORMAT,
+                channels=self.CHANNELS,
+                rate=self.RATE,
+                input=True,
+                frames_per_buffer=self.CHUNK
+            )
+            self.capture_buffer.reset()
+            while self.capture_buffer.write_position < duration * self.RATE:
+                samples = np.frombuffer(stream.read(self.CHUNK, exception_on_overflow=False), dtype=np.int16)
+                self.capture_buffer.write(samples)
+                self.voice_quality.update(samples)
+        except EOFError:
+            pass
+        except Exception as e:
+            logger.error(f"Voice quality check failed: {e}")
+        finally:
+            if stream:
+                stream.stop_stream()
+                stream.close()
+    
+    def get_voice_quality(self):
+        """Current microphone quality report (constant time, from running statistics)"""
+        return self.voice_quality.report()
+    
+    def _accumulate_registration_block(self, block, speech_stats):
+        """Add the MFCC frames of one block that fall inside a speech run to the running stats"""
+        vad_frame = VAD_FRAME_SAMPLES[self.RATE]
+        n_frames = len(block) // vad_frame
+        min_speech_frames = 7  # ~200 ms, as in monitoring
+        if n_frames < min_speech_frames:
+            return
+        
+        audio = np.multiply(block[:n_frames * vad_frame], INT16_SCALE, dtype=np.float32)
+        probs = batched_speech_probs(self.vad_model, audio[np.newaxis], sampling_rate=self.RATE)
+        mask = speech_frame_mask(probs, threshold=0.3)
+        if longest_speech_run(mask)[0] < min_speech_frames:
+            return
+        
+        # With hop == VAD frame, MFCC frame t is centred at the start of VAD frame t;
+        # the final MFCC frame (centred on the block end) is left to the next block
+        mfcc = self.mfcc_extractor.frame_mfcc(audio)
+        speech_stats.update(mfcc[:n_frames][mask[0]])
     
     def _save_voice_registration(self):
         """Save voice registration data"""
-        registration_data = {
-            'features': self.registered_voice_features.tolist(),
-            'session_id': self.session_id,
-            'timestamp': datetime.now().isoformat(),
-            'threshold': self.voice_similarity_threshold
-        }
+        if not self.persist_results:
+            return
         
-        os.makedirs('data/voice_profiles', exist_ok=True)
-        with open(f'data/voice_profiles/{self.session_id}.json', 'w') as f:
-            json.dump(registration_data, f, indent=2)
+        get_profile_store().add(
+            self.session_id,
+            self.registered_voice_features,
+            threshold=self.voice_similarity_threshold
+        )
+    
+    def _check_profile_matches(self):
+        """Search stored profiles for the voice just registered (e.g. a blacklisted or proxy speaker)"""
+        self.profile_matches = []
+        if not self.persist_results or self.reappearance_threshold is None:
+            return
+        
+        try:
+            self.profile_matches = get_profile_store().search(
+                self.registered_voice_features,
+                min_similarity=self.reappearance_threshold,
+                exclude=self.session_id
+            )
+        except Exception as e:
+            logger.error(f"Voice profile search failed: {e}")
+            return
+        
+        for match in self.profile_matches:
+            if match['blacklisted']:
+                logger.error(f"Registered voice matches blacklisted candidate {match['session_id']} "
+                             f"(similarity {match['similarity']:.3f})")
+            else:
+                logger.warning(f"Registered voice matches the profile of session {match['session_id']} "
+                               f"(similarity {match['similarity']:.3f})")
     
     def load_voice_registration(self, session_id):
         """Load existing voice registration"""
         try:
-            with open(f'data/voice_profiles/{session_id}.json', 'r') as f:
-                registration_data = json.load(f)
+            profile = get_profile_store().get(session_id)
+            if profile is None:
+                raise KeyError(f"No voice profile for session {session_id}")
             
-            self.registered_voice_features = np.array(registration_data['features'])
+            self.registered_voice_features = profile[0]
             self.is_voice_registered = True
             self.session_id = session_id
             
@@ -230,21 +384,42 @@ class AudioDetector:
             logger.warning("No voice registered for verification")
             return False
         
+        # Extract features from current audio
+        return self.verify_features(self.extract_voice_features(audio_data))
+    
+    def verify_features(self, features):
+        """Verify precomputed voice features against the registered voice"""
+        if not self.is_voice_registered:
+            logger.warning("No voice registered for verification")
+            return False
+        
         try:
-            # Extract features from current audio
-            features = self.extract_voice_features(audio_data)
             if features is None:
                 return False
             
             # Calculate similarity with registered voice
+            start = time.perf_counter()
             similarity = cosine_similarity(
                 [self.registered_voice_features], 
                 [features]
             )[0][0]
+            self.last_similarity = float(similarity)
+            
+            # One noisy window moves the smoothed score only part of the way
+            if self.smoothed_similarity is None:
+                self.smoothed_similarity = self.last_similarity
+            else:
+                self.smoothed_similarity += self.similarity_smoothing * (
+                    self.last_similarity - self.smoothed_similarity
+                )
             
-            logger.debug(f"Voice similarity: {similarity:.3f} (threshold: {self.voice_similarity_threshold})")
+            self.metrics.record('verify', time.perf_counter() - start)
+            self.metrics.record_similarity(self.last_similarity)
             
-            return similarity >= self.voice_similarity_threshold
+            logger.debug(f"Voice similarity: {similarity:.3f}, smoothed {self.smoothed_similarity:.3f} "
+                         f"(threshold: {self.voice_similarity_threshold})")
+            
+            return bool(self.smoothed_similarity >= self.voice_similarity_threshold)
             
         except Exception as e:
             logger.error(f"Speaker verification error: {e}")
@@ -260,11 +435,25 @@ class AudioDetector:
         
         self.is_monitoring = True
         self.stop_event.clear()
+        self.capture_finished.clear()
         self.warning_count = 0
+        self.capture_buffer.reset()
+        self.audio_queue.clear()
+        self.lag_tracker.reset()
+        self.metrics.reset()
+        self.energy_gate.reset()
+        self.cascade.reset()
+        self.vad_probs.reset()
+        self.mfcc_frames.reset()
+        self.smoothed_similarity = None
+        self._next_warning_position = 0
+        self.catchup_batches = 0
+        self.catchup_chunks = 0
+        self.skipped_windows = 0
         
         try:
             # Open audio stream
-            self.stream = self.audio.open(
+            self.stream = self._get_audio_interface().open(
                 format=self.FORMAT,
                 channels=self.CHANNELS,
                 rate=self.RATE,
@@ -316,99 +505,281 @@ class AudioDetector:
         """Mark interview as active"""
         self.is_interview_active = True
         self.warning_count = 0
+        self.smoothed_similarity = None
         logger.info("Interview started - voice verification active")
+        self._notify_status()
     
     def end_interview(self):
         """Mark interview as inactive"""
         self.is_interview_active = False
         logger.info("Interview ended - voice verification inactive")
+        self._notify_status()
     
     def _audio_capture_loop(self):
         """Capture audio data in a separate thread"""
-        frames = []
-        frame_count = 0
-        frames_per_second = self.RATE // self.CHUNK
+        window_end = self.window_size
         
         while not self.stop_event.is_set() and self.is_monitoring:
             try:
                 data = self.stream.read(self.CHUNK, exception_on_overflow=False)
-                frames.append(data)
-                frame_count += 1
+                start = time.perf_counter()
+                write_position = self.capture_buffer.write_bytes(data)
+                self.voice_quality.update(np.frombuffer(data, dtype=np.int16))
+                
+                # Every hop, hand the window ending there to processing by its ring position
+                if write_position >= window_end:
+                    chunk = AudioChunk(window_end - self.window_size, time.monotonic())
+                    while not self.audio_queue.put(chunk, timeout=1):
+                        # Only the block policy retries; the others have already applied their drop
+                        if self.stop_event.is_set() or self.audio_queue.overflow_policy != OVERFLOW_BLOCK:
+                            break
+                    window_end += self.hop_size
                 
-                # Process every second of audio
-                if frame_count >= frames_per_second:
-                    audio_data = b''.join(frames)
-                    self.audio_queue.put(audio_data)
-                    frames = []
-                    frame_count = 0
+                # Time spent handling the chunk, not blocked waiting on the device
+                self.metrics.record('capture', time.perf_counter() - start)
                     
+            except EOFError:
+                logger.info("Audio source exhausted")
+                break
             except Exception as e:
                 if self.is_monitoring:
                     logger.error(f"Audio capture error: {e}")
                 break
+        
+        self.capture_finished.set()
     
     def _audio_processing_loop(self):
         """Process audio data for voice activity detection and speaker verification"""
         while not self.stop_event.is_set() and self.is_monitoring:
             try:
-                # Get audio data with timeout
+                # Get the next window position with timeout
                 try:
-                    audio_data = self.audio_queue.get(timeout=1)
+                    chunks = [self.audio_queue.get(timeout=1)]
                 except queue.Empty:
                     continue
                 
-                # Only process if interview is active
-                if not self.is_interview_active:
-                    continue
-                
-                # Convert audio data to numpy array
-                audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+                # Behind realtime: drain the backlog and process it as one batch, still in order
+                if self.audio_queue.qsize() >= self.catchup_threshold:
+                    while len(chunks) < self.catchup_max_chunks:
+                        try:
+                            chunks.append(self.audio_queue.get(timeout=0))
+                        except queue.Empty:
+                            break
+                    self.catchup_batches += 1
+                    self.catchup_chunks += len(chunks)
                 
-                # Check for voice activity
-                if self._detect_voice_activity(audio_np):
-                    # Verify if it's the registered speaker
-                    if not self.verify_speaker(audio_np):
-                        self._handle_unauthorized_voice()
+                try:
+                    self._process_chunks(chunks)
+                finally:
+                    for _ in chunks:
+                        self.audio_queue.task_done()
                 
             except Exception as e:
                 logger.error(f"Audio processing error: {e}")
     
-    def _detect_voice_activity(self, audio_data):
-        """Detect voice activity using Silero VAD"""
-        try:
-            # Convert to tensor
-            audio_tensor = torch.from_numpy(audio_data)
-            
-            # Get speech timestamps
-            speech_timestamps = get_speech_timestamps(
-                audio_tensor, 
-                self.vad_model,
-                sampling_rate=self.RATE,
-                threshold=0.3,
-                min_speech_duration_ms=200,
-                min_silence_duration_ms=100
-            )
-            
-            # Return True if speech detected
-            return len(speech_timestamps) > 0
-            
-        except Exception as e:
-            logger.error(f"VAD detection error: {e}")
+    def _process_chunk(self, chunk):
+        """Run the detection cascade on one overlapping window"""
+        self._process_chunks([chunk])
+    
+    def _process_chunks(self, chunks):
+        """Run the detection cascade on consecutive windows, batching their VAD and MFCC work.
+
+        Per-frame results are cached, so hops and frames shared with earlier
+        windows are never recomputed. Decisions and warnings are still made
+        window by window in capture order.
+        """
+        # Only process if interview is active
+        if not self.is_interview_active:
+            return
+        
+        now = time.monotonic()
+        for chunk in chunks:
+            self.metrics.record('queue_wait', now - chunk.captured_at)
+        
+        # Gate and VAD, in one batch, every hop not already analyzed for an earlier window
+        overwritten = self._analyze_hops(self._hops_to_analyze(chunks))
+        
+        windows = []
+        for chunk in chunks:
+            is_speech = self._window_is_speech(chunk, overwritten)
+            if is_speech is not None:
+                windows.append((chunk, is_speech))
+        
+        # One MFCC pass over the span covering every speech window
+        speech_positions = [chunk.position for chunk, is_speech in windows if is_speech]
+        if speech_positions:
+            first, _ = self._window_frame_range(speech_positions[0])
+            last_first, last_count = self._window_frame_range(speech_positions[-1])
+            self._compute_mfcc_frames(first, last_first + last_count - first)
+        
+        for chunk, is_speech in windows:
+            self._finish_window(chunk, is_speech)
+    
+    def _hops_to_analyze(self, chunks):
+        """Positions of the hops making up `chunks` that have no cached speech probabilities yet"""
+        hops_per_window = self.window_size // self.hop_size
+        hop_frames = self.hop_size // self.vad_frame
+        hop_positions = sorted({
+            chunk.position + i * self.hop_size
+            for chunk in chunks for i in range(hops_per_window)
+        })
+        return [
+            position for position in hop_positions
+            if self.vad_probs.missing(position // self.vad_frame, hop_frames).any()
+        ]
+    
+    def _window_is_speech(self, chunk, overwritten):
+        """Speech decision for a window from its cached hop probabilities, None if a hop was overwritten"""
+        hops_per_window = self.window_size // self.hop_size
+        if any(chunk.position + i * self.hop_size in overwritten for i in range(hops_per_window)):
+            logger.warning(f"Session {self.session_id}: audio window overwritten before processing; skipping")
+            self.skipped_windows += 1
+            return None
+        probs = self.vad_probs.get(chunk.position // self.vad_frame, self.window_size // self.vad_frame)
+        return bool(has_speech(probs[np.newaxis], threshold=0.3, min_speech_frames=7)[0])
+    
+    def _finish_window(self, chunk, is_speech):
+        """Verify a window (speech only), warn on a mismatch and report the outcome"""
+        is_authorized = None
+        self.last_similarity = None
+        
+        if is_speech:
+            # Verify if it's the registered speaker
+            start = time.perf_counter()
+            features = self._window_features(chunk.position)
+            if features is None:
+                # Lost audio says nothing about the speaker: report the window unverified
+                logger.warning(f"Session {self.session_id}: audio window overwritten before verification; skipping")
+                self.skipped_windows += 1
+            else:
+                is_authorized = self.verify_features(features)
+                self.cascade.record('verify', is_authorized, time.perf_counter() - start)
+                
+                # Overlapping windows see the same audio twice, so warn at most once per window length
+                if not is_authorized and chunk.position >= self._next_warning_position:
+                    self._next_warning_position = chunk.position + self.window_size
+                    self._handle_unauthorized_voice(captured_at=chunk.captured_at)
+        
+        self.metrics.record('end_to_end', self.lag_tracker.record(chunk.captured_at))
+        self.report_detection(chunk, is_speech, is_authorized)
+    
+    def _analyze_hops(self, positions):
+        """Energy-gate hops and cache their per-frame speech probabilities (zero if gated out).
+
+        Gated hops go through VAD together as one stacked batch. Returns the
+        positions of hops that were overwritten before they could be read.
+        """
+        overwritten = set()
+        hop_frames = self.hop_size // self.vad_frame
+        gated = []
+        
+        for position in positions:
+            row = len(gated)
+            audio = self.capture_buffer.read_float(position, self.hop_size, self._hop_batch[row])
+            if audio is None:
+                overwritten.add(position)
+            elif self.passes_energy_gate(audio):
+                gated.append(position)
+            else:
+                self.vad_probs.put(position // self.vad_frame, np.zeros(hop_frames, dtype=np.float32))
+        
+        if gated:
+            start = time.perf_counter()
+            probs = batched_speech_probs(self.vad_model, self._hop_batch[:len(gated)], sampling_rate=self.RATE)
+            elapsed = (time.perf_counter() - start) / len(gated)
+            for row, position in enumerate(gated):
+                self.metrics.record('vad', elapsed)
+                self.cascade.record('vad', bool(probs[row].max() >= 0.3), elapsed)
+                self.vad_probs.put(position // self.vad_frame, probs[row])
+        
+        return overwritten
+    
+    def _window_frame_range(self, position):
+        """First index and count of the MFCC frames lying wholly inside a window"""
+        hop = self.mfcc_extractor.hop_length
+        half = self.mfcc_extractor.n_fft // 2
+        first = -(-(position + half) // hop)
+        return first, (position + self.window_size - half) // hop - first + 1
+    
+    def _compute_mfcc_frames(self, first, count):
+        """Compute and cache MFCC frames from the first uncached one in [first, first + count) onwards"""
+        missing = self.mfcc_frames.missing(first, count)
+        if not missing.any():
+            return True
+        
+        hop = self.mfcc_extractor.hop_length
+        half = self.mfcc_extractor.n_fft // 2
+        start = time.perf_counter()
+        new_first = first + int(np.argmax(missing))
+        new_count = first + count - new_first
+        length = (new_count - 1) * hop + 2 * half
+        if length > len(self._frame_float):
+            return False  # Span broken up by dropped windows; each window computes its own frames
+        audio = self.capture_buffer.read_float(new_first * hop - half, length, self._frame_float)
+        if audio is None:
             return False
+        self.mfcc_frames.put(new_first, self.mfcc_extractor.frame_mfcc(audio, center=False))
+        self.metrics.record('features', time.perf_counter() - start)
+        return True
+    
+    def _window_features(self, position):
+        """MFCC mean/std over the frames lying wholly inside a window, computing only uncached frames"""
+        first, count = self._window_frame_range(position)
+        if not self._compute_mfcc_frames(first, count):
+            return None
+        
+        frames = self.mfcc_frames.get(first, count)
+        return np.concatenate([frames.mean(axis=0), frames.std(axis=0)])
+    
+    def report_detection(self, chunk, is_speech, is_authorized):
+        """Pass the outcome for one window to the detection callback"""
+        if not self.detection_callback:
+            return
+        
+        self.detection_callback({
+            'offset_seconds': chunk.position / self.RATE,
+            'is_speech': bool(is_speech),
+            'is_authorized': is_authorized,
+            'similarity': self.last_similarity,
+            'smoothed_similarity': self.smoothed_similarity,
+            'warning_count': self.warning_count,
+            'malpractice_count': self.malpractice_count
+        })
     
-    def _handle_unauthorized_voice(self):
-        """Handle unauthorized voice detection during interview"""
+    def passes_energy_gate(self, audio_data):
+        """First cascade stage: whether a window is loud enough above the noise floor to need VAD"""
+        start = time.perf_counter()
+        passed = self.energy_gate.process(audio_data)
+        elapsed = time.perf_counter() - start
+        self.metrics.record('gate', elapsed)
+        self.cascade.record('gate', passed, elapsed)
+        return passed
+    
+    def _handle_unauthorized_voice(self, captured_at=None):
+        """Handle unauthorized voice detection during interview (`captured_at`: monotonic capture time)"""
         self.warning_count += 1
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        
+        # Stamp the warning with when the audio was captured, not when a backlog got to it
+        detected_at = datetime.now()
+        if captured_at is not None:
+            detected_at = datetime.fromtimestamp(time.time() - (time.monotonic() - captured_at))
+        timestamp = detected_at.strftime("%H:%M:%S")
         
         # Log malpractice attempt
         malpractice_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': detected_at.isoformat(),
             'type': 'unauthorized_voice',
             'warning_number': self.warning_count,
             'session_id': self.session_id
         }
         self.malpractice_log.append(malpractice_entry)
+        self._log_event(
+            'unauthorized_voice',
+            timestamp=malpractice_entry['timestamp'],
+            warning_number=self.warning_count,
+            max_warnings=self.max_warnings,
+            similarity=self.last_similarity
+        )
         
         logger.warning(f"Unauthorized voice detected! Warning {self.warning_count}/{self.max_warnings} at {timestamp}")
         
@@ -418,6 +789,9 @@ class AudioDetector:
         if self.warning_count >= self.max_warnings:
             self.malpractice_count += 1
             self._handle_malpractice_attempt()
+        
+        # Counts are final here (a malpractice attempt resets the warnings)
+        self._notify_status()
     
     def _handle_malpractice_attempt(self):
         """Handle malpractice attempt"""
@@ -443,23 +817,31 @@ class AudioDetector:
             self.warning_count = 0
             logger.info(f"Warnings reset. Attempt {self.malpractice_count}/{self.max_malpractice_attempts}")
     
-    def _save_malpractice_log(self):
-        """Save malpractice log to file"""
-        os.makedirs('data/malpractice_logs', exist_ok=True)
-        
-        log_data = {
-            'session_id': self.session_id,
-            'malpractice_count': self.malpractice_count,
-            'max_attempts': self.max_malpractice_attempts,
-            'timestamp': datetime.now().isoformat(),
-            'incidents': self.malpractice_log
-        }
+    def _log_event(self, event_type, **fields):
+        """Append an event for this session to the shared event log (buffered, written off-thread)"""
+        if not self.persist_results:
+            return
         
-        with open(f'data/malpractice_logs/{self.session_id}.json', 'w') as f:
-            json.dump(log_data, f, indent=2)
+        try:
+            get_event_log().append(event_type, self.session_id, **fields)
+        except Exception as e:
+            logger.error(f"Failed to log {event_type} event: {e}")
+    
+    def _save_malpractice_log(self):
+        """Record the malpractice attempt in the event log (incidents are logged as they happen)"""
+        self._log_event(
+            'malpractice_attempt',
+            malpractice_count=self.malpractice_count,
+            max_attempts=self.max_malpractice_attempts,
+            incidents=len(self.malpractice_log)
+        )
     
     def _mark_candidate_blacklisted(self):
         """Mark candidate as blacklisted due to excessive malpractice"""
+        if not self.persist_results:
+            logger.error(f"Candidate {self.session_id} would be blacklisted")
+            return
+        
         blacklist_data = {
             'session_id': self.session_id,
             'blacklisted_at': datetime.now().isoformat(),
@@ -472,6 +854,10 @@ class AudioDetector:
         with open(f'data/blacklist/{self.session_id}.json', 'w') as f:
             json.dump(blacklist_data, f, indent=2)
         
+        # Flag the voice profile so this speaker is recognised if they register again
+        get_profile_store().mark_blacklisted(self.session_id)
+        self._log_event('blacklisted', reason='excessive_malpractice', malpractice_count=self.malpractice_count)
+        
         logger.error(f"Candidate {self.session_id} has been blacklisted")
     
     def get_warning_count(self):
@@ -486,17 +872,55 @@ class AudioDetector:
         """Reset warning count"""
         self.warning_count = 0
         logger.info("Warning count reset")
+        self._notify_status()
+    
+    def get_warning_status(self):
+        """Warning and malpractice counts and whether verification is running"""
+        return {
+            'warnings': self.warning_count,
+            'max_warnings': self.max_warnings,
+            'malpractice_count': self.malpractice_count,
+            'max_malpractice': self.max_malpractice_attempts,
+            'is_registered': self.is_voice_registered,
+            'is_interview_active': self.is_interview_active
+        }
+    
+    def _notify_status(self):
+        """Push the current warning status to status_callback (e.g. the session's event stream)"""
+        if not self.status_callback:
+            return
+        try:
+            self.status_callback(self.get_warning_status())
+        except Exception as e:
+            logger.error(f"Status callback failed: {e}")
     
     def get_malpractice_log(self):
         """Get malpractice log"""
         return self.malpractice_log
     
+    def get_pipeline_metrics(self):
+        """Get rolling p50/p95/p99 stage latencies, similarity distribution, cascade counters and queue state"""
+        metrics = self.metrics.snapshot()
+        metrics['cascade'] = self.cascade.snapshot()
+        metrics['queue'] = self.get_queue_stats()
+        return metrics
+    
+    def get_queue_stats(self):
+        """Get audio queue depth, dropped-chunk counts and capture-to-verification lag"""
+        stats = self.audio_queue.get_stats()
+        stats.update(self.lag_tracker.get_stats())
+        stats['catchup_batches'] = self.catchup_batches
+        stats['catchup_chunks'] = self.catchup_chunks
+        stats['skipped_windows'] = self.skipped_windows
+        return stats
+    
     def is_audio_device_available(self):
         """Check if audio input device is available"""
         try:
-            device_count = self.audio.get_device_count()
+            audio = self._get_audio_interface()
+            device_count = audio.get_device_count()
             for i in range(device_count):
-                device_info = self.audio.get_device_info_by_index(i)
+                device_info = audio.get_device_info_by_index(i)
                 if device_info['maxInputChannels'] > 0:
                     return True
             return False
@@ -526,8 +950,9 @@ class AudioDetector:
     def cleanup(self):
         """Cleanup resources"""
         self.stop_monitoring()
-        if self.audio:
+        if self.audio and self._owns_audio:
             self.audio.terminate()
+            self.audio = None
 
 
 # Example usage and testing
@@ -0,0 +1,297 @@
+import io
+import math
+import threading
+import time
+import wave
+import logging
+from collections import deque
+
+import numpy as np
+import scipy.signal
+
+from audio_buffer import INT16_SCALE
+
+logger = logging.getLogger(__name__)
+
+PA_INT16 = 8  # pyaudio.paInt16, so stand-ins work without PyAudio installed
+
+
+class PolyphaseResampler:
+    """Streaming rational-ratio polyphase resampler (e.g. 48 kHz -> 16 kHz).
+
+    Uses the same Kaiser-windowed FIR as ``scipy.signal.resample_poly`` but
+    keeps the filter history between calls, so audio can be resampled chunk
+    by chunk without edge artifacts at chunk boundaries. Only the output
+    samples are ever computed: each one is a dot product between one
+    polyphase branch of the filter and a strided view of the input.
+    """
+
+    def __init__(self, from_rate, to_rate, half_len=10, beta=5.0):
+        g = math.gcd(int(from_rate), int(to_rate))
+        self.from_rate = int(from_rate)
+        self.to_rate = int(to_rate)
+        self.up = self.to_rate // g
+        self.down = self.from_rate // g
+
+        max_rate = max(self.up, self.down)
+        n_taps = 2 * half_len * max_rate + 1
+        taps = scipy.signal.firwin(n_taps, 1.0 / max_rate, window=('kaiser', beta)) * self.up
+
+        # phases[p] holds taps[p::up], reversed to line up with chronological input windows
+        self.taps_per_phase = -(-n_taps // self.up)
+        padded = np.zeros(self.taps_per_phase * self.up)
+        padded[:n_taps] = taps
+        self.phases = np.ascontiguousarray(
+            padded.reshape(self.taps_per_phase, self.up).T[:, ::-1], dtype=np.float32
+        )
+
+        # Compensate the filter's group delay so output n lines up with input n * down / up
+        self.delay = (n_taps - 1) // 2
+        self.reset()
+
+    def reset(self):
+        """Drop filter history and restart the output clock"""
+        self._history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        self._history_start = -(self.taps_per_phase - 1)  # Absolute input index of _history[0]
+        self._next_output = 0
+
+    def process(self, samples):
+        """Resample the next float32 chunk and return every output sample it completes"""
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.up == self.down:
+            return samples
+
+        buffer = np.concatenate([self._history, samples])
+        end = self._history_start + len(buffer)  # One past the newest absolute input index
+
+        last_output = (end * self.up - 1 - self.delay) // self.down
+        output = np.arange(self._next_output, last_output + 1)
+
+        if len(output) and len(buffer) >= self.taps_per_phase:
+            position = output * self.down + self.delay
+            phase = position % self.up
+            newest = position // self.up
+
+            windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps_per_phase)
+            starts = newest - (self.taps_per_phase - 1) - self._history_start
+            resampled = np.einsum('ij,ij->i', windows[starts], self.phases[phase])
+            self._next_output = last_output + 1
+        else:
+            resampled = np.zeros(0, dtype=np.float32)
+
+        keep = self.taps_per_phase - 1
+        self._history = buffer[len(buffer) - keep:].copy() if keep else buffer[:0].copy()
+        self._history_start = end - keep
+        return resampled.astype(np.float32, copy=False)
+
+
+def float_to_int16(audio):
+    """Convert float32 samples in [-1, 1] to int16 PCM with clipping"""
+    return np.clip(np.rint(audio * 32768.0), -32768, 32767).astype(np.int16)
+
+
+def decode_pcm(data, sample_format='s16le', channels=1):
+    """Decode raw little-endian PCM bytes to mono float32"""
+    if sample_format == 's16le':
+        audio = np.frombuffer(data, dtype='<i2').astype(np.float32) * INT16_SCALE
+    elif sample_format == 'f32le':
+        audio = np.frombuffer(data, dtype='<f4').astype(np.float32)
+    else:
+        raise ValueError(f"Unsupported PCM format: {sample_format}")
+
+    if channels > 1:
+        audio = audio[:len(audio) - len(audio) % channels].reshape(-1, channels).mean(axis=1)
+    return audio
+
+
+def decode_compressed(data):
+    """Decode a compressed container (WAV, FLAC, OGG/Opus) to mono float32 and its rate"""
+    try:
+        import soundfile
+    except ImportError:
+        raise ValueError("Compressed audio requires the soundfile package")
+
+    audio, rate = soundfile.read(io.BytesIO(data), dtype='float32', always_2d=True)
+    return audio.mean(axis=1), rate
+
+
+class PushAudioStream:
+    """PyAudio-style input stream whose frames are pushed in by another thread"""
+
+    def __init__(self, interface, frames_per_buffer):
+        self.interface = interface
+        self.frames_per_buffer = frames_per_buffer
+        self.is_active = True
+
+    def read(self, num_frames, exception_on_overflow=True):
+        return self.interface._read(num_frames, self)
+
+    def stop_stream(self):
+        self.is_active = False
+
+    def close(self):
+        self.is_active = False
+        self.interface._wake_readers()
+
+
+class PushAudioInterface:
+    """Socket/HTTP-fed stand-in for ``pyaudio.PyAudio``.
+
+    Incoming int16 samples are appended with ``feed``; streams opened from it
+    block in ``read`` until enough samples have arrived, exactly like a
+    microphone stream. This lets ``AudioDetector`` register and monitor a
+    remote candidate headless, with no audio device on the server.
+    """
+
+    def __init__(self, rate=16000, max_buffered_seconds=30, read_timeout=5.0):
+        self.rate = rate
+        self.max_buffered = int(rate * max_buffered_seconds)
+        self.read_timeout = read_timeout
+        self._chunks = deque()
+        self._buffered = 0
+        self._condition = threading.Condition()
+        self.closed = False
+
+    def feed(self, samples):
+        """Append int16 samples for the next reads, dropping the oldest beyond the cap"""
+        samples = np.asarray(samples, dtype=np.int16)
+        with self._condition:
+            self._chunks.append(samples)
+            self._buffered += len(samples)
+            while self._buffered > self.max_buffered and len(self._chunks) > 1:
+                self._buffered -= len(self._chunks.popleft())
+            self._condition.notify_all()
+
+    def clear(self):
+        """Discard buffered samples"""
+        with self._condition:
+            self._chunks.clear()
+            self._buffered = 0
+
+    def _wake_readers(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def _read(self, num_frames, stream):
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: self._buffered >= num_frames or not stream.is_active or self.closed,
+                self.read_timeout
+            )
+            if not ready:
+                raise IOError("Timed out waiting for streamed audio")
+            if not stream.is_active or self.closed:
+                raise IOError("Audio stream closed")
+
+            out = np.empty(num_frames, dtype=np.int16)
+            filled = 0
+            while filled < num_frames:
+                chunk = self._chunks[0]
+                take = min(len(chunk), num_frames - filled)
+                out[filled:filled + take] = chunk[:take]
+                filled += take
+                if take == len(chunk):
+                    self._chunks.popleft()
+                else:
+                    self._chunks[0] = chunk[take:]
+            self._buffered -= num_frames
+            return out.tobytes()
+
+    # PyAudio interface
+    def open(self, format=PA_INT16, channels=1, rate=16000, input=True, frames_per_buffer=1024, **kwargs):
+        if rate != self.rate:
+            raise ValueError(f"Stream fed at {self.rate} Hz cannot be opened at {rate} Hz")
+        return PushAudioStream(self, frames_per_buffer)
+
+    def get_device_count(self):
+        return 1
+
+    def get_device_info_by_index(self, index):
+        return {'index': index, 'name': 'streamed-audio', 'maxInputChannels': 1,
+                'defaultSampleRate': float(self.rate)}
+
+    def terminate(self):
+        self.closed = True
+        self._wake_readers()
+
+
+class WavFileStream:
+    """PyAudio-style input stream reading 16-bit PCM from a WAV file"""
+
+    def __init__(self, audio, realtime, rate):
+        self.audio = audio
+        self.position = 0
+        self.realtime = realtime
+        self.rate = rate
+        self.started_at = time.monotonic()
+
+    def read(self, num_frames, exception_on_overflow=True):
+        if self.position >= len(self.audio):
+            raise EOFError("End of audio file")
+
+        frames = self.audio[self.position:self.position + num_frames]
+        if len(frames) < num_frames:
+            frames = np.concatenate([frames, np.zeros(num_frames - len(frames), dtype=np.int16)])
+        self.position += num_frames
+
+        if self.realtime:
+            due = self.started_at + self.position / self.rate
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        return frames.tobytes()
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class WavFileAudioInterface:
+    """File-backed stand-in for ``pyaudio.PyAudio``.
+
+    Every stream opened from it plays the WAV file (downmixed and resampled
+    to the requested rate) from the start. With ``realtime=False`` reads
+    return immediately, so the detector runs as fast as the CPU allows;
+    ``read`` raises ``EOFError`` once the file is exhausted.
+    """
+
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.realtime = realtime
+        self._cache = {}
+
+    def load(self, rate):
+        """Return the file as mono int16 at `rate`, decoding once per rate"""
+        if rate not in self._cache:
+            with wave.open(self.path, 'rb') as wav:
+                channels = wav.getnchannels()
+                file_rate = wav.getframerate()
+                if wav.getsampwidth() != 2:
+                    raise ValueError("Only 16-bit PCM WAV files are supported")
+                data = wav.readframes(wav.getnframes())
+
+            audio = decode_pcm(data, 's16le', channels)
+            if file_rate != rate:
+                audio = PolyphaseResampler(file_rate, rate).process(audio)
+            self._cache[rate] = float_to_int16(audio)
+        return self._cache[rate]
+
+    def duration(self, rate=16000):
+        """Length of the file in seconds"""
+        return len(self.load(rate)) / rate
+
+    # PyAudio interface
+    def open(self, format=PA_INT16, channels=1, rate=16000, input=True, frames_per_buffer=1024, **kwargs):
+        return WavFileStream(self.load(rate), self.realtime, rate)
+
+    def get_device_count(self):
+        return 1
+
+    def get_device_info_by_index(self, index):
+        return {'index': index, 'name': self.path, 'maxInputChannels': 1}
+
+    def terminate(self):
+        self._cache.clear()
@@ -0,0 +1,343 @@
+import os
+import queue
+import uuid
+import threading
+import time
+import logging
+from collections import deque
+
+import numpy as np
+
+from audio_detector import AudioDetector
+from audio_buffer import AudioChunk
+from audio_sources import PushAudioInterface, PolyphaseResampler, float_to_int16
+from vad_model import get_vad_model, batched_speech_probs
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLimitError(Exception):
+    """Raised when admitting another session would exceed engine capacity"""
+    pass
+
+
+class DetectionSession:
+    """Per-session state owned by the engine: a detector plus its write cursor"""
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.window_start = 0  # Ring position of the next (overlapping) window to hand to the workers
+        self.created_at = time.time()
+        self.lock = threading.Lock()
+        self.resampler = None
+
+    def get_resampler(self, sample_rate):
+        """Streaming resampler from `sample_rate` to the detector rate, kept across chunks"""
+        if self.resampler is None or self.resampler.from_rate != sample_rate:
+            self.resampler = PolyphaseResampler(sample_rate, self.detector.RATE)
+        return self.resampler
+
+    @property
+    def session_id(self):
+        return self.detector.session_id
+
+
+class AudioDetectionEngine:
+    """Runs many proctoring sessions on one shared VAD model and a fixed worker pool.
+
+    Each session is a regular ``AudioDetector`` (its own registration,
+    warning counters, ring buffer and bounded queue) whose capture and
+    processing threads are never started. Audio is pushed in with
+    ``submit_audio``, which queues an overlapping window every hop as the
+    server-mic detector does. The workers pick up to ``max_batch`` sessions
+    with a pending window and run VAD for the hops not yet analyzed, for
+    all of them in one batched pass. Each detector then verifies its window
+    from its own cached per-frame VAD and MFCC results, so audio shared
+    with the previous window is never analyzed twice. A session is only
+    ever processed by one worker at a time, so its windows are handled in
+    capture order.
+    """
+
+    def __init__(self, num_workers=None, max_batch=16, max_sessions_per_core=4,
+                 max_queue_chunks=6, overflow_policy='drop_oldest'):
+        cpu_count = os.cpu_count() or 1
+        self.num_workers = num_workers or min(4, cpu_count)
+        self.max_batch = max_batch
+        self.max_sessions_per_core = max_sessions_per_core
+        self.max_sessions = max_sessions_per_core * cpu_count
+        self.max_queue_chunks = max_queue_chunks
+        self.overflow_policy = overflow_policy
+
+        self.RATE = 16000
+        self.vad_threshold = 0.3
+
+        self.vad_model = get_vad_model()
+
+        self.sessions = {}
+        self._ready = deque()        # Session ids with queued windows, not being processed
+        self._scheduled = set()      # Session ids in _ready or held by a worker
+        self._condition = threading.Condition()
+
+        self.stop_event = threading.Event()
+        self.workers = []
+
+        self.batches_processed = 0
+        self.windows_processed = 0
+
+    def start(self):
+        """Start the worker pool"""
+        if self.workers:
+            return
+
+        self.stop_event.clear()
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"detection-worker-{i}")
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+        logger.info(f"Audio detection engine started with {self.num_workers} workers "
+                    f"(capacity {self.max_sessions} sessions)")
+
+    def stop(self):
+        """Stop the worker pool and release every session"""
+        self.stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+
+        for worker in self.workers:
+            worker.join(timeout=2)
+        self.workers = []
+
+        for session_id in list(self.sessions):
+            self.close_session(session_id)
+
+        logger.info("Audio detection engine stopped")
+
+    def create_session(self, session_id=None, warning_callback=None, cancel_callback=None,
+                       malpractice_callback=None, status_callback=None, audio_interface=None):
+        """Admit a new session, raising SessionLimitError when the engine is full"""
+        with self._condition:
+            session_id = session_id or uuid.uuid4().hex[:12]
+            if session_id in self.sessions:
+                return self.sessions[session_id].detector
+
+            if len(self.sessions) >= self.max_sessions:
+                raise SessionLimitError(
+                    f"Engine is at capacity ({self.max_sessions} sessions, "
+                    f"{self.max_sessions_per_core} per core)"
+                )
+
+            # Sessions are fed over the network, so default to a push-fed audio interface
+            detector = AudioDetector(
+                warning_callback=warning_callback,
+                cancel_callback=cancel_callback,
+                malpractice_callback=malpractice_callback,
+                status_callback=status_callback,
+                max_queue_chunks=self.max_queue_chunks,
+                overflow_policy=self.overflow_policy,
+                session_id=session_id,
+                audio_interface=audio_interface or PushAudioInterface(rate=self.RATE)
+            )
+            self.sessions[detector.session_id] = DetectionSession(detector)
+
+        logger.info(f"Detection session {detector.session_id} created "
+                    f"({len(self.sessions)}/{self.max_sessions})")
+        return detector
+
+    def get_session(self, session_id):
+        """Get the detector for a session, or None"""
+        session = self.sessions.get(session_id)
+        return session.detector if session else None
+
+    def close_session(self, session_id):
+        """Remove a session and release its resources"""
+        with self._condition:
+            session = self.sessions.pop(session_id, None)
+
+        if session is None:
+            return False
+
+        session.detector.end_interview()
+        session.detector.cleanup()
+        if session.detector.audio:
+            session.detector.audio.terminate()
+        logger.info(f"Detection session {session_id} closed")
+        return True
+
+    def feed_audio(self, session_id, audio, sample_rate=16000):
+        """Route streamed float32 audio at any rate into a session's registration or detection path"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Unknown session: {session_id}")
+
+        if sample_rate != self.RATE:
+            audio = session.get_resampler(sample_rate).process(audio)
+        if not len(audio):
+            return
+
+        samples = float_to_int16(audio)
+        detector = session.detector
+        detector.voice_quality.update(samples)
+        if detector.is_registering and hasattr(detector.audio, 'feed'):
+            detector.audio.feed(samples)
+        else:
+            self.submit_audio(session_id, samples)
+
+    def submit_audio(self, session_id, samples):
+        """Append int16 PCM samples to a session and schedule any completed windows"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Unknown session: {session_id}")
+
+        detector = session.detector
+        with session.lock:
+            write_position = detector.capture_buffer.write(np.asarray(samples, dtype=np.int16))
+            queued = False
+            while write_position - session.window_start >= detector.window_size:
+                detector.audio_queue.put(AudioChunk(session.window_start, time.monotonic()))
+                session.window_start += detector.hop_size
+                queued = True
+
+        if queued:
+            self._schedule(session_id)
+
+    def _schedule(self, session_id):
+        with self._condition:
+            if session_id not in self._scheduled and session_id in self.sessions:
+                self._scheduled.add(session_id)
+                self._ready.append(session_id)
+                self._condition.notify()
+
+    def _take_batch(self):
+        """Wait for ready sessions and claim up to max_batch of them"""
+        with self._condition:
+            while not self._ready and not self.stop_event.is_set():
+                self._condition.wait(timeout=1)
+
+            batch = []
+            while self._ready and len(batch) < self.max_batch:
+                batch.append(self._ready.popleft())
+            return batch
+
+    def _release(self, session_ids):
+        """Return claimed sessions, rescheduling any that still have queued windows"""
+        with self._condition:
+            for session_id in session_ids:
+                self._scheduled.discard(session_id)
+                session = self.sessions.get(session_id)
+                if session and session.detector.audio_queue.qsize() > 0:
+                    self._scheduled.add(session_id)
+                    self._ready.append(session_id)
+                    self._condition.notify()
+
+    def _worker_loop(self):
+        """Process batches of windows across sessions until stopped"""
+        batch_audio = None
+
+        while not self.stop_event.is_set():
+            session_ids = self._take_batch()
+            if not session_ids:
+                continue
+
+            try:
+                if batch_audio is None:
+                    # Up to a full window of unanalyzed hops per session (after a dropped window)
+                    detector = self.sessions[session_ids[0]].detector
+                    hops_per_window = detector.window_size // detector.hop_size
+                    batch_audio = np.empty((self.max_batch * hops_per_window, detector.hop_size),
+                                           dtype=np.float32)
+                self._process_batch(session_ids, batch_audio)
+            except Exception as e:
+                logger.error(f"Detection engine batch error: {e}")
+            finally:
+                self._release(session_ids)
+
+    def _process_batch(self, session_ids, batch_audio):
+        """Run batched VAD over the new hops of one window per session, then verify each window"""
+        windows = []
+        for session_id in session_ids:
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+
+            detector = session.detector
+            try:
+                chunk = detector.audio_queue.get(timeout=0)
+            except queue.Empty:
+                continue
+
+            # Only spend inference on sessions with an active, registered interview
+            if not (detector.is_interview_active and detector.is_voice_registered):
+                continue
+            windows.append((detector, chunk))
+
+        if not windows:
+            return
+
+        now = time.monotonic()
+        for detector, chunk in windows:
+            detector.metrics.record('queue_wait', now - chunk.captured_at)
+
+        # Each session's own energy gate drops silent hops before the batched VAD; a window
+        # normally shares its first hop with the previous one, so only its second is new
+        overwritten = {}
+        gated = []
+        for detector, chunk in windows:
+            overwritten[detector] = set()
+            hop_frames = detector.hop_size // detector.vad_frame
+            for position in detector._hops_to_analyze([chunk]):
+                row = len(gated)
+                audio = detector.capture_buffer.read_float(position, detector.hop_size, batch_audio[row])
+                if audio is None:
+                    overwritten[detector].add(position)
+                elif detector.passes_energy_gate(audio):
+                    gated.append((detector, position))
+                else:
+                    detector.vad_probs.put(position // detector.vad_frame, np.zeros(hop_frames, dtype=np.float32))
+
+        # Batched stage costs are attributed evenly to the hops that shared them
+        if gated:
+            start = time.perf_counter()
+            probs = batched_speech_probs(self.vad_model, batch_audio[:len(gated)], sampling_rate=self.RATE)
+            vad_seconds = (time.perf_counter() - start) / len(gated)
+            for row, (detector, position) in enumerate(gated):
+                detector.metrics.record('vad', vad_seconds)
+                detector.cascade.record('vad', bool(probs[row].max() >= self.vad_threshold), vad_seconds)
+                detector.vad_probs.put(position // detector.vad_frame, probs[row])
+
+        # Speech decision, MFCC frames (computing only uncached ones), verification and warnings
+        for detector, chunk in windows:
+            is_speech = detector._window_is_speech(chunk, overwritten[detector])
+            if is_speech is not None:
+                detector._finish_window(chunk, is_speech)
+
+        with self._condition:
+            self.batches_processed += 1
+            self.windows_processed += len(windows)
+
+    def get_status(self):
+        """Engine capacity, worker pool and per-session summary"""
+        sessions = []
+        for session_id, session in list(self.sessions.items()):
+            detector = session.detector
+            sessions.append({
+                'session_id': session_id,
+                'is_registered': detector.is_voice_registered,
+                'is_registering': detector.is_registering,
+                'is_interview_active': detector.is_interview_active,
+                'warnings': detector.get_warning_count(),
+                'malpractice_count': detector.get_malpractice_count(),
+                'queue': detector.get_queue_stats()
+            })
+
+        return {
+            'active_sessions': len(self.sessions),
+            'max_sessions': self.max_sessions,
+            'max_sessions_per_core': self.max_sessions_per_core,
+            'workers': self.num_workers,
+            'max_batch': self.max_batch,
+            'batches_processed': self.batches_processed,
+            'windows_processed': self.windows_processed,
+            'sessions': sessions
+        }
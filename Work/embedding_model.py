@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+import logging
+
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+
+_embedding_model = None
+_embedding_load_info = {}
+_load_lock = threading.Lock()
+
+
+def get_embedding_model():
+    """Get the process-wide sentence embedding model, loading it on first use.
+
+    The scorer and the evaluator share this one instance. Under the
+    production server it is loaded in the master before workers are
+    forked, so every worker reuses the same weights.
+    """
+    global _embedding_model
+
+    if _embedding_model is not None:
+        return _embedding_model
+
+    with _load_lock:
+        if _embedding_model is not None:
+            return _embedding_model
+
+        start = time.perf_counter()
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        elapsed = time.perf_counter() - start
+
+        _embedding_load_info.update({
+            'model': EMBEDDING_MODEL_NAME,
+            'load_seconds': round(elapsed, 4),
+            'loaded_at': time.time()
+        })
+        logger.info(f"Embedding model {EMBEDDING_MODEL_NAME} loaded in {elapsed * 1000:.1f} ms")
+
+        _embedding_model = model
+        return _embedding_model
+
+
+def get_embedding_load_info():
+    """Name and load time of the shared embedding model (empty until loaded)"""
+    return dict(_embedding_load_info)
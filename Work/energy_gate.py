@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class EnergyGate:
+    """Cheap first stage of the detection cascade: is there anything louder than the room?
+
+    Each window is split into short frames and scored with vectorized RMS
+    level and zero-crossing rate. A frame is active when it is at least
+    `margin_db` above the adaptive noise floor, unless it also looks like
+    broadband noise (high zero-crossing rate) without being clearly loud.
+    Windows with fewer than `min_active_frames` active frames are silence
+    and never reach VAD.
+
+    The noise floor follows the quietest frames of each window: it drops
+    immediately to a quieter room and rises only slowly, so a candidate
+    talking continuously does not raise the floor over their own voice.
+    """
+
+    def __init__(self, frame_length=512, margin_db=6.0, min_active_frames=3, noise_zcr=0.35,
+                 floor_rise=0.05, floor_percentile=10, min_floor_db=-80.0, max_floor_db=-30.0):
+        self.frame_length = frame_length
+        self.margin_db = margin_db
+        self.min_active_frames = min_active_frames
+        self.noise_zcr = noise_zcr
+        self.floor_rise = floor_rise
+        self.floor_percentile = floor_percentile
+        self.min_floor_db = min_floor_db
+        self.max_floor_db = max_floor_db
+        self.reset()
+
+    def reset(self):
+        """Forget the learned noise floor"""
+        self.noise_floor_db = None
+
+    def frame_levels(self, audio):
+        """RMS level in dBFS and zero-crossing rate per frame"""
+        n_frames = len(audio) // self.frame_length
+        frames = np.asarray(audio[:n_frames * self.frame_length], dtype=np.float32)
+        frames = frames.reshape(n_frames, self.frame_length)
+
+        power = np.einsum('ij,ij->i', frames, frames) / self.frame_length
+        level_db = 10.0 * np.log10(np.maximum(power, 1e-10))
+
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_length - 1)
+        return level_db, zcr
+
+    def process(self, audio):
+        """Return True if the window may contain speech, updating the noise floor"""
+        level_db, zcr = self.frame_levels(audio)
+        if not len(level_db):
+            return False
+
+        quiet_db = float(np.percentile(level_db, self.floor_percentile))
+        if self.noise_floor_db is None or quiet_db < self.noise_floor_db:
+            self.noise_floor_db = quiet_db
+        else:
+            self.noise_floor_db += self.floor_rise * (quiet_db - self.noise_floor_db)
+        self.noise_floor_db = min(max(self.noise_floor_db, self.min_floor_db), self.max_floor_db)
+
+        above_floor = level_db - self.noise_floor_db
+        active = (above_floor >= self.margin_db) & (
+            (zcr < self.noise_zcr) | (above_floor >= 2 * self.margin_db)
+        )
+        return int(np.count_nonzero(active)) >= self.min_active_frames
@@ -1,9 +1,9 @@
 import os
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
+from embedding_model import get_embedding_model
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+model = get_embedding_model()
 
 
 def get_embeddings(texts):
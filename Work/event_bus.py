@@ -0,0 +1,135 @@
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+DEFAULT_CHANNEL = 'default'  # The app-wide detector that is not part of the detection engine
+
+
+class Subscription:
+    """One listener's queue of events on a channel; `overflowed` once it fell too far behind"""
+
+    def __init__(self, bus, channel, max_pending):
+        self.bus = bus
+        self.channel = channel
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=max_pending)
+
+    def _deliver(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True  # The listener reconnects and replays from the channel history
+
+    def get(self, timeout=None):
+        """Next event, or None if none arrived within `timeout` seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """In-process publish/subscribe of session status events.
+
+    Each channel (a session id) keeps a short history of recent events and
+    the latest event of each type. Subscribers get new events pushed onto
+    their own bounded queue, so a slow listener never blocks the audio
+    thread that publishes. Events carry a bus-wide increasing id: a client
+    that reconnects (or polls) with the last id it saw gets exactly what it
+    missed from the history, or the latest state of each type if the gap is
+    older than the history.
+    """
+
+    def __init__(self, history=256, max_pending=256):
+        self.history = history
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._history = {}
+        self._latest = {}
+        self._evicted = {}  # channel -> id of the newest event that fell out of its history
+        self._subscribers = {}
+        self.published = 0
+
+    def publish(self, channel, event_type, data):
+        """Record an event on a channel and push it to the channel's subscribers"""
+        with self._lock:
+            event = {
+                'id': self._next_id,
+                'type': event_type,
+                'channel': channel,
+                'data': data,
+                'timestamp': datetime.now().isoformat()
+            }
+            self._next_id += 1
+            self.published += 1
+            history = self._history.setdefault(channel, deque(maxlen=self.history))
+            if len(history) == self.history:
+                self._evicted[channel] = history[0]['id']
+            history.append(event)
+            self._latest.setdefault(channel, {})[event_type] = event
+            subscribers = list(self._subscribers.get(channel, ()))
+
+        for subscription in subscribers:
+            subscription._deliver(event)
+        return event
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def since(self, channel, after_id=0):
+        """Events on a channel newer than `after_id`, oldest first.
+
+        With no `after_id`, or one older than the kept history, the latest
+        event of each type stands in for the events that can't be replayed.
+        """
+        with self._lock:
+            history = list(self._history.get(channel, ()))
+            latest = list(self._latest.get(channel, {}).values())
+            evicted = self._evicted.get(channel, 0)
+
+        if after_id and after_id >= evicted:
+            return [event for event in history if event['id'] > after_id]
+        return sorted((event for event in latest if event['id'] > after_id), key=lambda event: event['id'])
+
+    def last_id(self):
+        with self._lock:
+            return self._next_id - 1
+
+    def drop_channel(self, channel):
+        """Forget a closed session's history"""
+        with self._lock:
+            self._history.pop(channel, None)
+            self._latest.pop(channel, None)
+            self._evicted.pop(channel, None)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'published': self.published,
+                'channels': len(self._history),
+                'subscribers': sum(len(subscribers) for subscribers in self._subscribers.values())
+            }
+
+
+_event_bus = EventBus()
+
+
+def get_event_bus():
+    """The process-wide event bus"""
+    return _event_bus
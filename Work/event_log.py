@@ -0,0 +1,265 @@
+import os
+import json
+import atexit
+import time
+import bisect
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: no pre-fork server there, so one process owns the log
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOG_PATH = 'data/events.jsonl'
+
+
+class EventLog:
+    """Append-only JSONL log of proctoring events with a background buffered writer.
+
+    ``append`` only stamps the event and puts it on an in-memory buffer, so
+    audio threads never touch the disk. A writer thread flushes the buffer
+    as one write every `flush_interval` seconds (sooner once `flush_batch`
+    events are waiting) and fsyncs written data every `fsync_interval`
+    seconds. The byte offset of every line is indexed by
+    sequence number and per session, so readers seek straight to the
+    events they want instead of re-parsing the file.
+
+    Several processes may append to the same log: each write holds an
+    exclusive ``flock`` on the file, first indexes whatever other processes
+    appended since, and only then numbers its events, so sequence numbers
+    stay unique and increasing across processes. Reads index new lines too.
+    """
+
+    def __init__(self, path=EVENT_LOG_PATH, flush_interval=0.2, fsync_interval=1.0, flush_batch=1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.flush_batch = flush_batch
+
+        self._buffer = deque()
+        self._condition = threading.Condition()
+        self._io_lock = threading.Lock()  # Serializes file writes with index reads
+
+        # Index: parallel lists of sequence numbers and line offsets, globally and per session
+        self._seqs = []
+        self._offsets = []
+        self._session_index = {}
+        self._indexed_size = 0  # Bytes of the file already indexed
+        self._last_seq = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._file = open(path, 'ab')
+        with self._io_lock:
+            self._lock_file(exclusive=True)
+            try:
+                self._catch_up(truncate_torn=True)
+            finally:
+                self._unlock_file()
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self.written = 0
+
+        self._stop = False
+        self._writer = threading.Thread(target=self._writer_loop, name='event-log-writer')
+        self._writer.daemon = True
+        self._writer.start()
+
+    def _lock_file(self, exclusive):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _unlock_file(self):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _catch_up(self, truncate_torn=False):
+        """Index lines appended (by any process) since the last call; caller holds the locks"""
+        size = os.fstat(self._file.fileno()).st_size
+        if size <= self._indexed_size:
+            return
+
+        offset = self._indexed_size
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Torn final write from a crash
+                try:
+                    event = json.loads(line)
+                    self._index_event(event['seq'], event.get('session_id'), offset)
+                    self._last_seq = max(self._last_seq, event['seq'])
+                except (ValueError, KeyError):
+                    logger.warning(f"Skipping corrupt event log line at offset {offset}")
+                offset += len(line)
+        self._indexed_size = offset
+
+        if truncate_torn and offset != size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+
+    def _index_event(self, seq, session_id, offset):
+        self._seqs.append(seq)
+        self._offsets.append(offset)
+        if session_id is not None:
+            seqs, offsets = self._session_index.setdefault(session_id, ([], []))
+            seqs.append(seq)
+            offsets.append(offset)
+
+    def append(self, event_type, session_id=None, **fields):
+        """Queue an event for writing; its sequence number is assigned when it is written"""
+        with self._condition:
+            event = {
+                'timestamp': fields.pop('timestamp', None) or datetime.now().isoformat(),
+                'type': event_type,
+                'session_id': session_id
+            }
+            event.update(fields)
+            self._buffer.append(event)
+            if len(self._buffer) >= self.flush_batch:
+                self._condition.notify()
+
+    def _writer_loop(self):
+        while True:
+            # Let events accumulate into one write, waking early for a full batch or shutdown
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._buffer) >= self.flush_batch or self._stop,
+                    timeout=self.flush_interval
+                )
+                stopping = self._stop
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Event log write failed: {e}")
+
+            if stopping:
+                return
+
+    def flush(self, fsync=False):
+        """Write buffered events now (normally done by the writer thread)"""
+        with self._condition:
+            events = list(self._buffer)
+            self._buffer.clear()
+
+        with self._io_lock:
+            if events:
+                self._lock_file(exclusive=True)
+                try:
+                    self._catch_up()
+                    offset = self._indexed_size
+                    lines = []
+                    for event in events:
+                        self._last_seq += 1
+                        event = {'seq': self._last_seq, **event}
+                        line = (json.dumps(event, default=str) + '\n').encode('utf-8')
+                        self._index_event(event['seq'], event['session_id'], offset)
+                        offset += len(line)
+                        lines.append(line)
+                    self._file.write(b''.join(lines))
+                    self._file.flush()
+                    self._indexed_size = offset
+                finally:
+                    self._unlock_file()
+                self.written += len(events)
+                self._unsynced = True
+
+            now = time.monotonic()
+            if self._unsynced and (fsync or now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+                self._unsynced = False
+
+    def read(self, session_id=None, after_seq=0, limit=100, event_types=None):
+        """Events with seq > `after_seq` (optionally one session's / some types), oldest first"""
+        with self._io_lock:
+            self._refresh()
+            if session_id is None:
+                seqs, offsets = self._seqs, self._offsets
+            else:
+                seqs, offsets = self._session_index.get(session_id, ([], []))
+            start = bisect.bisect_right(seqs, after_seq)
+            candidates = offsets[start:]
+
+        events = []
+        with open(self.path, 'rb') as f:
+            for offset in candidates:
+                f.seek(offset)
+                event = json.loads(f.readline())
+                if event_types and event['type'] not in event_types:
+                    continue
+                events.append(event)
+                if len(events) >= limit:
+                    break
+        return events
+
+    def _refresh(self):
+        """Index events other processes wrote since we last looked; caller holds _io_lock"""
+        if os.fstat(self._file.fileno()).st_size > self._indexed_size:
+            self._lock_file(exclusive=False)
+            try:
+                self._catch_up()
+            finally:
+                self._unlock_file()
+
+    def last_seq(self, session_id=None):
+        """Sequence number of the newest written event (overall or for a session), 0 if none"""
+        with self._io_lock:
+            self._refresh()
+            seqs = self._seqs if session_id is None else self._session_index.get(session_id, ([], []))[0]
+            return seqs[-1] if seqs else 0
+
+    def get_stats(self):
+        """Writer throughput and backlog"""
+        with self._condition:
+            buffered = len(self._buffer)
+        with self._io_lock:
+            last_seq = self._last_seq
+        return {
+            'path': self.path,
+            'written': self.written,
+            'buffered': buffered,
+            'sessions': len(self._session_index),
+            'last_seq': last_seq
+        }
+
+    def close(self):
+        """Flush, fsync and stop the writer"""
+        with self._condition:
+            self._stop = True
+            self._condition.notify()
+        self._writer.join(timeout=5)
+        self.flush(fsync=True)
+        self._file.close()
+
+
+_event_logs = {}
+_event_logs_lock = threading.Lock()
+
+
+def get_event_log(path=EVENT_LOG_PATH):
+    """Get the process-wide event log for a path, opening it on first use"""
+    with _event_logs_lock:
+        event_log = _event_logs.get(path)
+        if event_log is None:
+            if not _event_logs:
+                atexit.register(close_event_logs)  # Don't lose buffered events on a clean exit
+            event_log = EventLog(path)
+            _event_logs[path] = event_log
+        return event_log
+
+
+def close_event_logs():
+    """Flush and close every open event log (call at shutdown)"""
+    with _event_logs_lock:
+        for event_log in _event_logs.values():
+            event_log.close()
+        _event_logs.clear()
@@ -0,0 +1,114 @@
+"""Production server settings: ``gunicorn -c gunicorn.conf.py wsgi:app``
+
+The master process loads the VAD and embedding models (and imports torch,
+librosa and sentence-transformers) once, before forking. Workers inherit
+the loaded weights and share their memory pages copy-on-write, so starting
+or recycling a worker does not load anything again. The app itself is NOT
+preloaded: importing it starts background threads (mail outbox, snapshot
+writers, event log, workspace cleanup, detection workers) and opens SQLite
+connections, none of which survive a fork. Each worker imports it after
+forking.
+
+Detection sessions, event streams, session status and the server-mic
+detector's voice registration live only in the memory of the worker that
+created them. Recycling or restarting that worker loses them, so
+max_requests is off by default. Set GUNICORN_MAX_REQUESTS only when no
+proctoring runs through this deployment.
+
+WEB_CONCURRENCY > 1 needs more than sticky routing at the load balancer:
+- Every worker opens its own server-mic detector, so the server
+  microphone is only usable with a single worker.
+- In-memory state is per worker: detection sessions, event streams,
+  session status and the leaderboard cache. A session's proctoring
+  requests must all reach the worker that created it.
+- Shared files coordinate through flock and are safe from any worker: the
+  event log, the voice profile store, the session state snapshot and the
+  HR CSV. So are SQLite (results, mail outbox) and the interview
+  workspaces on disk.
+  On systems without fcntl those files assume a single process.
+
+Every open /session-events stream (one per candidate page) holds a request
+thread for up to five minutes and then reconnects. The pool is therefore
+sized as SSE_MAX_STREAMS streams plus headroom for audio uploads,
+transcripts and probes. Each worker refuses streams beyond SSE_MAX_STREAMS
+with a 503, and those pages poll instead. /health/ready fails while every
+thread is busy. Raise SSE_MAX_STREAMS (or add workers) for more concurrent
+candidates. Async workers (gevent/eventlet) are not used because detection
+runs CPU-bound torch work in real threads.
+"""
+import gc
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+# Threaded workers, sized for the event streams the app accepts plus headroom (see above)
+worker_class = 'gthread'
+SSE_MAX_STREAMS = int(os.environ.setdefault('SSE_MAX_STREAMS', '32'))
+threads = int(os.getenv('GUNICORN_THREADS', SSE_MAX_STREAMS + 16))
+os.environ['GUNICORN_THREADS'] = str(threads)  # Read by the app's readiness check
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))  # /upload waits for question generation
+graceful_timeout = 30
+keepalive = 5
+
+# Worker recycling is off by default: it would drop live proctoring sessions (see above).
+# When enabled, the jitter keeps workers from restarting together.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+preload_app = False  # Only the models are preloaded, see on_starting
+chdir = os.path.dirname(os.path.abspath(__file__))  # data/, uploads/ and templates/ are relative paths
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Tokenizers must not start their thread pool in the master before workers fork
+os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+
+# Torch threads per worker; by default the cores are split between workers
+TORCH_THREADS = int(os.getenv('TORCH_THREADS', max(1, (os.cpu_count() or 1) // max(workers, 1))))
+
+
+def on_starting(server):
+    """Load the models in the master so every forked worker shares them"""
+    from vad_model import get_vad_model, get_vad_load_info
+    from embedding_model import get_embedding_model, get_embedding_load_info
+    from voice_features import get_mfcc_extractor
+
+    get_vad_model()
+    get_embedding_model()
+    get_mfcc_extractor(16000)
+    vad_info = get_vad_load_info()
+    embedding_info = get_embedding_load_info()
+    server.log.info(
+        f"Preloaded VAD model ({vad_info['backend']}) in {vad_info['load_seconds'] * 1000:.0f} ms and "
+        f"{embedding_info['model']} in {embedding_info['load_seconds'] * 1000:.0f} ms"
+    )
+
+    # Move everything allocated so far out of the collector's generations: collections in
+    # workers would otherwise write to the preloaded objects' pages and copy them
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import torch
+
+    torch.set_num_threads(TORCH_THREADS)
+
+
+def worker_exit(server, worker):
+    """Log what in-memory proctoring state dies with the worker"""
+    import sys
+
+    app_module = sys.modules.get('app')
+    engine = getattr(app_module, 'detection_engine', None)
+    detector = getattr(app_module, 'audio_detector', None)
+    open_sessions = len(engine.sessions) if engine else 0
+    registered = bool(detector and detector.is_voice_registered)
+    if open_sessions or registered:
+        server.log.warning(
+            f"Worker {worker.pid} exiting: {open_sessions} open detection sessions "
+            f"and the server-mic registration (registered={registered}) are lost"
+        )
+    else:
+        server.log.info(f"Worker {worker.pid} exiting after {worker.nr} requests")
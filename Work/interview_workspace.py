@@ -0,0 +1,327 @@
+import os
+import re
+import json
+import time
+import shutil
+import atexit
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_ROOT = 'data/sessions'
+DEFAULT_SESSION = 'default'  # Used by clients that don't send a session id
+WORKSPACE_TTL = 6 * 3600  # Seconds a workspace may sit unused before it is cleaned up
+TOUCH_INTERVAL = 60  # Refresh meta.json's mtime (the cross-process last-use time) at most this often
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+UNANSWERED = '<user_input_required>'  # Placeholder answer run_qna_pipeline writes into history.json
+
+
+def check_session_id(session_id):
+    """Session ids become directory names: reject anything but a short [A-Za-z0-9_-] token"""
+    if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+        raise ValueError(f"Invalid session id: {session_id!r}")
+    return session_id
+
+
+class InterviewWorkspace:
+    """One interview's files: its question/answer history, transcript and uploaded documents.
+
+    Everything lives under ``<root>/<session_id>/`` so concurrent
+    interviews never touch each other's files. ``meta.json`` records the
+    uploaded file paths and timestamps so any worker process can pick the
+    workspace up from disk.
+
+    ``history.json`` holds the generated questions and is never rewritten;
+    answers are appended to ``answers.jsonl`` keyed by question index. The
+    questions, answers and the position of the first unanswered question
+    are kept in memory and brought up to date by reading only what was
+    appended to the log since the last look (possibly by another process).
+    """
+
+    def __init__(self, root, session_id):
+        self.session_id = session_id
+        self.directory = os.path.join(root, session_id)
+        self.history_path = os.path.join(self.directory, 'history.json')
+        self.transcript_path = os.path.join(self.directory, 'transcript.txt')
+        self.output_path = os.path.join(self.directory, 'output.json')
+        self.answers_path = os.path.join(self.directory, 'answers.jsonl')
+        self.meta_path = os.path.join(self.directory, 'meta.json')
+        self.lock = threading.RLock()  # Guards the answer index and this session's files
+        self.files = {}
+        self.created = datetime.now().isoformat()
+        self.last_access = time.time()
+        self._last_disk_touch = 0.0
+        self._invalidate_index()
+
+    @classmethod
+    def load(cls, root, session_id):
+        """Open a workspace written by this or another process, or None if it does not exist"""
+        workspace = cls(root, session_id)
+        try:
+            with open(workspace.meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        workspace.files = meta.get('files', {})
+        workspace.created = meta.get('created', workspace.created)
+        return workspace
+
+    def save_meta(self):
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'session_id': self.session_id, 'created': self.created, 'files': self.files}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def touch(self):
+        """Mark the workspace used (on disk too, so other processes' cleanup sees it)"""
+        self.last_access = time.time()
+        if self.last_access - self._last_disk_touch >= TOUCH_INTERVAL:
+            try:
+                os.utime(self.meta_path)
+                self._last_disk_touch = self.last_access
+            except OSError:
+                pass
+
+    def idle_seconds(self, now):
+        """Seconds since anyone (in any process) last used the workspace"""
+        try:
+            last = max(self.last_access, os.path.getmtime(self.meta_path))
+        except OSError:
+            last = self.last_access
+        return now - last
+
+    def set_files(self, **paths):
+        """Record uploaded documents (e.g. resume=..., jd=...)"""
+        with self.lock:
+            self.files.update(paths)
+            self.save_meta()
+
+    def reset(self):
+        """Start the interview over: drop history, answers, transcript and scores"""
+        with self.lock:
+            for path in (self.history_path, self.answers_path, self.transcript_path, self.output_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._invalidate_index()
+
+    def _invalidate_index(self):
+        self._history_key = False  # (mtime, size) of the history.json the index was built from
+        self._questions = []
+        self._base_answers = {}  # Answers already present in history.json
+        self._answers = {}
+        self._log_offset = 0  # Bytes of answers.jsonl already applied
+        self._next_unanswered = 0
+
+    def _refresh_index(self):
+        """Apply whatever changed on disk since the last call: new questions or appended answers"""
+        try:
+            stat = os.stat(self.history_path)
+            history_key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            history_key = None
+        try:
+            log_size = os.path.getsize(self.answers_path)
+        except OSError:
+            log_size = 0
+
+        if history_key != self._history_key or log_size < self._log_offset:
+            # New questions, or the log was cleared by a reset in another process
+            self._invalidate_index()
+            self._history_key = history_key
+            if history_key is not None:
+                with open(self.history_path, 'r') as f:
+                    history = json.load(f)
+                self._questions = [item['question'] for item in history]
+                self._base_answers = {
+                    index: item['answer'] for index, item in enumerate(history)
+                    if item.get('answer', UNANSWERED) != UNANSWERED
+                }
+            self._answers = dict(self._base_answers)
+
+        if log_size > self._log_offset:
+            with open(self.answers_path, 'rb') as f:
+                f.seek(self._log_offset)
+                data = f.read(log_size - self._log_offset)
+            complete = data.rfind(b'\n') + 1  # A line still being written is picked up next time
+            for line in data[:complete].splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self._answers[entry['index']] = entry['answer']
+            self._log_offset += complete
+
+    def next_question(self):
+        """(index, question) of the first unanswered question, or None once all are answered"""
+        with self.lock:
+            self._refresh_index()
+            while self._next_unanswered in self._answers:
+                self._next_unanswered += 1
+            if self._next_unanswered >= len(self._questions):
+                return None
+            return self._next_unanswered, self._questions[self._next_unanswered]
+
+    def find_question(self, question):
+        """Index of a question by its text (the first unanswered match), or None"""
+        with self.lock:
+            self._refresh_index()
+            matches = [index for index, text in enumerate(self._questions) if text.strip() == question.strip()]
+            unanswered = [index for index in matches if index not in self._answers]
+            return (unanswered or matches or [None])[0]
+
+    def record_answer(self, index, answer):
+        """Append the answer to question `index` to the answer log; returns the question text"""
+        with self.lock:
+            self._refresh_index()
+            if not 0 <= index < len(self._questions):
+                raise IndexError(f"No question {index} in session {self.session_id}")
+            entry = {'index': index, 'answer': answer, 'timestamp': datetime.now().isoformat()}
+            with open(self.answers_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+            self._refresh_index()
+            return self._questions[index]
+
+    def load_history(self):
+        """The question/answer history with logged answers applied, [] before questions are generated"""
+        with self.lock:
+            self._refresh_index()
+            return [
+                {'question': question, 'answer': self._answers.get(index, UNANSWERED)}
+                for index, question in enumerate(self._questions)
+            ]
+
+    def append_transcript(self, text):
+        with self.lock:
+            with open(self.transcript_path, 'a', encoding='utf-8') as f:
+                f.write(text)
+
+    def to_dict(self):
+        return {
+            'session_id': self.session_id,
+            'created': self.created,
+            'last_access': datetime.fromtimestamp(self.last_access).isoformat(),
+            'files': self.files,
+            'has_transcript': os.path.exists(self.transcript_path)
+        }
+
+
+class WorkspaceManager:
+    """Session id -> InterviewWorkspace, with idle workspaces removed after `ttl` seconds.
+
+    Lookups are a dictionary hit; a workspace created by another worker
+    process is loaded from its meta.json on first use. A background thread
+    sweeps every `cleanup_interval` seconds and deletes workspaces (and
+    their uploaded documents) that nobody has touched for `ttl` seconds.
+    """
+
+    def __init__(self, root=WORKSPACE_ROOT, ttl=WORKSPACE_TTL, cleanup_interval=600.0):
+        self.root = root
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self._lock = threading.Lock()
+        self._workspaces = {}
+        self.expired = 0
+        os.makedirs(root, exist_ok=True)
+
+        self._stop = threading.Event()
+        self._sweeper = threading.Thread(target=self._cleanup_loop, name='workspace-cleanup')
+        self._sweeper.daemon = True
+        self._sweeper.start()
+
+    def create(self, session_id):
+        """Open a fresh workspace for a session, clearing any previous interview in it"""
+        check_session_id(session_id)
+        with self._lock:
+            workspace = self._workspaces.get(session_id) or InterviewWorkspace(self.root, session_id)
+            self._workspaces[session_id] = workspace
+        os.makedirs(workspace.directory, exist_ok=True)
+        workspace.reset()
+        workspace.files = {}
+        workspace.created = datetime.now().isoformat()
+        workspace.save_meta()
+        workspace.touch()
+        return workspace
+
+    def get(self, session_id, create=False):
+        """The session's workspace (loading it from disk if another process made it), or None"""
+        check_session_id(session_id)
+        with self._lock:
+            workspace = self._workspaces.get(session_id)
+            if workspace is None:
+                workspace = InterviewWorkspace.load(self.root, session_id)
+                if workspace is not None:
+                    self._workspaces[session_id] = workspace
+        if workspace is None:
+            return self.create(session_id) if create else None
+        workspace.touch()
+        return workspace
+
+    def remove(self, session_id):
+        """Delete a workspace and its uploaded documents; returns whether it existed"""
+        check_session_id(session_id)
+        with self._lock:
+            workspace = self._workspaces.pop(session_id, None)
+        if workspace is None:
+            workspace = InterviewWorkspace.load(self.root, session_id)
+            if workspace is None:
+                return False
+
+        with workspace.lock:
+            for path in workspace.files.values():
+                if path and os.path.exists(path):
+                    os.remove(path)
+            shutil.rmtree(workspace.directory, ignore_errors=True)
+        return True
+
+    def cleanup_expired(self):
+        """Remove workspaces idle for longer than ttl (including ones left on disk by a restart)"""
+        now = time.time()
+        with self._lock:
+            known = dict(self._workspaces)
+
+        expired = [session_id for session_id, workspace in known.items() if workspace.idle_seconds(now) > self.ttl]
+        for entry in os.listdir(self.root):
+            if entry not in known and SESSION_ID_PATTERN.match(entry):
+                meta_path = os.path.join(self.root, entry, 'meta.json')
+                try:
+                    if now - os.path.getmtime(meta_path) > self.ttl:
+                        expired.append(entry)
+                except OSError:
+                    pass
+
+        for session_id in expired:
+            self.remove(session_id)
+        self.expired += len(expired)
+        if expired:
+            logger.info(f"Removed {len(expired)} expired interview workspaces")
+        return len(expired)
+
+    def _cleanup_loop(self):
+        while not self._stop.wait(self.cleanup_interval):
+            try:
+                self.cleanup_expired()
+            except Exception as e:
+                logger.error(f"Workspace cleanup failed: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            active = len(self._workspaces)
+        return {'active': active, 'expired': self.expired, 'ttl_seconds': self.ttl}
+
+    def stop(self):
+        self._stop.set()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_workspace_manager(root=WORKSPACE_ROOT, **kwargs):
+    """Get the process-wide workspace manager for a root directory, creating it on first use"""
+    with _managers_lock:
+        manager = _managers.get(root)
+        if manager is None:
+            manager = WorkspaceManager(root, **kwargs)
+            atexit.register(manager.stop)
+            _managers[root] = manager
+        return manager
@@ -0,0 +1,414 @@
+import os
+import json
+import math
+import time
+import heapq
+import atexit
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_SNAPSHOT = 'data/leaderboard.json'
+LEADERBOARD_SIZE = 10
+REPORTED_PERCENTILES = (10, 25, 50, 75, 90)
+SNAPSHOT_FORMAT = 2  # Bumped when rebuilds change what boards contain, so old snapshots are ignored
+MAX_PENDING = 1000  # Out-of-order results held while waiting for the versions before them
+
+
+def _score_percent(value):
+    """Stored scores are fractions; boards and stats report percent like the old top.json"""
+    try:
+        return round(float(value) * 100, 1)
+    except (TypeError, ValueError):
+        return None
+
+
+class ScoreSketch:
+    """Approximate quantiles of a score stream (a merging t-digest).
+
+    Scores are buffered and periodically merged into at most about
+    `compression` weighted centroids. The arcsine scale function keeps
+    centroids small near the tails, so extreme percentiles stay accurate
+    while the sketch size is independent of how many scores were added.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self._buffer_size = 5 * compression
+        self.means = []
+        self.counts = []
+        self._buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        value = float(value)
+        self._buffer.append(value)
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k):
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self):
+        """Merge buffered scores into the centroids"""
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.counts)) + [(value, 1) for value in self._buffer])
+        self._buffer = []
+
+        total = sum(count for _, count in points)
+        means, counts = [], []
+        mean, count = points[0]
+        q0 = 0.0
+        q_limit = self._k_inverse(self._k(q0) + 1)
+        for next_mean, next_count in points[1:]:
+            if (q0 * total + count + next_count) / total <= q_limit:
+                count += next_count
+                mean += (next_mean - mean) * next_count / count
+            else:
+                means.append(mean)
+                counts.append(count)
+                q0 += count / total
+                q_limit = self._k_inverse(self._k(q0) + 1)
+                mean, count = next_mean, next_count
+        means.append(mean)
+        counts.append(count)
+        self.means, self.counts = means, counts
+
+    def quantile(self, q):
+        """Approximate q-quantile (0..1) of every score added, None if empty"""
+        self._compress()
+        if not self.count:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+
+        # Interpolate between centroid centres, anchored at the exact min and max
+        target = q * self.count
+        cumulative = 0.0
+        previous_center, previous_mean = 0.0, self.min
+        for mean, count in zip(self.means, self.counts):
+            center = cumulative + count / 2
+            if target < center:
+                span = center - previous_center
+                fraction = (target - previous_center) / span if span else 0.0
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            cumulative += count
+        span = self.count - previous_center
+        fraction = (target - previous_center) / span if span else 1.0
+        return previous_mean + min(fraction, 1.0) * (self.max - previous_mean)
+
+    def to_dict(self):
+        self._compress()
+        return {'compression': self.compression, 'means': self.means, 'counts': self.counts,
+                'count': self.count, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['compression'])
+        sketch.means = list(data['means'])
+        sketch.counts = list(data['counts'])
+        sketch.count = data['count']
+        sketch.min = data['min'] if sketch.count else math.inf
+        sketch.max = data['max'] if sketch.count else -math.inf
+        return sketch
+
+
+class ScoreBoard:
+    """Top-k entries (a bounded min-heap) plus streaming score statistics for one group.
+
+    ``add`` is O(log k): the heap root is the weakest entry on the board,
+    so a new score either loses to it or replaces it. Count, mean and
+    variance are updated with Welford's method and percentiles come from a
+    ScoreSketch. Reads are served from a cached view that is rebuilt only
+    after the board changes.
+    """
+
+    def __init__(self, size=LEADERBOARD_SIZE):
+        self.size = size
+        self._heap = []  # (score, -seq, entry); ties keep the earlier submission
+        self._seq = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.sketch = ScoreSketch()
+        self._top = None
+        self._stats = None
+
+    def add(self, score, entry):
+        self.count += 1
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (score - self.mean)
+        self.sketch.add(score)
+        self._stats = None
+        self.offer(score, entry)
+
+    def offer(self, score, entry):
+        """Put an entry up for the board without counting it in the statistics"""
+        self._seq += 1
+        item = (score, -self._seq, entry)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+        else:
+            return
+        self._top = None
+
+    def top(self):
+        """Board entries, best first"""
+        if self._top is None:
+            self._top = [entry for _, _, entry in sorted(self._heap, reverse=True)]
+        return self._top
+
+    def stats(self):
+        """Count, mean, std, min, max and approximate percentiles of every score added"""
+        if self._stats is None:
+            if not self.count:
+                self._stats = {'count': 0}
+            else:
+                self._stats = {
+                    'count': self.count,
+                    'mean': round(self.mean, 2),
+                    'std': round(math.sqrt(self._m2 / self.count), 2),
+                    'min': self.sketch.min,
+                    'max': self.sketch.max,
+                    'percentiles': {
+                        f'p{p}': round(self.sketch.quantile(p / 100), 1) for p in REPORTED_PERCENTILES
+                    }
+                }
+        return self._stats
+
+    def to_dict(self):
+        return {'size': self.size, 'heap': self._heap, 'seq': self._seq, 'count': self.count,
+                'mean': self.mean, 'm2': self._m2, 'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        board = cls(data['size'])
+        board._heap = [(score, neg_seq, entry) for score, neg_seq, entry in data['heap']]
+        heapq.heapify(board._heap)
+        board._seq = data['seq']
+        board.count = data['count']
+        board.mean = data['mean']
+        board._m2 = data['m2']
+        board.sketch = ScoreSketch.from_dict(data['sketch'])
+        return board
+
+
+class Leaderboard:
+    """Leaderboards and score statistics, overall and per position, kept in memory.
+
+    Every submitted result is folded into the overall board and its
+    position's board as it arrives. The boards track the results store
+    version they reflect: results are applied incrementally in version
+    order (one recorded ahead of a concurrent submit waits for it). A
+    version nobody recorded here makes the next read catch up: results
+    written since (e.g. by another worker process) are fetched and folded
+    in, and only a delete, a clear or a replaced result rebuilds the
+    boards from the store. Candidates imported from the legacy top.json
+    (the store's top_candidates table) have no result row; rebuilds put
+    them on the overall board but leave them out of the statistics.
+    Snapshots let a restart skip that rebuild when the store has not
+    changed since.
+    """
+
+    def __init__(self, results_store, snapshot_path=LEADERBOARD_SNAPSHOT, size=LEADERBOARD_SIZE,
+                 snapshot_interval=30.0):
+        self.results_store = results_store
+        self.snapshot_path = snapshot_path
+        self.size = size
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._overall = ScoreBoard(size)
+        self._positions = {}
+        self.version = None
+        self._pending = {}  # version -> result recorded ahead of an earlier, still-uncommitted one
+        self.rebuilds = 0
+        self.catch_ups = 0
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+
+        directory = os.path.dirname(snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+            if snapshot.get('size') != self.size or snapshot.get('format') != SNAPSHOT_FORMAT:
+                return
+            self._overall = ScoreBoard.from_dict(snapshot['overall'])
+            self._positions = {position: ScoreBoard.from_dict(board)
+                               for position, board in snapshot['positions'].items()}
+            self.version = snapshot['version']
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable leaderboard snapshot: {e}")
+
+    def _add(self, result):
+        score = _score_percent(result.get('score'))
+        if score is None:
+            return
+        position = result.get('position') or 'Unspecified'
+        entry = {
+            'id': result.get('id'),
+            'name': result.get('name'),
+            'position': position,
+            'score': score,
+            'timestamp': result.get('timestamp')
+        }
+        self._overall.add(score, entry)
+        board = self._positions.get(position)
+        if board is None:
+            board = self._positions[position] = ScoreBoard(self.size)
+        board.add(score, entry)
+
+    def _rebuild(self, version):
+        """Recompute every board from the store (after deletes or writes we didn't see)"""
+        self._overall = ScoreBoard(self.size)
+        self._positions = {}
+        results = self.results_store.list_results()
+
+        # Legacy entries go first so ties rank them as the earlier submissions
+        submitted = {(result.get('name'), _score_percent(result.get('score'))) for result in results}
+        for candidate in self.results_store.top_candidates():
+            score = candidate['score']
+            if score is None or (candidate['name'], score) in submitted:
+                continue
+            self._overall.offer(score, {
+                'id': None,
+                'name': candidate['name'],
+                'position': None,
+                'score': score,
+                'timestamp': candidate['timestamp'],
+                'legacy': True
+            })
+
+        for result in reversed(results):
+            self._add(result)
+        self.version = version
+        self._pending.clear()
+        self.rebuilds += 1
+        self._dirty = True
+
+    def _catch_up(self):
+        """Fold in results written since our version; False if the store changed otherwise"""
+        results, version = self.results_store.results_since(self.version)
+        if results is None:
+            return False
+        for result in results:
+            self._add(result)
+        self.version = version
+        # Results recorded here but not yet applied were among those just read
+        self._pending = {pending: result for pending, result in self._pending.items() if pending > version}
+        self._apply_pending()
+        self.catch_ups += 1
+        self._dirty = True
+        return True
+
+    def _sync(self):
+        version = self.results_store.version()[0]
+        if version == self.version:
+            return
+        if self.version is None or not self._catch_up():
+            self._rebuild(version)
+        self._maybe_snapshot()
+
+    def _apply_pending(self):
+        while self.version is not None and self.version + 1 in self._pending:
+            self._add(self._pending.pop(self.version + 1))
+            self.version += 1
+            self._dirty = True
+
+    def record(self, result, version):
+        """Fold in a result the store wrote at `version` (as returned by add_result)"""
+        with self._lock:
+            if self.version is None or version <= self.version:
+                return  # A rebuild is due, or already included this result
+            self._pending[version] = result
+            self._apply_pending()
+            if len(self._pending) > MAX_PENDING:
+                self._sync()  # The gap is another process's writes, already committed
+            self._maybe_snapshot()
+
+    def top(self, position=None, limit=None):
+        """Best results, overall or for one position, highest score first"""
+        with self._lock:
+            self._sync()
+            board = self._overall if position is None else self._positions.get(position)
+            entries = board.top() if board else []
+        return entries[:limit] if limit else entries
+
+    def stats(self, position=None):
+        """Score statistics overall and per position (or for one position)"""
+        with self._lock:
+            self._sync()
+            if position is not None:
+                board = self._positions.get(position)
+                return {position: board.stats() if board else {'count': 0}}
+            return {
+                'overall': self._overall.stats(),
+                'positions': {name: board.stats() for name, board in sorted(self._positions.items())}
+            }
+
+    def _maybe_snapshot(self):
+        if self._dirty and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self._save_snapshot()
+
+    def _save_snapshot(self):
+        if self.version is None:
+            return
+        snapshot = {
+            'version': self.version,
+            'format': SNAPSHOT_FORMAT,
+            'size': self.size,
+            'saved_at': datetime.now().isoformat(),
+            'overall': self._overall.to_dict(),
+            'positions': {position: board.to_dict() for position, board in self._positions.items()}
+        }
+        try:
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"  # Workers may snapshot at the same time
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Could not write leaderboard snapshot: {e}")
+        self._last_snapshot = time.monotonic()
+
+    def save(self):
+        """Write a snapshot now if anything changed since the last one"""
+        with self._lock:
+            if self._dirty:
+                self._save_snapshot()
+
+
+_leaderboards = {}
+_leaderboards_lock = threading.Lock()
+
+
+def get_leaderboard(results_store, snapshot_path=LEADERBOARD_SNAPSHOT):
+    """Get the process-wide leaderboard for a snapshot path, creating it on first use"""
+    with _leaderboards_lock:
+        leaderboard = _leaderboards.get(snapshot_path)
+        if leaderboard is None:
+            leaderboard = Leaderboard(results_store, snapshot_path)
+            _leaderboards[snapshot_path] = leaderboard
+            atexit.register(leaderboard.save)
+        return leaderboard
@@ -0,0 +1,345 @@
+import os
+import json
+import time
+import atexit
+import smtplib
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DB = 'data/outbox.db'
+LOCAL_MAIL_DIR = 'data/mail'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    claimed REAL,
+    sent REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, created);
+"""
+
+INSERT_MESSAGE = "INSERT INTO outbox (recipient, payload, created) VALUES (?, ?, ?)"
+SELECT_DUE = ("SELECT id, recipient, payload, attempts, created FROM outbox "
+              "WHERE status = 'pending' AND next_attempt <= ? ORDER BY created LIMIT ?")
+CLAIM_MESSAGE = "UPDATE outbox SET status = 'sending', claimed = ? WHERE id = ?"
+MARK_SENT = "UPDATE outbox SET status = 'sent', sent = ?, error = NULL WHERE id = ?"
+MARK_RETRY = ("UPDATE outbox SET status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+              "attempts = attempts + 1, next_attempt = ?, error = ? WHERE id = ?")
+RELEASE_STALE = "UPDATE outbox SET status = 'pending' WHERE status = 'sending' AND claimed < ?"
+PRUNE_SENT = "DELETE FROM outbox WHERE status = 'sent' AND sent < ?"
+# Earliest time a queued item's digest is due, and how many items could be sent right now
+NEXT_DUE = ("SELECT MIN(MAX(created + ?, next_attempt)), SUM(next_attempt <= ?) "
+            "FROM outbox WHERE status = 'pending'")
+PENDING_STATS = "SELECT COUNT(*), MIN(created) FROM outbox WHERE status IN ('pending', 'sending')"
+COUNT_FAILED = "SELECT COUNT(*) FROM outbox WHERE status = 'failed'"
+
+
+class SMTPTransport:
+    """Sends messages over one SMTP connection, kept open between sends.
+
+    The connection is checked with NOOP before reuse and reopened if the
+    server dropped it; it is closed after `idle_timeout` seconds unused so
+    a quiet app does not hold a session open at the mail provider.
+    """
+
+    def __init__(self, host='smtp.gmail.com', port=465, username=None, password=None,
+                 use_ssl=True, idle_timeout=60.0, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.sender = username
+        self.connections_opened = 0
+        self._smtp = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.username:
+            smtp.login(self.username, self.password)
+        self.connections_opened += 1
+        return smtp
+
+    def _connection(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+        self._smtp = self._connect()
+        return self._smtp
+
+    def send(self, message):
+        try:
+            self._connection().send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # One reconnect for a connection that died between the NOOP and the send
+            self.close()
+            self._connection().send_message(message)
+        self._last_used = time.monotonic()
+
+    def idle(self):
+        """Close the connection if it has been unused for idle_timeout seconds"""
+        if self._smtp is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+            self.close()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+class LocalMailTransport:
+    """Stand-in for an SMTP server: writes each message as an .eml file in `directory`"""
+
+    def __init__(self, directory=LOCAL_MAIL_DIR, sender='hireiq@localhost'):
+        self.directory = directory
+        self.sender = sender
+        self.connections_opened = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, message):
+        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.eml"
+        with open(os.path.join(self.directory, filename), 'wb') as f:
+            f.write(message.as_bytes())
+
+    def idle(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def transport_from_env():
+    """SMTP transport from EMAIL_ADDRESS / EMAIL_PASSWORD (SMTP_HOST, SMTP_PORT, SMTP_SSL optional);
+    MAIL_TRANSPORT=local, or no EMAIL_ADDRESS, writes .eml files under data/mail instead"""
+    if os.getenv('MAIL_TRANSPORT', '').lower() == 'local' or not os.getenv('EMAIL_ADDRESS'):
+        return LocalMailTransport(os.getenv('LOCAL_MAIL_DIR', LOCAL_MAIL_DIR))
+    return SMTPTransport(
+        host=os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+        port=int(os.getenv('SMTP_PORT', 465)),
+        username=os.getenv('EMAIL_ADDRESS'),
+        password=os.getenv('EMAIL_PASSWORD'),
+        use_ssl=os.getenv('SMTP_SSL', '1').lower() not in ('0', 'false', 'no')
+    )
+
+
+class MailOutbox:
+    """Persistent queue of result notifications, sent as digests by a background worker.
+
+    ``enqueue`` is one SQLite insert, so a request never waits on SMTP and
+    a mail outage never fails a submission. The worker waits until the
+    oldest queued item is `digest_interval` seconds old (or `digest_max`
+    items are waiting), then sends one message per recipient covering
+    just those items, built by `render_digest(items) -> (subject, body,
+    attachments)` where attachments are ``(filename, bytes)`` pairs. Failed
+    sends are retried with exponential backoff and kept as 'failed' after
+    `max_attempts`. Queued items survive restarts; items claimed by a
+    worker that died are released after `claim_timeout` seconds.
+    """
+
+    def __init__(self, render_digest, transport=None, path=OUTBOX_DB, digest_interval=60.0, digest_max=50,
+                 max_attempts=5, retry_delay=30.0, claim_timeout=300.0, keep_sent=7 * 86400):
+        self.render_digest = render_digest
+        self.transport = transport or transport_from_env()
+        self.path = path
+        self.digest_interval = digest_interval
+        self.digest_max = digest_max
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.claim_timeout = claim_timeout
+        self.keep_sent = keep_sent
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+
+        self.digests_sent = 0
+        self.items_sent = 0
+        self.send_failures = 0
+        self.last_send_seconds = None
+        self.last_delivery_lag = None
+        self.last_error = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self):
+        """Start the background sender (idempotent)"""
+        if self._worker is None or not self._worker.is_alive():
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._worker_loop, name='mail-outbox')
+            self._worker.daemon = True
+            self._worker.start()
+
+    def enqueue(self, recipient, item):
+        """Queue a JSON-serializable item for the next digest to `recipient`"""
+        conn = self._connection()
+        with conn:
+            conn.execute(INSERT_MESSAGE, (recipient, json.dumps(item, default=str), time.time()))
+        self._wake.set()
+
+    def _next_wait(self):
+        """Seconds until a digest is due (0 = now), or None if nothing is queued"""
+        now = time.time()
+        due_at, sendable = self._connection().execute(NEXT_DUE, (self.digest_interval, now)).fetchone()
+        if due_at is None:
+            return None
+        if sendable >= self.digest_max:
+            return 0.0
+        return max(0.0, due_at - now)
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                wait = self._next_wait()
+                if wait == 0.0:
+                    self.flush()
+                    continue
+                self.transport.idle()
+                # An enqueue wakes us so a full digest goes out without waiting for the interval
+                self._wake.wait(timeout=min(wait, 5.0) if wait is not None else 5.0)
+                self._wake.clear()
+            except Exception as e:
+                logger.error(f"Mail outbox worker error: {e}")
+                self._stop.wait(self.retry_delay)
+
+    def _claim(self):
+        """Mark due items as being sent by this worker and return them grouped by recipient"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(RELEASE_STALE, (now - self.claim_timeout,))
+            rows = conn.execute(SELECT_DUE, (now, self.digest_max)).fetchall()
+            conn.executemany(CLAIM_MESSAGE, [(now, row[0]) for row in rows])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        batches = {}
+        for item_id, recipient, payload, attempts, created in rows:
+            batches.setdefault(recipient, []).append((item_id, json.loads(payload), attempts, created))
+        return batches
+
+    def flush(self):
+        """Send up to digest_max due items now, one digest per recipient; returns the number sent"""
+        sent = 0
+        conn = self._connection()
+        for recipient, entries in self._claim().items():
+            ids = [entry[0] for entry in entries]
+            started = time.monotonic()
+            try:
+                subject, body, attachments = self.render_digest([entry[1] for entry in entries])
+                message = EmailMessage()
+                message['Subject'] = subject
+                message['From'] = self.transport.sender
+                message['To'] = recipient
+                message.set_content(body)
+                for filename, data in attachments:
+                    message.add_attachment(data, maintype='application', subtype='octet-stream',
+                                           filename=filename)
+                self.transport.send(message)
+            except Exception as e:
+                self.send_failures += 1
+                self.last_error = str(e)
+                logger.error(f"Sending digest of {len(ids)} to {recipient} failed: {e}")
+                with conn:
+                    conn.executemany(MARK_RETRY, [
+                        (self.max_attempts, time.time() + self.retry_delay * (2 ** attempts), str(e), item_id)
+                        for item_id, _, attempts, _ in entries
+                    ])
+                continue
+
+            now = time.time()
+            oldest = min(entry[3] for entry in entries)
+            with conn:
+                conn.executemany(MARK_SENT, [(now, item_id) for item_id in ids])
+                conn.execute(PRUNE_SENT, (now - self.keep_sent,))
+            self.digests_sent += 1
+            self.items_sent += len(ids)
+            self.last_send_seconds = round(time.monotonic() - started, 3)
+            self.last_delivery_lag = round(now - oldest, 3)
+            sent += len(ids)
+        return sent
+
+    def get_stats(self):
+        """Queue depth and lag (age of the oldest unsent item) plus sender counters"""
+        conn = self._connection()
+        pending, oldest = conn.execute(PENDING_STATS).fetchone()
+        failed = conn.execute(COUNT_FAILED).fetchone()[0]
+        return {
+            'pending': pending,
+            'failed': failed,
+            'lag_seconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            'digest_interval': self.digest_interval,
+            'digests_sent': self.digests_sent,
+            'items_sent': self.items_sent,
+            'send_failures': self.send_failures,
+            'last_send_seconds': self.last_send_seconds,
+            'last_delivery_lag': self.last_delivery_lag,
+            'last_error': self.last_error,
+            'connections_opened': self.transport.connections_opened,
+            'transport': type(self.transport).__name__,
+            'worker_alive': bool(self._worker and self._worker.is_alive())
+        }
+
+    def stop(self):
+        """Stop the worker and close the transport; queued items stay for the next start"""
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout=10)
+        self.transport.close()
+
+
+_outboxes = {}
+_outboxes_lock = threading.Lock()
+
+
+def get_mail_outbox(render_digest, path=OUTBOX_DB, **kwargs):
+    """Get the process-wide outbox for a database path, creating and starting it on first use"""
+    with _outboxes_lock:
+        outbox = _outboxes.get(path)
+        if outbox is None:
+            outbox = MailOutbox(render_digest, path=path, **kwargs)
+            outbox.start()
+            atexit.register(outbox.stop)
+            _outboxes[path] = outbox
+        return outbox
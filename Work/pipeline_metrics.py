@@ -0,0 +1,137 @@
+import numpy as np
+
+# Pipeline stages timed per processed window, in pipeline order
+PIPELINE_STAGES = ('capture', 'queue_wait', 'gate', 'vad', 'features', 'verify', 'end_to_end')
+
+# Detection cascade, cheapest first: energy gate -> VAD -> speaker verification
+CASCADE_STAGES = ('gate', 'vad', 'verify')
+
+
+class RollingHistogram:
+    """Fixed-size window of recent samples with percentiles computed on read.
+
+    Recording is a single store into a preallocated array, so it is cheap
+    enough for the audio threads; sorting only happens when a snapshot is
+    requested.
+    """
+
+    def __init__(self, size=1024):
+        self.size = size
+        self._values = np.zeros(size, dtype=np.float64)
+        self._index = 0
+        self.count = 0
+
+    def record(self, value):
+        """Add one sample, overwriting the oldest once the window is full"""
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.size
+        self.count += 1
+
+    def reset(self):
+        """Forget all samples"""
+        self._index = 0
+        self.count = 0
+
+    def percentiles(self, percentiles=(50, 95, 99)):
+        """Percentiles over the retained window, or None if nothing was recorded"""
+        filled = min(self.count, self.size)
+        if not filled:
+            return None
+        return np.percentile(self._values[:filled], percentiles)
+
+    def summary(self, scale=1.0, digits=3, percentiles=(50, 95, 99)):
+        """Count, percentiles and max over the retained window"""
+        values = self.percentiles(percentiles)
+        if values is None:
+            return {'count': 0}
+
+        summary = {'count': self.count}
+        for percentile, value in zip(percentiles, values):
+            summary[f'p{percentile}'] = round(float(value) * scale, digits)
+        summary['max'] = round(float(self._values[:min(self.count, self.size)].max()) * scale, digits)
+        return summary
+
+
+class PipelineMetrics:
+    """Rolling per-stage latency histograms plus the similarity score distribution"""
+
+    def __init__(self, window=1024):
+        self.stages = {stage: RollingHistogram(window) for stage in PIPELINE_STAGES}
+        self.similarity = RollingHistogram(window)
+
+    def record(self, stage, seconds):
+        """Record one stage duration in seconds"""
+        self.stages[stage].record(seconds)
+
+    def record_similarity(self, similarity):
+        """Record one speaker similarity score"""
+        self.similarity.record(similarity)
+
+    def reset(self):
+        """Clear every histogram"""
+        for histogram in self.stages.values():
+            histogram.reset()
+        self.similarity.reset()
+
+    def snapshot(self):
+        """Stage latencies in milliseconds and similarity percentiles"""
+        return {
+            'stages_ms': {stage: histogram.summary(scale=1000.0) for stage, histogram in self.stages.items()},
+            'similarity': self.similarity.summary(percentiles=(5, 25, 50, 75, 95))
+        }
+
+
+class CascadeCounters:
+    """Pass/skip counts and total cost of each detection cascade stage.
+
+    A window skipped at one stage never pays for the stages after it, so
+    the CPU saved is estimated from the average cost those later stages
+    have when they do run.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Zero every counter"""
+        self.passed = {stage: 0 for stage in CASCADE_STAGES}
+        self.skipped = {stage: 0 for stage in CASCADE_STAGES}
+        self.seconds = {stage: 0.0 for stage in CASCADE_STAGES}
+
+    def record(self, stage, passed, seconds=0.0):
+        """Record one window evaluated by a stage and whether it went on to the next"""
+        if passed:
+            self.passed[stage] += 1
+        else:
+            self.skipped[stage] += 1
+        self.seconds[stage] += seconds
+
+    def _average_cost(self, stage):
+        evaluated = self.passed[stage] + self.skipped[stage]
+        return self.seconds[stage] / evaluated if evaluated else 0.0
+
+    def _pass_rate(self, stage):
+        evaluated = self.passed[stage] + self.skipped[stage]
+        return self.passed[stage] / evaluated if evaluated else 0.0
+
+    def snapshot(self):
+        """Per-stage counts and average cost, plus the estimated CPU time saved by skipping"""
+        stages = {}
+        for stage in CASCADE_STAGES:
+            stages[stage] = {
+                'evaluated': self.passed[stage] + self.skipped[stage],
+                'passed': self.passed[stage],
+                'skipped': self.skipped[stage],
+                'avg_ms': round(self._average_cost(stage) * 1000.0, 3)
+            }
+
+        # Cost a window would have gone on to pay after each stage had it not been skipped
+        after_vad = self._average_cost('verify')
+        after_gate = self._average_cost('vad') + self._pass_rate('vad') * after_vad
+        saved = self.skipped['gate'] * after_gate + self.skipped['vad'] * after_vad
+
+        return {
+            'stages': stages,
+            'cpu_seconds': round(sum(self.seconds.values()), 4),
+            'cpu_saved_seconds': round(saved, 4)
+        }
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import time
+import logging
+
+from audio_detector import AudioDetector, VoiceRegistrationError
+from audio_buffer import OVERFLOW_BLOCK
+from audio_sources import WavFileAudioInterface
+
+logger = logging.getLogger(__name__)
+
+
+def replay_recording(wav_path, profile_session_id=None, register_wav=None, register_seconds=10,
+                     threshold=None):
+    """Run a recorded interview through the full detector pipeline as fast as the CPU allows.
+
+    The WAV file stands in for the microphone: capture, the bounded queue
+    (in blocking mode, so nothing is dropped), VAD, feature extraction and
+    speaker verification all run exactly as they do live. The candidate's
+    voice comes from a stored profile or is registered from `register_wav`
+    (default: the first `register_seconds` of the recording itself).
+    """
+    detections = []
+    warnings = []
+
+    def detection_handler(result):
+        # Overlapping windows can fail verification without raising a new warning
+        raised_warning = result['is_authorized'] is False and (
+            not detections or result['warning_count'] != detections[-1]['warning_count']
+            or result['malpractice_count'] != detections[-1]['malpractice_count']
+        )
+        detections.append(result)
+        if raised_warning:
+            warnings.append({
+                'offset_seconds': result['offset_seconds'],
+                'warning_count': result['warning_count'],
+                'similarity': result['similarity']
+            })
+
+    session_id = f"replay_{os.path.splitext(os.path.basename(wav_path))[0]}"
+    detector = AudioDetector(
+        audio_interface=WavFileAudioInterface(wav_path, realtime=False),
+        overflow_policy=OVERFLOW_BLOCK,
+        session_id=session_id,
+        detection_callback=detection_handler
+    )
+    detector.persist_results = False  # Auditing must not write profiles, logs or blacklist entries
+    if threshold is not None:
+        detector.voice_similarity_threshold = threshold
+
+    report = {
+        'file': wav_path,
+        'session_id': session_id,
+        'audio_seconds': detector.audio.duration(detector.RATE)
+    }
+
+    try:
+        # Voice registration
+        if profile_session_id:
+            if not detector.load_voice_registration(profile_session_id):
+                raise VoiceRegistrationError(f"Voice profile {profile_session_id} not found")
+            detector.session_id = session_id
+            report['registration'] = {'source': 'profile', 'profile': profile_session_id}
+        else:
+            recording_interface = detector.audio
+            if register_wav:
+                detector.audio = WavFileAudioInterface(register_wav, realtime=False)
+            registration_start = time.perf_counter()
+            detector.start_voice_registration(register_seconds).join()
+            detector.audio = recording_interface
+            if not detector.is_voice_registered:
+                raise VoiceRegistrationError("Voice registration failed (see log)")
+            report['registration'] = {
+                'source': register_wav or 'recording',
+                'seconds': register_seconds,
+                'wall_seconds': round(time.perf_counter() - registration_start, 3)
+            }
+
+        # Monitoring: replay the whole file through capture -> queue -> VAD -> verification
+        start = time.perf_counter()
+        detector.start_interview()
+        detector.start_monitoring()
+        detector.capture_finished.wait()
+        detector.audio_queue.join()
+        wall_seconds = time.perf_counter() - start
+
+        detector.end_interview()
+        detector.stop_monitoring()
+
+        speech_windows = sum(1 for d in detections if d['is_speech'])
+        report.update({
+            'status': 'success',
+            'wall_seconds': round(wall_seconds, 3),
+            'realtime_factor': round(report['audio_seconds'] / wall_seconds, 2) if wall_seconds else None,
+            'windows': len(detections),
+            'speech_windows': speech_windows,
+            'warnings': warnings,
+            'malpractice_count': detector.get_malpractice_count(),
+            'cancelled': detector.get_malpractice_count() >= detector.max_malpractice_attempts,
+            'metrics': detector.get_pipeline_metrics(),
+            'detections': detections
+        })
+
+    except Exception as e:
+        logger.error(f"Replay of {wav_path} failed: {e}")
+        report.update({'status': 'error', 'message': str(e)})
+    finally:
+        detector.cleanup()
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay recorded interviews through the audio proctoring pipeline faster than realtime"
+    )
+    parser.add_argument('recordings', nargs='+', help="16-bit PCM WAV files to replay")
+    parser.add_argument('--profile', help="Session id of a stored voice profile to verify against")
+    parser.add_argument('--register-wav', help="Register the candidate's voice from this WAV file instead")
+    parser.add_argument('--register-seconds', type=float, default=10,
+                        help="Seconds of audio used for registration (default: 10)")
+    parser.add_argument('--threshold', type=float, help="Override the voice similarity threshold")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    parser.add_argument('--summary', action='store_true', help="Omit per-window detections from the report")
+    args = parser.parse_args()
+
+    reports = []
+    for path in args.recordings:
+        report = replay_recording(
+            path,
+            profile_session_id=args.profile,
+            register_wav=args.register_wav,
+            register_seconds=args.register_seconds,
+            threshold=args.threshold
+        )
+        if args.summary:
+            report.pop('detections', None)
+        reports.append(report)
+
+        if report['status'] == 'success':
+            print(f"{path}: {report['audio_seconds']:.1f}s audio in {report['wall_seconds']:.2f}s "
+                  f"({report['realtime_factor']}x realtime), {len(report['warnings'])} warnings")
+        else:
+            print(f"{path}: {report['message']}")
+
+    output = json.dumps(reports if len(reports) > 1 else reports[0], indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import os
+import json
+import time
+import base64
+import uuid
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DB = 'data/interview.db'
+RESULTS_JSON = 'data/interview_results.json'
+TOP_JSON = 'data/top.json'
+TOP_CANDIDATES_KEPT = 10
+RESULTS_PAGE_LIMIT = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT,
+    position TEXT,
+    score REAL,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL,
+    version INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_results_position ON results (position, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_results_score ON results (score);
+
+CREATE TABLE IF NOT EXISTS top_candidates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    score REAL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_top_candidates_score ON top_candidates (score);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Fixed SQL text so sqlite3's per-connection statement cache reuses the prepared statements
+INSERT_RESULT = ("INSERT OR REPLACE INTO results (id, name, email, position, score, timestamp, data, "
+                 "version) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+DELETE_RESULT = "DELETE FROM results WHERE id = ?"
+SELECT_RESULTS = "SELECT data FROM results ORDER BY timestamp DESC, id DESC"
+SELECT_RESULTS_OLDEST = "SELECT data FROM results ORDER BY timestamp ASC, id ASC"
+SELECT_RESULT = "SELECT data FROM results WHERE id = ?"
+RESULT_EXISTS = "SELECT 1 FROM results WHERE id = ?"
+SELECT_RESULTS_SINCE = "SELECT data FROM results WHERE version > ? AND version <= ? ORDER BY version, rowid"
+COUNT_RESULTS = "SELECT COUNT(*) FROM results"
+INSERT_TOP = "INSERT INTO top_candidates (name, score, timestamp) VALUES (?, ?, ?)"
+SELECT_TOP = "SELECT name, score, timestamp FROM top_candidates ORDER BY score DESC, id ASC LIMIT ?"
+# Every change to the results table bumps the version in the same transaction
+BUMP_VERSION = ("INSERT INTO meta (key, value) VALUES ('results_version', '1') "
+                "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+SET_MODIFIED = "INSERT OR REPLACE INTO meta (key, value) VALUES ('results_modified', ?)"
+SELECT_VERSION = "SELECT key, value FROM meta WHERE key IN ('results_version', 'results_modified')"
+SELECT_VERSION_NUMBER = "SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'results_version'"
+# Version of the last change that was not a plain insert (delete, clear, replaced id, import)
+SET_RESET_VERSION = "INSERT OR REPLACE INTO meta (key, value) VALUES ('results_reset_version', ?)"
+SELECT_RESET_VERSION = "SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'results_reset_version'"
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def encode_cursor(timestamp, result_id):
+    """Opaque page cursor for the (timestamp, id) of the last result on a page"""
+    raw = json.dumps([timestamp, result_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, result_id = json.loads(raw)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return str(timestamp), str(result_id)
+
+
+class ResultsStore:
+    """Interview results and top candidates in an embedded SQLite database (WAL mode).
+
+    Each thread gets its own connection; WAL lets the dashboard read while a
+    submission commits, and ``synchronous=NORMAL`` keeps single-row commits
+    from paying an fsync each. Queried fields are real indexed columns and
+    the full submitted record is kept as JSON, so responses are unchanged.
+    The legacy JSON files are imported once, the first time the database is
+    opened.
+
+    Every write bumps a version counter kept in the database, so callers
+    (and other worker processes) can tell whether anything changed without
+    reading the results themselves. Each row records the version it was
+    written at, so ``results_since`` can return just the newer rows as long
+    as nothing was deleted or replaced meanwhile.
+    """
+
+    def __init__(self, path=RESULTS_DB, results_json=RESULTS_JSON, top_json=TOP_JSON):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        self._add_version_column()
+        self._migrate_json(results_json, top_json)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, cached_statements=64)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def _add_version_column(self):
+        """Add the per-row version to databases created before it existed (older rows keep NULL)"""
+        conn = self._connection()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+        if 'version' not in columns:
+            try:
+                conn.execute("ALTER TABLE results ADD COLUMN version INTEGER")
+            except sqlite3.OperationalError:
+                pass  # Another worker process added it first
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_results_version ON results (version)")
+
+    def _migrate_json(self, results_json, top_json):
+        """Import the legacy JSON files once; later opens skip them"""
+        conn = self._connection()
+        if conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+
+        results, top = [], []
+        for path, target in ((results_json, results), (top_json, top)):
+            if path and os.path.exists(path):
+                try:
+                    with open(path, 'r') as f:
+                        target.extend(json.load(f))
+                except (OSError, ValueError) as e:
+                    logger.error(f"Could not import {path}: {e}")
+
+        # Re-check under the write lock: another worker process may have migrated meanwhile
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone():
+                conn.rollback()
+                return
+            version = self._bump_version(conn, reset=True)
+            conn.executemany(INSERT_RESULT, [
+                self._result_row(r, version) for r in results if isinstance(r, dict)
+            ])
+            conn.executemany(INSERT_TOP, [
+                (c.get('name'), _to_float(c.get('score')), c.get('timestamp'))
+                for c in top if isinstance(c, dict)
+            ])
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)",
+                         (datetime.now().isoformat(),))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if results or top:
+            logger.info(f"Imported {len(results)} results and {len(top)} top candidates from JSON")
+
+    @staticmethod
+    def _result_row(result, version):
+        """Fill in id/timestamp if missing and map a result dict to a table row written at `version`"""
+        result.setdefault('id', uuid.uuid4().hex)
+        result.setdefault('timestamp', datetime.now().isoformat())
+        result['id'] = str(result['id'])
+        return (
+            result['id'],
+            result.get('name'),
+            result.get('email'),
+            result.get('position'),
+            _to_float(result.get('score')),
+            result['timestamp'],
+            json.dumps(result),
+            version
+        )
+
+    @staticmethod
+    def _bump_version(conn, reset=False):
+        """Mark the results as changed and return the new version; call inside the writing transaction.
+
+        `reset` marks a change that was not a plain insert, so incremental
+        readers (see results_since) have to start over.
+        """
+        conn.execute(BUMP_VERSION)
+        conn.execute(SET_MODIFIED, (repr(time.time()),))
+        version = conn.execute(SELECT_VERSION_NUMBER).fetchone()[0]
+        if reset:
+            conn.execute(SET_RESET_VERSION, (str(version),))
+        return version
+
+    def version(self):
+        """(version, last-modified epoch seconds) of the results table; one indexed lookup"""
+        meta = dict(self._connection().execute(SELECT_VERSION).fetchall())
+        return int(meta.get('results_version', 0)), float(meta.get('results_modified', 0))
+
+    def add_result(self, result):
+        """Store one result; returns (result with its id and timestamp, version it was written at)"""
+        results, version = self.add_results([result])
+        return results[0], version
+
+    def add_results(self, results):
+        """Store several results in one transaction; returns (results, version they were written at)"""
+        results = [dict(result) for result in results]
+        conn = self._connection()
+        with conn:
+            # Bumping first takes the write lock, so the replace check below cannot race another writer
+            version = self._bump_version(conn)
+            rows = [self._result_row(result, version) for result in results]
+            ids = [row[0] for row in rows]
+            if len(set(ids)) < len(ids) or any(conn.execute(RESULT_EXISTS, (i,)).fetchone() for i in ids):
+                conn.execute(SET_RESET_VERSION, (str(version),))
+            conn.executemany(INSERT_RESULT, rows)
+        return results, version
+
+    def get_result(self, result_id):
+        row = self._connection().execute(SELECT_RESULT, (str(result_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete_result(self, result_id):
+        """Delete a result by id; returns whether it existed"""
+        conn = self._connection()
+        with conn:
+            deleted = conn.execute(DELETE_RESULT, (str(result_id),)).rowcount > 0
+            if deleted:
+                self._bump_version(conn, reset=True)
+        return deleted
+
+    def list_results(self):
+        """Every result, most recent first"""
+        return [json.loads(row[0]) for row in self._connection().execute(SELECT_RESULTS)]
+
+    def results_since(self, version):
+        """(results written after `version` in write order, current version).
+
+        The results are None if anything other than an insert happened
+        after `version` (a delete, a clear, a replaced id): the caller has
+        to start over from list_results.
+        """
+        conn = self._connection()
+        current = self.version()[0]
+        rows = conn.execute(SELECT_RESULTS_SINCE, (version, current)).fetchall()
+        # Read after the rows: a delete or replace of any of them is then always seen here
+        reset = conn.execute(SELECT_RESET_VERSION).fetchone()
+        if reset and reset[0] > version:
+            return None, current
+        return [json.loads(row[0]) for row in rows], current
+
+    def iter_results(self, oldest_first=False, batch_size=500):
+        """Yield every result, newest first (or oldest first), reading `batch_size` rows at a time"""
+        cursor = self._connection().execute(SELECT_RESULTS_OLDEST if oldest_first else SELECT_RESULTS)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield json.loads(row[0])
+        finally:
+            cursor.close()
+
+    def query_results(self, position=None, date_from=None, date_to=None, min_score=None,
+                      max_score=None, cursor=None, limit=RESULTS_PAGE_LIMIT, fields=None):
+        """One page of results, most recent first, and the cursor for the next page (None at the end).
+
+        Pages are keyset-paginated on (timestamp, id), so each page is an
+        index range scan however deep into the results it is, and results
+        submitted meanwhile don't shift later pages. `date_from`/`date_to`
+        are ISO dates or datetimes (a bare `date_to` date includes that whole
+        day); the score band is on the stored score scale. `fields`
+        restricts each result to those keys (plus ``id``).
+        """
+        clauses, params = [], []
+        if position:
+            clauses.append("position = ?")
+            params.append(position)
+        if date_from:
+            clauses.append("timestamp >= ?")
+            params.append(date_from)
+        if date_to:
+            # Timestamps are ISO strings: 'YYYY-MM-DD~' sorts after every time on that day
+            clauses.append("timestamp <= ?")
+            params.append(date_to + '~' if len(date_to) == 10 else date_to)
+        if min_score is not None:
+            clauses.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("score <= ?")
+            params.append(max_score)
+        if cursor:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        sql = "SELECT id, timestamp, data FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit + 1)  # One extra row tells us whether there is a next page
+
+        rows = self._connection().execute(sql, params).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+
+        results = []
+        for _, _, data in rows[:limit]:
+            result = json.loads(data)
+            if fields:
+                result = {key: result[key] for key in ('id', *fields) if key in result}
+            results.append(result)
+        return results, next_cursor
+
+    def count_results(self):
+        return self._connection().execute(COUNT_RESULTS).fetchone()[0]
+
+    def clear(self):
+        """Delete every result and top candidate"""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM top_candidates")
+            self._bump_version(conn, reset=True)
+
+    def top_candidates(self, limit=TOP_CANDIDATES_KEPT):
+        """Candidates imported from the legacy top.json (score in percent), highest score first.
+
+        New submissions are only in the results table; the leaderboard
+        merges these in when it rebuilds.
+        """
+        return [
+            {'name': name, 'score': score, 'timestamp': timestamp}
+            for name, score, timestamp in self._connection().execute(SELECT_TOP, (limit,))
+        ]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_results_store(path=RESULTS_DB):
+    """Get the process-wide results store for a database path, opening it on first use"""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = ResultsStore(path)
+            _stores[path] = store
+        return store
@@ -1,8 +1,8 @@
-from sentence_transformers import SentenceTransformer
+from embedding_model import get_embedding_model
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+model = get_embedding_model()
 
 def get_similarity_scores(transcript_path):
     try:
@@ -0,0 +1,199 @@
+import os
+import json
+import copy
+import atexit
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: no pre-fork server there, so one process owns the snapshot
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SESSION_STATE_SNAPSHOT = 'data/session_state.json'
+
+
+class SessionStateStore:
+    """Thread-safe in-memory status of each session (registration, interview, malpractice...).
+
+    State is a dict of named values per session id. Every ``set`` bumps
+    the session's version, so readers can tell whether anything changed,
+    and reads are a dictionary lookup under a lock instead of a file read.
+    Sessions never share a value, so concurrent interviews can't overwrite
+    each other's status. With a `snapshot_path`, a background thread writes
+    the store to disk at most every `snapshot_interval` seconds when it has
+    changed. Worker processes share the snapshot: each one merges the
+    sessions it changed into the file under a ``flock``, so they never
+    overwrite each other's sessions, and entries nobody has updated for
+    `stale_after` seconds are pruned. On start only the values accepted by
+    `restore(session_id, key)` are loaded back (all of them if it is None).
+    """
+
+    def __init__(self, snapshot_path=None, snapshot_interval=5.0, restore=None, stale_after=86400):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._owned = set()  # Sessions this process changed; only these are written to the snapshot
+        self._removed = set()  # Sessions this process removed since the last snapshot
+        self._dirty = False
+        self.snapshots_written = 0
+        self._stop = threading.Event()
+        self._writer = None
+
+        if snapshot_path:
+            directory = os.path.dirname(snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._load_snapshot(restore)
+            self._writer = threading.Thread(target=self._snapshot_loop, name='session-state-snapshot')
+            self._writer.daemon = True
+            self._writer.start()
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                return json.load(f)['sessions']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable session state snapshot: {e}")
+            return {}
+
+    def _load_snapshot(self, restore):
+        for session_id, session in self._read_snapshot().items():
+            state = {
+                key: value for key, value in session.get('state', {}).items()
+                if restore is None or restore(session_id, key)
+            }
+            if state:
+                self._sessions[session_id] = {**session, 'state': state}
+
+    @contextmanager
+    def _snapshot_lock(self):
+        """Exclusive inter-process lock for the read-merge-write of the snapshot"""
+        with open(self.snapshot_path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def set(self, session_id, key, value):
+        """Replace one value of a session's state and return the session's new version"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = {'version': 0, 'state': {}}
+            session['state'][key] = copy.deepcopy(value)
+            session['version'] += 1
+            session['updated'] = datetime.now().isoformat()
+            self._owned.add(session_id)
+            self._removed.discard(session_id)
+            self._dirty = True
+            return session['version']
+
+    def get(self, session_id, key, default=None):
+        """(value, session version) for one value of a session's state"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or key not in session['state']:
+                return default, session['version'] if session else 0
+            return copy.deepcopy(session['state'][key]), session['version']
+
+    def get_session(self, session_id):
+        """A copy of a session's whole state with its version, or None"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return copy.deepcopy(session) if session else None
+
+    def remove(self, session_id):
+        """Forget a session; returns whether it existed"""
+        with self._lock:
+            self._dirty = True
+            self._owned.discard(session_id)
+            self._removed.add(session_id)
+            return self._sessions.pop(session_id, None) is not None
+
+    def sessions(self):
+        """Session ids with their versions and last update times"""
+        with self._lock:
+            return {
+                session_id: {'version': session['version'], 'updated': session.get('updated')}
+                for session_id, session in self._sessions.items()
+            }
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.save()
+            except Exception as e:
+                logger.error(f"Session state snapshot failed: {e}")
+
+    def save(self):
+        """Merge this process's changes into the snapshot now if anything changed since the last one"""
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            owned = {
+                session_id: copy.deepcopy(self._sessions[session_id])
+                for session_id in self._owned if session_id in self._sessions
+            }
+            removed = set(self._removed)
+            self._dirty = False
+
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with self._snapshot_lock():
+                cutoff = (datetime.now() - timedelta(seconds=self.stale_after)).isoformat()
+                sessions = {
+                    session_id: session for session_id, session in self._read_snapshot().items()
+                    if session_id not in removed and session.get('updated', '') >= cutoff
+                }
+                sessions.update(owned)
+                with open(tmp_path, 'w') as f:
+                    json.dump({'saved_at': datetime.now().isoformat(), 'sessions': sessions}, f, default=str)
+                os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            with self._lock:
+                self._dirty = True  # Retry on the next snapshot
+            raise
+        with self._lock:
+            self._removed -= removed
+        self.snapshots_written += 1
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'snapshot_path': self.snapshot_path,
+                'snapshots_written': self.snapshots_written,
+                'unsaved_changes': self._dirty
+            }
+
+    def close(self):
+        """Stop the snapshot thread and write a final snapshot"""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+        self.save()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_session_state_store(snapshot_path=SESSION_STATE_SNAPSHOT, restore=None):
+    """Get the process-wide session state store for a snapshot path, creating it on first use"""
+    with _stores_lock:
+        store = _stores.get(snapshot_path)
+        if store is None:
+            store = SessionStateStore(snapshot_path, restore=restore)
+            atexit.register(store.close)
+            _stores[snapshot_path] = store
+        return store
@@ -5,10 +5,12 @@
                 this.isMonitoring = false;
                 this.registrationInProgress = false;
                 this.statusCheckInterval = null;
+                this.eventSource = null;
+                this.lastEventId = 0;
                 
                 this.initializeEventListeners();
                 this.checkAudioAvailability();
-                this.startStatusPolling();
+                this.startStatusUpdates();
             }
 
             initializeEventListeners() {
@@ -91,11 +93,8 @@
                     const data = await response.json();
                     
                     if (data.status === 'success') {
-                        // Show countdown
+                        // Show countdown; completion arrives as a 'registration' status event
                         this.showCountdown(duration);
-                        
-                        // Poll for completion
-                        this.pollRegistrationStatus();
                     } else {
                         throw new Error(data.message);
                     }
@@ -241,80 +240,98 @@
                 }, 1000);
             }
 
-            async pollRegistrationStatus() {
-                const pollInterval = setInterval(async () => {
+            handleRegistrationStatus(registration) {
+                if (!this.registrationInProgress) return;
+                
+                if (registration.status === 'completed') {
+                    this.registrationInProgress = false;
+                    this.showRecordingIndicator(false);
+                    this.showProgress(false);
+                    
+                    if (registration.success) {
+                        this.updateRegistrationStatus(true);
+                        this.showAlert('Voice registered successfully!', 'success');
+                    } else {
+                        this.showAlert('Voice registration failed', 'error');
+                    }
+                } else if (registration.status === 'failed' || registration.status === 'error') {
+                    this.registrationInProgress = false;
+                    this.showRecordingIndicator(false);
+                    this.showProgress(false);
+                    this.showAlert(`Registration failed: ${registration.error}`, 'error');
+                }
+            }
+
+            // Status changes are pushed over Server-Sent Events; browsers without
+            // EventSource (or when the stream can't be kept open) poll instead
+            startStatusUpdates() {
+                if (!window.EventSource) {
+                    this.startStatusPolling();
+                    return;
+                }
+                
+                this.eventSource = new EventSource('/session-events');
+                ['warning_status', 'interview_status', 'registration'].forEach((type) => {
+                    this.eventSource.addEventListener(type, (event) => {
+                        this.lastEventId = Number(event.lastEventId) || this.lastEventId;
+                        this.handleStatusEvent(type, JSON.parse(event.data));
+                    });
+                });
+                this.eventSource.onerror = () => {
+                    // EventSource retries on its own; only a closed stream means giving up on it
+                    if (this.eventSource.readyState === EventSource.CLOSED) {
+                        this.eventSource = null;
+                        this.startStatusPolling();
+                    }
+                };
+            }
+
+            startStatusPolling() {
+                this.statusCheckInterval = setInterval(async () => {
                     try {
-                        const response = await fetch('/check-registration-status');
+                        const response = await fetch(`/session-events/poll?after=${this.lastEventId}`);
                         const data = await response.json();
                         
-                        if (data.registration.status === 'completed') {
-                            clearInterval(pollInterval);
-                            this.registrationInProgress = false;
-                            this.showRecordingIndicator(false);
-                            this.showProgress(false);
-                            
-                            if (data.registration.success) {
-                                this.updateRegistrationStatus(true);
-                                this.showAlert('Voice registered successfully!', 'success');
-                            } else {
-                                this.showAlert('Voice registration failed', 'error');
-                            }
-                        } else if (data.registration.status === 'failed' || data.registration.status === 'error') {
-                            clearInterval(pollInterval);
-                            this.registrationInProgress = false;
-                            this.showRecordingIndicator(false);
-                            this.showProgress(false);
-                            this.showAlert(`Registration failed: ${data.registration.error}`, 'error');
+                        if (data.status === 'success') {
+                            data.events.forEach((event) => this.handleStatusEvent(event.type, event.data));
+                            this.lastEventId = data.last_id;
                         }
                     } catch (error) {
                         console.error('Status poll failed:', error);
                     }
-                }, 1000);
+                }, 2000);
             }
 
-            startStatusPolling() {
-                this.statusCheckInterval = setInterval(async () => {
-                    await this.updateVoiceWarnings();
-                    await this.checkInterviewStatus();
-                }, 2000);
+            handleStatusEvent(type, data) {
+                if (type === 'warning_status') {
+                    this.updateVoiceWarnings(data);
+                } else if (type === 'interview_status') {
+                    this.checkInterviewStatus(data);
+                } else if (type === 'registration') {
+                    this.handleRegistrationStatus(data);
+                }
             }
 
-            async updateVoiceWarnings() {
-                try {
-                    const response = await fetch('/get-voice-warnings');
-                    const data = await response.json();
-                    
-                    if (data.status === 'success') {
-                        document.getElementById('warningCount').textContent = `${data.warnings}/${data.max_warnings}`;
-                        document.getElementById('malpracticeCount').textContent = `${data.malpractice_count}/${data.max_malpractice}`;
-                        
-                        // Update colors based on warning level
-                        const warningElement = document.getElementById('warningCount');
-                        if (data.warnings >= data.max_warnings) {
-                            warningElement.style.color = '#dc3545';
-                        } else if (data.warnings > 0) {
-                            warningElement.style.color = '#ffc107';
-                        } else {
-                            warningElement.style.color = '#28a745';
-                        }
-                    }
-                } catch (error) {
-                    console.error('Failed to update warnings:', error);
+            updateVoiceWarnings(data) {
+                document.getElementById('warningCount').textContent = `${data.warnings}/${data.max_warnings}`;
+                document.getElementById('malpracticeCount').textContent = `${data.malpractice_count}/${data.max_malpractice}`;
+                
+                // Update colors based on warning level
+                const warningElement = document.getElementById('warningCount');
+                if (data.warnings >= data.max_warnings) {
+                    warningElement.style.color = '#dc3545';
+                } else if (data.warnings > 0) {
+                    warningElement.style.color = '#ffc107';
+                } else {
+                    warningElement.style.color = '#28a745';
                 }
             }
 
-            async checkInterviewStatus() {
-                try {
-                    const response = await fetch('/check-interview-status');
-                    const data = await response.json();
-                    
-                    if (data.interview_status.status === 'cancelled') {
-                        document.getElementById('interviewStatus').textContent = 'Cancelled';
-                        document.getElementById('interviewStatus').style.color = '#dc3545';
-                        this.showAlert(`Interview cancelled: ${data.interview_status.reason}`, 'error');
-                    }
-                } catch (error) {
-                    console.error('Failed to check interview status:', error);
+            checkInterviewStatus(interviewStatus) {
+                if (interviewStatus.status === 'cancelled') {
+                    document.getElementById('interviewStatus').textContent = 'Cancelled';
+                    document.getElementById('interviewStatus').style.color = '#dc3545';
+                    this.showAlert(`Interview cancelled: ${interviewStatus.reason}`, 'error');
                 }
             }
 
@@ -445,6 +462,9 @@ showProgress(show, text = '', percentage = 0) {
                 if (this.statusCheckInterval) {
                     clearInterval(this.statusCheckInterval);
                 }
+                if (this.eventSource) {
+                    this.eventSource.close();
+                }
                 
                 // Stop monitoring if active
                 if (this.isMonitoring) {
@@ -552,10 +572,18 @@ showProgress(show, text = '', percentage = 0) {
                 try {
                     this.showProgress(true, 'Checking voice quality...');
                     
-                    const response = await fetch('/check-voice-quality');
-                    const data = await response.json();
+                    // POST starts a fresh measurement; poll until it is done
+                    let response = await fetch('/check-voice-quality', { method: 'POST' });
+                    let data = await response.json();
+                    while (data.status === 'measuring') {
+                        await new Promise((resolve) => setTimeout(resolve, 500));
+                        response = await fetch('/check-voice-quality');
+                        data = await response.json();
+                    }
                     
-                    if (data.quality_score >= 0.8) {
+                    if (data.status === 'error') {
+                        this.showAlert(`Voice quality check failed: ${data.message}`, 'error');
+                    } else if (data.quality_score >= 0.8) {
                         this.showAlert(`Voice quality: Excellent (${Math.round(data.quality_score * 100)}%)`, 'success');
                     } else if (data.quality_score >= 0.6) {
                         this.showAlert(`Voice quality: Good (${Math.round(data.quality_score * 100)}%)`, 'info');
@@ -10,6 +10,7 @@ class VoiceInterviewSystem {
         this.isInterviewActive = false;
         this.currentQuestionIndex = 0;
         this.questions = [];
+        this.sessionId = null;
         this.qaPairs = [];
         this.currentTranscript = '';
         this.candidateInfo = {};
@@ -126,6 +127,7 @@ class VoiceInterviewSystem {
         const formData = new FormData();
         formData.append('resume', resumeFile);
         formData.append('jd', jdFile);
+        if (this.sessionId) formData.append('session_id', this.sessionId);
 
         try {
             const response = await fetch('/upload', {
@@ -137,6 +139,7 @@ class VoiceInterviewSystem {
             console.log('Upload response:', result);
 
             if (result.status === 'success') {
+                this.sessionId = result.session_id;
                 this.questions = result.result?.questions || [];
                 console.log('Questions loaded:', this.questions.length, 'questions');
                 
@@ -418,7 +421,7 @@ class VoiceInterviewSystem {
                 if (answerEl) answerEl.textContent = finalAnswer;
 
                 // Save the answer
-                this.saveTranscript(question, finalAnswer);
+                this.saveTranscript(this.currentQuestionIndex, question, finalAnswer);
 
                 // Move to next question
                 this.currentQuestionIndex++;
@@ -449,7 +452,7 @@ class VoiceInterviewSystem {
         }
     }
 
-    async saveTranscript(question, answer) {
+    async saveTranscript(index, question, answer) {
         try {
             const response = await fetch('/save-transcript', {
                 method: 'POST',
@@ -457,6 +460,8 @@ class VoiceInterviewSystem {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
+                    session_id: this.sessionId,
+                    index: index,
                     question: question,
                     answer: answer
                 })
@@ -482,7 +487,7 @@ class VoiceInterviewSystem {
         if (transcriptEl) transcriptEl.textContent = 'Please wait while we analyze your responses with advanced AI...';
         
         try {
-            const response = await fetch('/score-transcript');
+            const response = await fetch(`/score-transcript?session_id=${encodeURIComponent(this.sessionId || '')}`);
             
             if (!response.ok) {
                 throw new Error('Network response was not ok');
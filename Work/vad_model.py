@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+import torch
+from silero_vad import load_silero_vad
+
+logger = logging.getLogger(__name__)
+
+# Set VAD_USE_ONNX=1 to run Silero VAD through an onnxruntime session
+USE_ONNX_DEFAULT = os.getenv('VAD_USE_ONNX', '0').lower() in ('1', 'true', 'yes')
+
+_vad_model = None
+_vad_load_info = {}
+_load_lock = threading.Lock()
+
+# Samples per Silero VAD inference step for each supported sampling rate
+VAD_FRAME_SAMPLES = {16000: 512, 8000: 256}
+
+# Silero VAD keeps recurrent state inside the model, so callers sharing the
+# process-wide instance must hold this lock for the duration of one inference pass
+vad_inference_lock = threading.RLock()
+
+
+def _onnxruntime_available():
+    try:
+        import onnxruntime  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_vad_model(onnx=None):
+    """Get the process-wide Silero VAD model, loading it offline on first use.
+
+    The model is loaded from the weights packaged with ``silero_vad`` rather
+    than through ``torch.hub``, so startup never touches the network or the
+    hub cache.
+    """
+    global _vad_model
+
+    if _vad_model is not None:
+        return _vad_model
+
+    with _load_lock:
+        if _vad_model is not None:
+            return _vad_model
+
+        use_onnx = USE_ONNX_DEFAULT if onnx is None else onnx
+        if use_onnx and not _onnxruntime_available():
+            logger.warning("onnxruntime not installed; loading Silero VAD with torch instead")
+            use_onnx = False
+
+        start = time.perf_counter()
+        model = load_silero_vad(onnx=use_onnx)
+        elapsed = time.perf_counter() - start
+
+        _vad_load_info.update({
+            'backend': 'onnxruntime' if use_onnx else 'torch',
+            'load_seconds': round(elapsed, 4),
+            'loaded_at': time.time()
+        })
+        logger.info(f"Silero VAD model loaded from package ({_vad_load_info['backend']}) in {elapsed * 1000:.1f} ms")
+
+        _vad_model = model
+        return _vad_model
+
+
+def get_vad_load_info():
+    """Backend and load time of the shared VAD model (empty until loaded)"""
+    return dict(_vad_load_info)
+
+
+def batched_speech_probs(model, audio_batch, sampling_rate=16000):
+    """Speech probability per VAD frame for a (batch, samples) float32 array.
+
+    All rows are stepped through the model together, so N sessions cost one
+    model call per 32 ms frame instead of N.
+    """
+    frame = VAD_FRAME_SAMPLES[sampling_rate]
+    audio_batch = np.asarray(audio_batch, dtype=np.float32)
+    batch_size, n_samples = audio_batch.shape
+    n_frames = -(-n_samples // frame)
+
+    if n_frames * frame != n_samples:
+        padded = np.zeros((batch_size, n_frames * frame), dtype=np.float32)
+        padded[:, :n_samples] = audio_batch
+        audio_batch = padded
+
+    frames = torch.from_numpy(audio_batch).reshape(batch_size, n_frames, frame)
+    probs = np.empty((batch_size, n_frames), dtype=np.float32)
+
+    with vad_inference_lock, torch.no_grad():
+        model.reset_states()
+        for i in range(n_frames):
+            probs[:, i] = model(frames[:, i].contiguous(), sampling_rate).reshape(-1).numpy()
+        model.reset_states()
+
+    return probs
+
+
+def speech_frame_mask(probs, threshold=0.3, neg_threshold=None):
+    """Per-frame speech flags for `probs` with shape (batch, n_frames).
+
+    Uses the same hysteresis as ``get_speech_timestamps``: speech starts at
+    `threshold` and only ends once the probability drops below
+    `neg_threshold` (default ``threshold - 0.15``).
+    """
+    if neg_threshold is None:
+        neg_threshold = max(threshold - 0.15, 0.01)
+
+    mask = np.empty(probs.shape, dtype=bool)
+    triggered = np.zeros(probs.shape[0], dtype=bool)
+    for i, column in enumerate(probs.T):
+        triggered = np.where(column >= threshold, True, np.where(column < neg_threshold, False, triggered))
+        mask[:, i] = triggered
+    return mask
+
+
+def longest_speech_run(mask):
+    """Length in frames of the longest speech run in each row of a speech mask"""
+    run = np.zeros(mask.shape[0], dtype=np.int32)
+    longest = np.zeros(mask.shape[0], dtype=np.int32)
+    for column in mask.T:
+        run = np.where(column, run + 1, 0)
+        np.maximum(longest, run, out=longest)
+    return longest
+
+
+def has_speech(probs, threshold=0.3, min_speech_frames=7, neg_threshold=None):
+    """Whether each row of `probs` contains a speech run of at least `min_speech_frames`"""
+    mask = speech_frame_mask(probs, threshold, neg_threshold)
+    return longest_speech_run(mask) >= min_speech_frames
@@ -0,0 +1,192 @@
+import threading
+import time
+import logging
+
+import numpy as np
+import scipy.fft
+import scipy.signal
+import librosa
+
+logger = logging.getLogger(__name__)
+
+
+class MFCCExtractor:
+    """Vectorized MFCC extractor with the filterbank and DCT basis precomputed.
+
+    Mirrors ``librosa.feature.mfcc`` (centered, zero-padded Hann STFT, Slaney
+    mel filterbank, ``power_to_db`` with ``top_db=80`` and an orthonormal
+    DCT-II) but builds the window, mel matrix and DCT matrix once, so each
+    call is only framing, one rfft and two matrix products.
+    """
+
+    def __init__(self, sr=16000, n_mfcc=13, n_fft=2048, hop_length=512, n_mels=128,
+                 top_db=80.0, amin=1e-10):
+        self.sr = sr
+        self.n_mfcc = n_mfcc
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.top_db = top_db
+        self.amin = amin
+
+        self.window = scipy.signal.get_window('hann', n_fft, fftbins=True).astype(np.float32)
+
+        # Stored transposed so frames (T, F) @ basis (F, M) needs no transpose per call
+        mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+        self.mel_basis_t = np.ascontiguousarray(mel_basis.T, dtype=np.float32)
+
+        dct_basis = scipy.fft.dct(np.eye(n_mels, dtype=np.float32), type=2, norm='ortho', axis=0)
+        self.dct_basis_t = np.ascontiguousarray(dct_basis[:n_mfcc].T, dtype=np.float32)
+
+    def frame_mfcc(self, audio_data, center=True):
+        """Return per-frame MFCCs with shape (..., n_frames, n_mfcc).
+
+        Leading dimensions are treated as a batch of equal-length signals,
+        each normalized (``top_db``) independently as librosa would. With
+        ``center=False`` the signal is not zero-padded, so frame ``t``
+        covers ``audio[t * hop_length:t * hop_length + n_fft]`` only.
+        """
+        audio = np.asarray(audio_data, dtype=np.float32)
+        if center:
+            pad = self.n_fft // 2
+            padded = np.pad(audio, [(0, 0)] * (audio.ndim - 1) + [(pad, pad)])
+        else:
+            padded = audio
+
+        # Strided (..., T, n_fft) view over the padded signal - no frame copies
+        frames = np.lib.stride_tricks.sliding_window_view(padded, self.n_fft, axis=-1)
+        frames = frames[..., ::self.hop_length, :]
+
+        spectrum = np.fft.rfft(frames * self.window, axis=-1)
+        power = spectrum.real ** 2
+        power += spectrum.imag ** 2
+
+        mel = power.astype(np.float32, copy=False) @ self.mel_basis_t
+        np.maximum(mel, self.amin, out=mel)
+        log_mel = np.log10(mel, out=mel)
+        log_mel *= 10.0
+        np.maximum(log_mel, log_mel.max(axis=(-2, -1), keepdims=True) - self.top_db, out=log_mel)
+
+        return log_mel @ self.dct_basis_t
+
+    def extract(self, audio_data):
+        """Return MFCC mean and std per coefficient as one feature vector"""
+        mfcc = self.frame_mfcc(audio_data)
+        return np.concatenate([mfcc.mean(axis=-2), mfcc.std(axis=-2)], axis=-1)
+
+    def extract_batch(self, audio_batch):
+        """Feature vectors for a (batch, samples) array in one vectorized pass"""
+        return self.extract(audio_batch)
+
+
+class RunningFeatureStats:
+    """Running mean and variance of per-frame MFCCs (Welford, merged a block at a time).
+
+    ``features()`` has the same layout as ``MFCCExtractor.extract``
+    (per-coefficient mean then population std), but over every frame
+    added so far, so features can be accumulated while audio streams in.
+    """
+
+    def __init__(self, n_mfcc=13):
+        self.n_mfcc = n_mfcc
+        self.reset()
+
+    def reset(self):
+        """Forget every frame"""
+        self.count = 0
+        self.mean = np.zeros(self.n_mfcc, dtype=np.float64)
+        self._m2 = np.zeros(self.n_mfcc, dtype=np.float64)
+
+    def update(self, frames):
+        """Add a block of frames with shape (n_frames, n_mfcc)"""
+        frames = np.asarray(frames, dtype=np.float64)
+        n = len(frames)
+        if not n:
+            return
+
+        block_mean = frames.mean(axis=0)
+        block_m2 = ((frames - block_mean) ** 2).sum(axis=0)
+
+        total = self.count + n
+        delta = block_mean - self.mean
+        self.mean += delta * (n / total)
+        self._m2 += block_m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count else np.zeros(self.n_mfcc)
+
+    def features(self):
+        """MFCC mean and std over all frames as one feature vector"""
+        return np.concatenate([self.mean, np.sqrt(self.variance)]).astype(np.float32)
+
+
+_extractors = {}
+_extractors_lock = threading.Lock()
+
+
+def get_mfcc_extractor(sr=16000, **kwargs):
+    """Get the shared extractor for a sample rate, building it on first use"""
+    key = (sr, tuple(sorted(kwargs.items())))
+    extractor = _extractors.get(key)
+    if extractor is None:
+        with _extractors_lock:
+            extractor = _extractors.get(key)
+            if extractor is None:
+                extractor = MFCCExtractor(sr=sr, **kwargs)
+                _extractors[key] = extractor
+    return extractor
+
+
+def librosa_voice_features(audio_data, sr=16000):
+    """Reference MFCC mean/std features computed with librosa"""
+    mfcc = librosa.feature.mfcc(
+        y=np.asarray(audio_data, dtype=np.float32),
+        sr=sr,
+        n_mfcc=13,
+        n_fft=2048,
+        hop_length=512
+    )
+    return np.concatenate([np.mean(mfcc, axis=1), np.std(mfcc, axis=1)])
+
+
+def benchmark(sr=16000, seconds=0.96, repeats=200, seed=0):
+    """Compare the fast extractor against librosa for accuracy and speed"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * seconds)) / sr
+    # Harmonic tone plus noise, roughly speech-like in level
+    audio = (0.3 * np.sin(2 * np.pi * 180 * t) + 0.1 * np.sin(2 * np.pi * 720 * t)
+             + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+
+    extractor = get_mfcc_extractor(sr)
+    fast = extractor.extract(audio)
+    reference = librosa_voice_features(audio, sr)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        librosa_voice_features(audio, sr)
+    librosa_time = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        extractor.extract(audio)
+    fast_time = (time.perf_counter() - start) / repeats
+
+    return {
+        'max_abs_error': float(np.max(np.abs(fast - reference))),
+        'matches_librosa': bool(np.allclose(fast, reference, rtol=1e-3, atol=1e-2)),
+        'librosa_ms': librosa_time * 1000,
+        'fast_ms': fast_time * 1000,
+        'speedup': librosa_time / fast_time
+    }
+
+
+if __name__ == "__main__":
+    results = benchmark()
+    print("MFCC feature extraction benchmark (0.96 s @ 16 kHz)")
+    print(f"   librosa:      {results['librosa_ms']:.3f} ms/call")
+    print(f"   precomputed:  {results['fast_ms']:.3f} ms/call")
+    print(f"   speedup:      {results['speedup']:.1f}x")
+    print(f"   max abs diff: {results['max_abs_error']:.2e} "
+          f"({'match' if results['matches_librosa'] else 'MISMATCH'})")
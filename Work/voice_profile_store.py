@@ -0,0 +1,291 @@
+import os
+import json
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no pre-fork server there, so the thread lock is enough
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = 'data/voice_profiles'
+FEATURE_DIM = 26  # 13 MFCC means + 13 MFCC stds
+
+# Search standardizes each dimension against the stored population, which needs enough profiles
+MIN_POPULATION = int(os.getenv('VOICE_SEARCH_MIN_PROFILES', 20))
+
+# Standardized cosine at which two profiles are taken to be the same speaker. Not yet calibrated
+# on real speech, so by default nothing is reported as a reappearance (blacklist or proxy hit).
+MATCH_THRESHOLD = float(os.environ['VOICE_MATCH_THRESHOLD']) if os.getenv('VOICE_MATCH_THRESHOLD') else None
+
+
+def search_weights(dim=FEATURE_DIM):
+    """Per-dimension search weights: c0 (mean and std) tracks loudness, not the speaker"""
+    weights = np.ones(dim, dtype=np.float32)
+    weights[0] = weights[dim // 2] = 0.0
+    return weights
+
+
+class VoiceProfileStore:
+    """Voice profiles in one memory-mapped float32 matrix plus a small JSON index.
+
+    Row ``i`` of ``profiles.f32`` holds the features of the ``i``-th profile
+    in ``index.json``. Lookups by session id are a dict hit, listing never
+    touches the matrix, and 1:N search is a single matrix-vector product
+    over every stored profile. Raw MFCC statistics are dominated by c0 and
+    the overall level, so search compares per-dimension z-scores against
+    the stored population, without c0. Legacy per-session JSON profiles in
+    the same directory are imported the first time the store is opened.
+
+    Several processes may share a directory: writers hold an exclusive
+    ``flock`` on ``profiles.lock`` (readers a shared one) and re-read the
+    index and re-map the matrix whenever another process replaced either.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, dim=FEATURE_DIM, initial_capacity=256):
+        self.directory = directory
+        self.dim = dim
+        self._weights = search_weights(dim)
+        self.matrix_path = os.path.join(directory, 'profiles.f32')
+        self.index_path = os.path.join(directory, 'index.json')
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, 'profiles.lock'), 'a')
+
+        with self._locked():
+            if os.path.exists(self.index_path) and os.path.exists(self.matrix_path):
+                self._load()
+            else:
+                self.capacity = initial_capacity
+                self.entries = []
+                self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='w+',
+                                         shape=(self.capacity, self.dim))
+                self._import_legacy_profiles()
+                self._save_index()
+                self._build_lookup()
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        """Hold the thread lock and the inter-process file lock (not reentrant)"""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _disk_version(self):
+        """Identity of the index and matrix files; a rewrite or a grow replaces the file"""
+        index_stat = os.stat(self.index_path)
+        return index_stat.st_ino, index_stat.st_mtime_ns, os.stat(self.matrix_path).st_ino
+
+    def _load(self):
+        """Map the matrix and read the index from disk"""
+        with open(self.index_path, 'r') as f:
+            index = json.load(f)
+        self._version = self._disk_version()
+        self.capacity = index['capacity']
+        self.entries = index['entries']
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r+',
+                                 shape=(self.capacity, self.dim))
+        self._build_lookup()
+
+    def _build_lookup(self):
+        self._rows = {entry['session_id']: row for row, entry in enumerate(self.entries)}
+        self._search_index = None
+
+    def _standardize(self, features, mean, std):
+        """Weighted z-scores of feature rows against the population, scaled to unit length"""
+        scaled = (np.asarray(features, dtype=np.float32) - mean) / std * self._weights
+        norms = np.linalg.norm(scaled, axis=-1, keepdims=True)
+        return scaled / np.maximum(norms, 1e-12)
+
+    def _build_search_index(self):
+        """Population statistics and the standardized matrix, rebuilt after profiles change"""
+        profiles = np.asarray(self._matrix[:len(self.entries)], dtype=np.float32)
+        mean = profiles.mean(axis=0)
+        std = np.maximum(profiles.std(axis=0), 1e-6)
+        self._search_index = (self._standardize(profiles, mean, std), mean, std)
+
+    def _refresh(self):
+        """Reload if another process has rewritten the index or grown the matrix since we last read them"""
+        try:
+            if self._disk_version() != self._version:
+                self._load()
+        except FileNotFoundError:
+            pass
+
+    def _import_legacy_profiles(self):
+        """Import per-session <session_id>.json profiles written by older versions"""
+        imported = 0
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith('.json') or filename == 'index.json':
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'r') as f:
+                    profile = json.load(f)
+                self._append(profile['session_id'], profile['features'],
+                             profile.get('timestamp'), profile.get('threshold'))
+                imported += 1
+            except Exception as e:
+                logger.error(f"Skipping unreadable voice profile {filename}: {e}")
+
+        if imported:
+            self._matrix.flush()
+            logger.info(f"Imported {imported} legacy voice profiles into the profile store")
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'dim': self.dim, 'capacity': self.capacity, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.index_path)
+        self._version = self._disk_version()
+
+    def _grow(self):
+        """Double the matrix capacity by rewriting it into a larger file"""
+        new_capacity = self.capacity * 2
+        tmp_path = self.matrix_path + '.tmp'
+        grown = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=(new_capacity, self.dim))
+        grown[:self.capacity] = self._matrix
+        grown.flush()
+        del grown
+
+        del self._matrix
+        os.replace(tmp_path, self.matrix_path)
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r+',
+                                 shape=(new_capacity, self.dim))
+        self.capacity = new_capacity
+
+    def _append(self, session_id, features, timestamp=None, threshold=None):
+        if len(self.entries) >= self.capacity:
+            self._grow()
+        row = len(self.entries)
+        self._matrix[row] = np.asarray(features, dtype=np.float32)
+        self.entries.append({
+            'session_id': session_id,
+            'timestamp': timestamp or datetime.now().isoformat(),
+            'threshold': threshold,
+            'blacklisted': False
+        })
+        return row
+
+    def add(self, session_id, features, timestamp=None, threshold=None):
+        """Store (or replace) the voice profile for a session"""
+        features = np.asarray(features, dtype=np.float32)
+        if features.shape != (self.dim,):
+            raise ValueError(f"Expected {self.dim} features, got shape {features.shape}")
+
+        with self._locked():
+            self._refresh()
+            row = self._rows.get(session_id)
+            if row is None:
+                row = self._append(session_id, features, timestamp, threshold)
+                self._rows[session_id] = row
+            else:
+                self._matrix[row] = features
+                self.entries[row].update({
+                    'timestamp': timestamp or datetime.now().isoformat(),
+                    'threshold': threshold
+                })
+
+            self._search_index = None
+            self._matrix.flush()
+            self._save_index()
+
+    def get(self, session_id):
+        """Return (features, metadata) for a session, or None"""
+        with self._locked(exclusive=False):
+            self._refresh()
+            row = self._rows.get(session_id)
+            if row is None:
+                return None
+            return np.array(self._matrix[row]), dict(self.entries[row])
+
+    def __contains__(self, session_id):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return session_id in self._rows
+
+    def __len__(self):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return len(self.entries)
+
+    def list_profiles(self):
+        """Profile metadata, newest first"""
+        with self._locked(exclusive=False):
+            self._refresh()
+            profiles = [dict(entry) for entry in self.entries]
+        profiles.sort(key=lambda p: p['timestamp'], reverse=True)
+        return profiles
+
+    def mark_blacklisted(self, session_id, blacklisted=True):
+        """Flag a profile so reappearances of that speaker can be detected"""
+        with self._locked():
+            self._refresh()
+            row = self._rows.get(session_id)
+            if row is None:
+                return False
+            self.entries[row]['blacklisted'] = blacklisted
+            self._save_index()
+            return True
+
+    def search(self, features, top_k=5, min_similarity=None, exclude=None, blacklisted_only=False):
+        """Cosine-similarity search of one feature vector against every stored profile.
+
+        Similarities are between standardized features (see the class
+        docstring). Returns no matches while fewer than MIN_POPULATION
+        profiles are stored, as the population statistics are unreliable.
+        """
+        with self._locked(exclusive=False):
+            self._refresh()
+            count = len(self.entries)
+            if count < MIN_POPULATION:
+                logger.info(f"Voice profile search needs {MIN_POPULATION} stored profiles, have {count}")
+                return []
+            if self._search_index is None:
+                self._build_search_index()
+            standardized, mean, std = self._search_index
+            similarities = standardized @ self._standardize(features, mean, std)
+
+            candidates = np.argsort(similarities)[::-1]
+            matches = []
+            for row in candidates:
+                entry = self.entries[row]
+                if min_similarity is not None and similarities[row] < min_similarity:
+                    break
+                if exclude and entry['session_id'] == exclude:
+                    continue
+                if blacklisted_only and not entry['blacklisted']:
+                    continue
+                matches.append({
+                    'session_id': entry['session_id'],
+                    'similarity': round(float(similarities[row]), 4),
+                    'blacklisted': entry['blacklisted']
+                })
+                if len(matches) >= top_k:
+                    break
+            return matches
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_profile_store(directory=PROFILE_DIR):
+    """Get the process-wide profile store for a directory, opening it on first use"""
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = VoiceProfileStore(directory)
+            _stores[directory] = store
+        return store
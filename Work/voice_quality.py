@@ -0,0 +1,167 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+# Frame levels are histogrammed in 1 dB bins over [LEVEL_MIN_DB, 0] dBFS
+LEVEL_MIN_DB = -100
+CLIP_THRESHOLD = 32000  # |sample| at or above this counts as clipped (int16 full scale is 32767)
+
+
+class VoiceQualityMonitor:
+    """Rolling microphone-quality statistics fed with int16 PCM as it is captured.
+
+    Every call to ``update`` folds the new samples into fixed-size
+    accumulators (a level histogram per 32 ms frame, sample and clipped
+    counts), so ``report`` costs the same whether one second or one hour of
+    audio has been seen. Accumulators are kept per `block_seconds` block and
+    only the last `window_seconds` are scored, so the report follows changes
+    to the microphone instead of averaging in old audio. From the histogram: the noise floor is a low
+    percentile of frame level, speech frames are those well above it, SNR
+    is speech level minus noise floor and loudness is the typical speech
+    level in dBFS.
+    """
+
+    def __init__(self, rate=16000, frame_length=512, speech_margin_db=10.0, window_seconds=10.0, block_seconds=1.0):
+        self.rate = rate
+        self.frame_length = frame_length
+        self.speech_margin_db = speech_margin_db
+        self.block_samples = int(rate * block_seconds)
+        self.window_blocks = max(1, int(round(window_seconds / block_seconds)))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all accumulated audio"""
+        with self._lock:
+            # Totals over the window: the completed blocks still in it plus the block being filled
+            self._histogram = np.zeros(-LEVEL_MIN_DB + 1, dtype=np.int64)
+            self.samples = 0
+            self.clipped = 0
+            self._blocks = deque()  # Completed blocks as (histogram, samples, clipped), oldest first
+            self._new_block()
+            self._remainder = np.zeros(0, dtype=np.int16)
+
+    def _new_block(self):
+        self._block_histogram = np.zeros(-LEVEL_MIN_DB + 1, dtype=np.int64)
+        self._block_samples = 0
+        self._block_clipped = 0
+
+    def _close_block(self):
+        """Move the filled block into the window and evict the oldest once the window is full"""
+        self._blocks.append((self._block_histogram, self._block_samples, self._block_clipped))
+        self._new_block()
+        if len(self._blocks) >= self.window_blocks:
+            histogram, samples, clipped = self._blocks.popleft()
+            self._histogram -= histogram
+            self.samples -= samples
+            self.clipped -= clipped
+
+    def update(self, samples):
+        """Fold newly captured int16 samples into the accumulators"""
+        samples = np.asarray(samples, dtype=np.int16)
+        with self._lock:
+            while len(samples):
+                piece = samples[:self.block_samples - self._block_samples]
+                samples = samples[len(piece):]
+                self._add(piece)
+                if self._block_samples >= self.block_samples:
+                    self._close_block()
+
+    def _add(self, samples):
+        clipped = int(np.count_nonzero(np.abs(samples.astype(np.int32)) >= CLIP_THRESHOLD))
+        self.samples += len(samples)
+        self.clipped += clipped
+        self._block_samples += len(samples)
+        self._block_clipped += clipped
+
+        # Only whole frames are scored; the tail waits for the next update
+        if len(self._remainder):
+            samples = np.concatenate([self._remainder, samples])
+        n_frames = len(samples) // self.frame_length
+        self._remainder = samples[n_frames * self.frame_length:].copy()
+        if not n_frames:
+            return
+
+        frames = samples[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        frames = frames.astype(np.float32) / 32768.0
+        power = np.einsum('ij,ij->i', frames, frames) / self.frame_length
+        level_db = 10.0 * np.log10(np.maximum(power, 1e-10))
+        bins = np.clip(np.rint(level_db).astype(np.int64) - LEVEL_MIN_DB, 0, len(self._histogram) - 1)
+        counts = np.bincount(bins, minlength=len(self._histogram))
+        self._histogram += counts
+        self._block_histogram += counts
+
+    @property
+    def seconds(self):
+        """Seconds of audio in the scored window"""
+        return self.samples / self.rate
+
+    def _percentile(self, cumulative, total, percentile):
+        return int(np.searchsorted(cumulative, total * percentile / 100.0)) + LEVEL_MIN_DB
+
+    def report(self):
+        """Quality score in [0, 1], its components and any problems found"""
+        with self._lock:
+            histogram = self._histogram.copy()
+            samples = self.samples
+            clipped = self.clipped
+
+        frames = int(histogram.sum())
+        if not frames:
+            return {'quality_score': 0.0, 'seconds': 0.0, 'issues': ['No audio captured yet']}
+
+        cumulative = np.cumsum(histogram)
+        noise_floor_db = self._percentile(cumulative, frames, 10)
+
+        # Speech: frames at least speech_margin_db above the noise floor
+        speech_bin = min(max(int(noise_floor_db + self.speech_margin_db) - LEVEL_MIN_DB, 0), len(histogram))
+        speech_frames = int(histogram[speech_bin:].sum())
+        speech_ratio = speech_frames / frames
+
+        if speech_frames:
+            speech_cumulative = np.cumsum(histogram[speech_bin:])
+            speech_level_db = self._percentile(speech_cumulative, speech_frames, 50) + speech_bin
+        else:
+            speech_level_db = noise_floor_db
+        snr_db = speech_level_db - noise_floor_db
+        clipping_ratio = clipped / samples if samples else 0.0
+
+        # Component scores: 10 -> 30 dB SNR, up to 1% clipped samples, speech around -35..-10 dBFS
+        snr_score = float(np.clip((snr_db - 10.0) / 20.0, 0.0, 1.0))
+        clipping_score = float(1.0 - np.clip(clipping_ratio / 0.01, 0.0, 1.0))
+        speech_score = float(np.clip(speech_ratio / 0.3, 0.0, 1.0))
+        if speech_level_db < -35:
+            loudness_score = float(np.clip((speech_level_db + 50.0) / 15.0, 0.0, 1.0))
+        elif speech_level_db > -10:
+            loudness_score = float(np.clip(-speech_level_db / 10.0, 0.0, 1.0))
+        else:
+            loudness_score = 1.0
+
+        issues = []
+        if speech_ratio < 0.1:
+            issues.append('Little or no speech detected - please speak into the microphone')
+        if snr_db < 15:
+            issues.append('High background noise relative to your voice')
+        if clipping_ratio > 0.001:
+            issues.append('Audio is clipping - lower the microphone gain or move back')
+        if speech_level_db < -40:
+            issues.append('Voice level is very low - move closer to the microphone')
+
+        quality_score = 0.4 * snr_score + 0.2 * clipping_score + 0.2 * loudness_score + 0.2 * speech_score
+        return {
+            'quality_score': round(quality_score, 3),
+            'seconds': round(samples / self.rate, 2),
+            'snr_db': snr_db,
+            'noise_floor_dbfs': noise_floor_db,
+            'speech_level_dbfs': speech_level_db,
+            'speech_ratio': round(speech_ratio, 3),
+            'clipping_ratio': round(clipping_ratio, 5),
+            'components': {
+                'snr': round(snr_score, 3),
+                'clipping': round(clipping_score, 3),
+                'loudness': round(loudness_score, 3),
+                'speech': round(speech_score, 3)
+            },
+            'issues': issues
+        }
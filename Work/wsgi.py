@@ -0,0 +1,9 @@
+"""WSGI entry point for production serving.
+
+Run with ``gunicorn -c gunicorn.conf.py wsgi:app``. The gunicorn master
+loads the VAD and embedding models before forking (see gunicorn.conf.py),
+then each worker imports this module and starts its own background threads.
+"""
+from app import app
+
+application = app